@@ -137,3 +137,22 @@ class SanitationCodeViolationIncidentAdmin(admin.ModelAdmin):
 
     def sanitation_code(self, obj):
         return obj.sanitation_code_violation.nature_of_code_violation
+
+
+@admin.register(models.ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    """Admin for import checkpoints
+    """
+    list_display = ('file_name', 'rows', 'completed', 'updated_at')
+    search_fields = ('file_name', 'file_hash')
+    ordering = ('-updated_at',)
+
+
+@admin.register(models.IncidentDailyRollup)
+class IncidentDailyRollupAdmin(admin.ModelAdmin):
+    """Admin for the daily rollup of the incidents
+    """
+    list_display = ('creation_date', 'type_of_service_request', 'zip_code', 'ssa', 'police_district', 'ward',
+                    'community_area', 'number_of_requests', 'number_of_completed', 'completion_time')
+    list_filter = ('type_of_service_request',)
+    ordering = ('-creation_date',)
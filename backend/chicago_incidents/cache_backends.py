@@ -0,0 +1,192 @@
+"""Cache backend with a bounded in-process tier in front of a shared cache
+"""
+import collections
+import pickle
+import threading
+import time
+import typing
+
+from django.core.cache import caches
+from django.contrib.sessions.backends.cache import KEY_PREFIX as SESSION_KEY_PREFIX
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+
+class TieredCache(BaseCache):
+    """Cache with two tiers: an LRU cache in the memory of the process, bounded by `MAX_ENTRIES` and with entries that
+    expire after `LOCAL_TIMEOUT` seconds, in front of a cache that is shared by the processes (the cache alias
+    `SHARED`, e.g. Redis). The reads are served by the local tier while its entries are fresh and fall back to the
+    shared tier. The writes go to both tiers, so the other processes see a change within `LOCAL_TIMEOUT` seconds.
+
+    The keys that start with one of the `SHARED_ONLY_PREFIXES` (by default the keys of the cached sessions) are kept by
+    the shared tier only, so that their deletions (e.g. a logout) are seen by the other processes at once.
+
+    Example configuration::
+
+        CACHES = {
+            'default': {
+                'BACKEND': 'chicago_incidents.cache_backends.TieredCache',
+                'OPTIONS': {'SHARED': 'shared', 'MAX_ENTRIES': 5000, 'LOCAL_TIMEOUT': 5,
+                            'SHARED_ONLY_PREFIXES': ['django.contrib.sessions.cache']},
+            },
+            'shared': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://localhost:6379/1'},
+        }
+    """
+
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        options = params.get('OPTIONS', params.get('options', {}))
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only_prefixes = tuple(options.get('SHARED_ONLY_PREFIXES', [SESSION_KEY_PREFIX]))
+        # The local entries (pickled values & expiry times) by key, from the least to the most recently used
+        self.local = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self) -> BaseCache:
+        """Get the shared tier.
+
+        :return: The shared cache.
+        """
+        return caches[self.shared_alias]
+
+    def local_key(self, key: str, version=None) -> typing.Optional[str]:
+        """Get the key of the local tier for a key of the cache.
+
+        :param key: The key of the cache.
+        :param version: The version of the key.
+        :return: The key of the local tier, or None if the key is kept by the shared tier only.
+        """
+        if key.startswith(self.shared_only_prefixes):
+            return None
+        return self.make_key(key, version=version)
+
+    def local_get(self, key: typing.Optional[str]) -> typing.Tuple[bool, typing.Any]:
+        """Get a value from the local tier.
+
+        :param key: The key of the local tier (None for the keys of the shared tier only).
+        :return: Whether the key was found and its value.
+        """
+        if key is None:
+            return False, None
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return False, None
+            pickled, expires = entry
+            if expires <= time.monotonic():
+                del self.local[key]
+                return False, None
+            self.local.move_to_end(key)
+        return True, pickle.loads(pickled)
+
+    def local_set(self, key: typing.Optional[str], value, timeout=DEFAULT_TIMEOUT):
+        """Set a value at the local tier, evicting the least recently used values beyond the size bound.
+
+        :param key: The key of the local tier (None for the keys of the shared tier only).
+        :param value: The value.
+        :param timeout: The timeout of the value, the local tier keeps it for `LOCAL_TIMEOUT` seconds at most.
+        """
+        if key is None:
+            return
+        timeout = self.get_backend_timeout(timeout)
+        local_timeout = self.local_timeout if timeout is None else min(timeout - time.time(), self.local_timeout)
+        if local_timeout <= 0:
+            self.local_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.local[key] = (pickled, time.monotonic() + local_timeout)
+            self.local.move_to_end(key)
+            while len(self.local) > self._max_entries:
+                self.local.popitem(last=False)
+
+    def local_delete(self, key: typing.Optional[str]):
+        """Delete a value from the local tier.
+
+        :param key: The key of the local tier (None for the keys of the shared tier only).
+        """
+        if key is None:
+            return
+        with self.lock:
+            self.local.pop(key, None)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self.local_set(self.local_key(key, version=version), value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        self.validate_key(self.make_key(key, version=version))
+        local_key = self.local_key(key, version=version)
+        found, value = self.local_get(local_key)
+        if found:
+            return value
+        # The missing values are not kept locally, so that the values set by the other processes are seen at once
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            return default
+        self.local_set(local_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self.local_set(self.local_key(key, version=version), value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self.shared.touch(key, timeout=timeout, version=version)
+        if not touched:
+            self.local_delete(self.local_key(key, version=version))
+        return touched
+
+    def delete(self, key, version=None):
+        self.local_delete(self.local_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        found, _ = self.local_get(self.local_key(key, version=version))
+        return found or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # The counters are always increased at the shared tier, which is the only one that is consistent
+        value = self.shared.incr(key, delta, version=version)
+        self.local_set(self.local_key(key, version=version), value)
+        return value
+
+    def get_many(self, keys, version=None):
+        values = {}
+        missing = []
+        for key in keys:
+            found, value = self.local_get(self.local_key(key, version=version))
+            if found:
+                values[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            shared_values = self.shared.get_many(missing, version=version)
+            for key, value in shared_values.items():
+                self.local_set(self.local_key(key, version=version), value)
+            values.update(shared_values)
+        return values
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self.local_set(self.local_key(key, version=version), value, timeout)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local_delete(self.local_key(key, version=version))
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        with self.lock:
+            self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
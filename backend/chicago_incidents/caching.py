@@ -0,0 +1,159 @@
+"""Cache of the responses of the queries endpoints. The responses are cached by the action and its normalized
+parameters, under a global data version that is increased whenever the incidents change (imports and creations), so
+that the cached responses of the previous data are not read again.
+"""
+import collections
+import functools
+import hashlib
+import json
+import threading
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+# The cache keys of the data version and of the hit & miss counters
+DATA_VERSION_KEY = 'queries:data_version'
+HITS_KEY = 'queries:hits:{}'
+MISSES_KEY = 'queries:misses:{}'
+
+# The query parameters of the paginated actions, which are not part of their validated data
+PAGINATION_PARAMS = ['page', 'per_page', 'cursor', 'count']
+
+# The names of the cached actions, used to report their counters
+CACHED_ACTIONS = []
+
+# The increments of the counters that are not added to the cache yet, by key
+COUNTERS_FLUSH_SECONDS = 10
+pending_counters = collections.Counter()
+counters_flushed_at = time.monotonic()
+counters_lock = threading.Lock()
+
+
+def get_data_version() -> int:
+    """Get the current version of the data.
+
+    :return: The data version.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, 1, timeout=None)
+        version = cache.get(DATA_VERSION_KEY, 1)
+    return version
+
+
+def bump_data_version() -> int:
+    """Increase the version of the data, so that the cached responses are computed again.
+
+    :return: The new data version.
+    """
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        # The version is not set yet (or it is evicted), so any version after the initial one invalidates
+        cache.add(DATA_VERSION_KEY, 2, timeout=None)
+        return cache.get(DATA_VERSION_KEY, 2)
+
+
+def count(key: str):
+    """Increase a counter of the cache. The increments are buffered in the process and added to the cache at most
+    every `COUNTERS_FLUSH_SECONDS`, so that the cache hits do not write to the shared cache.
+
+    :param key: The key of the counter.
+    """
+    global counters_flushed_at
+    with counters_lock:
+        pending_counters[key] += 1
+        if time.monotonic() - counters_flushed_at < COUNTERS_FLUSH_SECONDS:
+            return
+        counters_flushed_at = time.monotonic()
+    flush_counters()
+
+
+def flush_counters():
+    """Add the buffered increments of the counters to the cache.
+    """
+    with counters_lock:
+        increments = dict(pending_counters)
+        pending_counters.clear()
+    for key, delta in increments.items():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+
+
+def get_stats() -> dict:
+    """Get the hit & miss counters of the cached actions.
+
+    :return: The data version, the total hits & misses and the hits & misses of each action.
+    """
+    flush_counters()
+    counters = cache.get_many([key.format(name) for name in CACHED_ACTIONS for key in (HITS_KEY, MISSES_KEY)])
+    actions = {name: {'hits': counters.get(HITS_KEY.format(name), 0),
+                      'misses': counters.get(MISSES_KEY.format(name), 0)}
+               for name in CACHED_ACTIONS}
+    return {
+        'data_version': get_data_version(),
+        'hits': sum(counter['hits'] for counter in actions.values()),
+        'misses': sum(counter['misses'] for counter in actions.values()),
+        'actions': actions,
+    }
+
+
+def make_key(name: str, data: dict, version: int) -> str:
+    """Create the cache key of the response of an action.
+
+    :param name: The name of the action.
+    :param data: The normalized parameters of the action.
+    :param version: The data version.
+    :return: The cache key.
+    """
+    params = json.dumps(data, sort_keys=True, default=str)
+    return f'queries:{version}:{name}:{hashlib.sha256(params.encode()).hexdigest()}'
+
+
+def cache_response(params_serializer: typing.Type = None):
+    """Decorator that caches the responses of an action of a view set. The query parameters are validated with the
+    parameters serializer of the action, so the requests with equivalent parameters (e.g. in a different order) share
+    the same response. The invalid requests are left to the action, which responds with its validation errors.
+
+    :param params_serializer: The serializer of the query parameters of the action, if it has any.
+    :return: The decorator.
+    """
+    def decorator(func: typing.Callable) -> typing.Callable:
+        CACHED_ACTIONS.append(func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            data = {}
+            if params_serializer is not None:
+                query_params = params_serializer(data=request.query_params, context={'request': request})
+                if not query_params.is_valid():
+                    return func(view, request, *args, **kwargs)
+                data = dict(query_params.validated_data)
+            data.update({param: request.query_params[param] for param in PAGINATION_PARAMS
+                         if param in request.query_params})
+
+            key = make_key(func.__name__, data, get_data_version())
+            cached = cache.get(key)
+            if cached is not None:
+                count(HITS_KEY.format(func.__name__))
+                response = Response(cached)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            count(MISSES_KEY.format(func.__name__))
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout=getattr(settings, 'QUERIES_CACHE_TIMEOUT', None))
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,93 @@
+"""Streaming exports of the results of the queries as NDJSON or CSV. The rows are read from a server-side cursor a chunk
+at a time and written to the response as they are read, so the memory stays flat for any size of the results.
+"""
+import csv
+import json
+import typing
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+
+FORMAT_CHOICES = [
+    (NDJSON, 'Newline delimited JSON'),
+    (CSV, 'CSV'),
+]
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv',
+}
+
+# The rows that are fetched at a time from the server-side cursor, and written at a time to the response
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns the written value instead of storing it, to get the lines of a csv writer.
+    """
+
+    def write(self, value: str) -> str:
+        """Return the written value.
+
+        :param value: The value.
+        :return: The value.
+        """
+        return value
+
+
+def iter_ndjson(rows: typing.Iterable[dict]) -> typing.Iterator[str]:
+    """Write the rows as newline delimited JSON objects.
+
+    :param rows: The rows.
+    :return: The chunks of the NDJSON lines.
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_csv(rows: typing.Iterable[dict], fields: typing.List[str]) -> typing.Iterator[str]:
+    """Write the rows as CSV lines, after a header line with the fields.
+
+    :param rows: The rows.
+    :param fields: The fields of the rows, in order of the columns.
+    :return: The chunks of the CSV lines.
+    """
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(fields)]
+    for row in rows:
+        lines.append(writer.writerow([row[field] for field in fields]))
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def export_response(queryset: QuerySet, fields: typing.List[str], output_format: str,
+                    filename: str) -> StreamingHttpResponse:
+    """Create the response that streams the results of a query as an attachment.
+
+    :param queryset: The query.
+    :param fields: The fields of the results.
+    :param output_format: The format of the export (NDJSON or CSV).
+    :param filename: The name of the exported file, without the extension.
+    :return: The streaming response.
+    """
+    rows = queryset.values(*fields).iterator(chunk_size=CHUNK_SIZE)
+    if output_format == CSV:
+        content = iter_csv(rows, fields)
+    else:
+        content = iter_ndjson(rows)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[output_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output_format}"'
+    return response
@@ -0,0 +1,25 @@
+"""Database functions of the queries
+"""
+from django.db.models import BooleanField, Func
+
+
+class PointInBox(Func):
+    """Whether the point of a pair of coordinates lies in a box: `point(x, y) <@ box(point(x1, y1), point(x2, y2))`.
+    The GiST index of the points of the incidents (`Incident.LOCATION_INDEX`) answers it for `point(longitude,
+    latitude)`, so both coordinates are searched by one index instead of two separate ones.
+
+    The geometric operators of PostgreSQL compare with a small tolerance (1e-6), so the exact ranges of the coordinates
+    should be filtered too when the boundaries matter.
+
+    Usage: `PointInBox('longitude', 'latitude', Value(x1), Value(y1), Value(x2), Value(y2))`
+    """
+    arity = 6
+    output_field = BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql_parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sql_parts.append(sql)
+            params.extend(expression_params)
+        return 'point(%s, %s) <@ box(point(%s, %s), point(%s, %s))' % tuple(sql_parts), params
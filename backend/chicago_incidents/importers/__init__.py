@@ -0,0 +1,8 @@
+from .checkpoints import *
+from .copy_loader import *
+from .indexes import *
+from .lookups import *
+from .metrics import *
+from .rows import *
+from .sources import *
+from .synthetic import *
@@ -0,0 +1,56 @@
+"""Helpers for the checkpoints of the chunked imports
+"""
+import collections
+import hashlib
+import re
+import typing
+
+# Matches the table of the INSERT statements of the ORM
+INSERT_TABLE = re.compile(r'^INSERT INTO "([^"]+)"')
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hash of the contents of a file, that identifies the file between the imports.
+
+    :param path: The path of the file.
+    :param block_size: The number of bytes that are read at once.
+    :return: The hex digest of the hash.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class WriteCounter:
+    """Counter of the records that are written to each table. It is installed as an execute wrapper of the
+    connection (see `connection.execute_wrapper`) in order to count the INSERT statements of the ORM, and the COPY
+    engine adds its writes explicitly.
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        match = INSERT_TABLE.match(sql)
+        if match:
+            self.add(match.group(1), context['cursor'].rowcount)
+        return result
+
+    def add(self, table: str, count: int):
+        """Count records that are written to a table.
+
+        :param table: The table.
+        :param count: The number of records.
+        """
+        self.counts[table] += count
+
+    def pop(self) -> typing.Dict[str, int]:
+        """Get the counts and start counting from zero.
+
+        :return: The number of records written to each table.
+        """
+        counts, self.counts = dict(self.counts), collections.Counter()
+        return counts
@@ -0,0 +1,211 @@
+"""Loader that streams normalized incident rows to PostgreSQL with ``COPY FROM STDIN``
+"""
+import contextlib
+import io
+import typing
+
+import pandas as pd
+from django.db import connection
+from django.db.models import Model
+from django.utils import timezone
+
+from .. import models
+from .checkpoints import WriteCounter
+from .lookups import LookupCache
+from .metrics import ImportMetrics
+from .rows import iter_rows
+
+# Translation table for the PostgreSQL COPY text format
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+# The representation of NULL at the PostgreSQL COPY text format
+COPY_NULL = '\\N'
+
+# The incident fields that can be filled from the columns of a normalized dataframe
+INCIDENT_FIELDS = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                   'street_address', 'zip_code', 'zip_codes', 'x_coordinate', 'y_coordinate', 'ward', 'wards',
+                   'historical_wards_03_15', 'police_district', 'community_area', 'community_areas', 'ssa',
+                   'census_tracts', 'latitude', 'longitude', 'location']
+
+
+def identity(value):
+    """Converter that leaves the values intact.
+    """
+    return value
+
+
+def cap(limit: int) -> typing.Callable:
+    """Create a converter that limits integer values to the specified upper bound.
+
+    :param limit: The upper bound.
+    :return: The converter.
+    """
+    def converter(value):
+        if value and int(value) > limit:
+            return limit
+        return value
+    return converter
+
+
+class LookupChild:
+    """A payload of incidents that is stored deduplicated at a lookup table and is connected to the incidents through
+    an intermediate table (e.g. `activities` & `activities_incidents`). The records of the lookup table are resolved by
+    a `LookupCache`, and the missing ones are written with the incidents.
+    """
+
+    def __init__(self, lookup_model: typing.Type[Model], link_model: typing.Type[Model], link_field: str,
+                 fields: typing.Dict[str, str], link_fields: typing.Dict[str, str] = None,
+                 converters: typing.Dict[str, typing.Callable] = None):
+        """
+        :param lookup_model: The model of the lookup table.
+        :param link_model: The model of the intermediate table.
+        :param link_field: The foreign key of the intermediate table that points to the lookup table.
+        :param fields: The lookup model fields mapped to the dataframe columns that fill them.
+        :param link_fields: Extra intermediate model fields mapped to the dataframe columns that fill them.
+        :param converters: Converters that are applied to the values of the dataframe columns.
+        """
+        self.lookup_model = lookup_model
+        self.link_model = link_model
+        self.link_field = link_field
+        self.fields = fields
+        self.link_fields = link_fields or {}
+        self.converters = converters or {}
+        self.lookups = LookupCache(lookup_model, list(fields))
+
+    def load(self, loader: 'CopyLoader', chunk: pd.DataFrame, incident_ids: typing.List[int]):
+        """Write the lookup records that do not exist yet and the intermediate records of a chunk of incidents.
+
+        :param loader: The loader that writes the records.
+        :param chunk: The chunk of the normalized dataframe.
+        :param incident_ids: The ids of the incidents of the chunk.
+        """
+        columns = list(self.fields.values()) + list(self.link_fields.values())
+        converters = [self.converters.get(column, identity) for column in self.link_fields.values()]
+        links = []
+        for incident_id, values in zip(incident_ids, iter_rows(chunk[columns], name=None)):
+            key = LookupCache.make_key(values[:len(self.fields)])
+            if not any(key):
+                continue
+            extra = [convert(value) for convert, value in zip(converters, values[len(self.fields):])]
+            links.append((key, incident_id, extra))
+
+        new_keys = self.lookups.missing(key for key, _, _ in links)
+        if new_keys:
+            lookup_ids = loader.reserve_ids(self.lookup_model, len(new_keys))
+            self.lookups.add(new_keys, lookup_ids)
+            loader.copy(self.lookup_model, ['id'] + list(self.fields),
+                        ([lookup_id, *key] for key, lookup_id in zip(new_keys, lookup_ids)))
+
+        loader.copy(self.link_model, [f'{self.link_field}_id', 'incident_id'] + list(self.link_fields),
+                    ([self.lookups.get(key), incident_id, *extra] for key, incident_id, extra in links))
+
+
+class DetailChild:
+    """A payload of incidents that is stored at a table that points directly to the incidents (e.g.
+    `rodent_baiting_premises`).
+    """
+
+    def __init__(self, model: typing.Type[Model], fields: typing.Dict[str, str],
+                 converters: typing.Dict[str, typing.Callable] = None):
+        """
+        :param model: The model of the table.
+        :param fields: The model fields mapped to the dataframe columns that fill them.
+        :param converters: Converters that are applied to the values of the dataframe columns.
+        """
+        self.model = model
+        self.fields = fields
+        self.converters = converters or {}
+
+    def load(self, loader: 'CopyLoader', chunk: pd.DataFrame, incident_ids: typing.List[int]):
+        """Write the records of a chunk of incidents.
+
+        :param loader: The loader that writes the records.
+        :param chunk: The chunk of the normalized dataframe.
+        :param incident_ids: The ids of the incidents of the chunk.
+        """
+        columns = list(self.fields.values())
+        converters = [self.converters.get(column, identity) for column in columns]
+        rows = ([incident_id] + [convert(value) for convert, value in zip(converters, values)]
+                for incident_id, values in zip(incident_ids, iter_rows(chunk[columns], name=None))
+                if any(values))
+        loader.copy(self.model, ['incident_id'] + list(self.fields), rows)
+
+
+class CopyLoader:
+    """Loader that writes the incidents of a normalized dataframe and their payloads with ``COPY FROM STDIN`` in
+    bounded chunks. The ids of the records are reserved from the sequences of the tables, so that the intermediate
+    tables can be written at the same pass without reading back the inserted incidents.
+    """
+
+    def __init__(self, chunk_size: int = 50000, counter: WriteCounter = None, metrics: ImportMetrics = None):
+        """
+        :param chunk_size: The number of incidents that are written with each COPY.
+        :param counter: Counter of the records that are written to each table.
+        :param metrics: Metrics of the import, that the COPY statements are reported to.
+        """
+        self.chunk_size = chunk_size
+        self.counter = counter
+        self.metrics = metrics
+        # Value for the `created_at` & `updated_at` fields of the records
+        self.now = timezone.now()
+
+    def load(self, df: pd.DataFrame, children: typing.Iterable[typing.Union[LookupChild, DetailChild]] = ()) -> int:
+        """Write the incidents of a normalized dataframe and their payloads to the database.
+
+        :param df: The normalized dataframe.
+        :param children: The payloads of the incidents.
+        :return: The number of incidents written.
+        """
+        fields = [field for field in INCIDENT_FIELDS if field in df.columns]
+        for start in range(0, len(df), self.chunk_size):
+            chunk = df.iloc[start:start + self.chunk_size]
+            incident_ids = self.reserve_ids(models.Incident, len(chunk))
+            rows = ([incident_id, *row]
+                    for incident_id, row in zip(incident_ids, iter_rows(chunk[fields], name=None)))
+            self.copy(models.Incident, ['id'] + fields, rows)
+            for child in children:
+                child.load(self, chunk, incident_ids)
+        return len(df)
+
+    @staticmethod
+    def reserve_ids(model: typing.Type[Model], count: int) -> typing.List[int]:
+        """Reserve ids from the sequence of the table of a model.
+
+        :param model: The model.
+        :param count: The number of ids to reserve.
+        :return: The reserved ids.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                           [model._meta.db_table, model._meta.pk.column, count])
+            return [row[0] for row in cursor.fetchall()]
+
+    def copy(self, model: typing.Type[Model], field_names: typing.List[str], rows: typing.Iterable[list]):
+        """Write rows to the table of a model with ``COPY FROM STDIN``. The values are prepared by the model fields
+        exactly as the ORM does, and the `created_at` & `updated_at` fields are filled automatically.
+
+        :param model: The model.
+        :param field_names: The names (or attnames) of the fields that the rows contain.
+        :param rows: The rows to write.
+        """
+        model_fields = [model._meta.get_field(name) for name in field_names]
+        prepare = [field.get_db_prep_save for field in model_fields]
+        columns = [field.column for field in model_fields] + ['created_at', 'updated_at']
+        timestamps = f'{self.now}\t{self.now}\n'
+
+        buffer = io.StringIO()
+        count = 0
+        for row in rows:
+            count += 1
+            for prep, value in zip(prepare, row):
+                value = prep(value, connection)
+                buffer.write(COPY_NULL if value is None else str(value).translate(COPY_ESCAPES))
+                buffer.write('\t')
+            buffer.write(timestamps)
+
+        if not buffer.tell():
+            return
+        buffer.seek(0)
+        with connection.cursor() as cursor, self.metrics.query() if self.metrics else contextlib.nullcontext():
+            cursor.copy_expert(f'COPY {model._meta.db_table} ({", ".join(columns)}) FROM STDIN', buffer)
+        if self.counter is not None:
+            self.counter.add(model._meta.db_table, count)
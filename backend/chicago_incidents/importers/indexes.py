@@ -0,0 +1,213 @@
+"""Deferred build of the indexes of the tables that are bulk loaded
+"""
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+
+from .. import models
+
+# The non-unique indexes of the tables, with the statements that create them. The size of the partitioned tables is
+# the size of their partitions
+INDEX_DEFINITIONS_SQL = '''
+    SELECT index_class.relname, pg_get_indexdef(index_class.oid)
+    FROM pg_index
+    JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+    JOIN pg_class table_class ON table_class.oid = pg_index.indrelid
+    WHERE table_class.relname = ANY(%s) AND pg_table_is_visible(table_class.oid)
+        AND NOT pg_index.indisunique AND NOT pg_index.indisprimary
+    ORDER BY (SELECT SUM(pg_relation_size(relid)) FROM pg_partition_tree(table_class.oid)) DESC, index_class.relname
+'''
+
+# The number of the rows of a column of a table and the correlation of its values with the physical order of the rows.
+# The correlation of a partitioned table is the correlation at each partition, weighted by the rows of the partition
+CORRELATION_SQL = '''
+    SELECT SUM(partition_class.reltuples),
+        SUM(ABS(pg_stats.correlation) * partition_class.reltuples) / NULLIF(SUM(partition_class.reltuples), 0)
+    FROM pg_partition_tree(%s::regclass) AS tree
+    JOIN pg_class partition_class ON partition_class.oid = tree.relid
+    JOIN pg_namespace ON pg_namespace.oid = partition_class.relnamespace
+    JOIN pg_stats ON pg_stats.schemaname = pg_namespace.nspname AND pg_stats.tablename = partition_class.relname
+        AND pg_stats.attname = %s AND NOT pg_stats.inherited
+    WHERE tree.isleaf
+'''
+
+
+def build_index(name: str, definition: str):
+    """Create an index with its own connection, so that the indexes can be built by separate threads. Once it is built,
+    its persisted statement is deleted.
+
+    :param name: The name of the index.
+    :param definition: The statement that creates the index.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(definition)
+        models.DeferredIndex.objects.filter(name=name).delete()
+    finally:
+        connection.close()
+
+
+class DeferredIndexes:
+    """The non-unique indexes of a set of tables, which are dropped before a bulk load and rebuilt after it, instead
+    of being maintained row by row. The unique indexes (primary keys, unique constraints) are kept, so that the loaded
+    data is still validated.
+
+    The statements of the dropped indexes are persisted (see `models.DeferredIndex`) before the indexes are dropped,
+    and each one is deleted once its index is rebuilt. If the load is interrupted, the indexes that are left dropped
+    are rebuilt by `restore`.
+    """
+
+    def __init__(self, tables: typing.List[str]):
+        """
+        :param tables: The tables of the indexes.
+        """
+        self.tables = list(tables)
+        self.definitions = []
+        self.saved = set()
+
+    @classmethod
+    def restore(cls, workers: int = 1) -> int:
+        """Rebuild the indexes that were left dropped by an interrupted bulk load, from their persisted statements. The
+        indexes that exist already are skipped.
+
+        :param workers: The number of indexes that are built at the same time.
+        :return: The number of the persisted statements.
+        """
+        indexes = cls([])
+        indexes.definitions = [(name, definition.replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ', 1))
+                               for name, definition in models.DeferredIndex.objects.order_by('id')
+                               .values_list('name', 'definition')]
+        indexes.saved = {name for name, _ in indexes.definitions}
+        return indexes.rebuild(workers)
+
+    def save(self):
+        """Persist the statements of the indexes, replacing the ones that were persisted before by this set of indexes
+        (e.g. when the indexes of the timestamp columns are chosen).
+        """
+        names = {name for name, _ in self.definitions}
+        with transaction.atomic():
+            models.DeferredIndex.objects.filter(name__in=self.saved | names).delete()
+            models.DeferredIndex.objects.bulk_create([models.DeferredIndex(name=name, definition=definition)
+                                                      for name, definition in self.definitions])
+        self.saved = names
+
+    def drop(self) -> int:
+        """Drop the indexes and keep the statements that create them, persisted before the first index is dropped.
+
+        :return: The number of indexes dropped.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(INDEX_DEFINITIONS_SQL, [self.tables])
+            # The indexes of the partitioned tables are defined `ON ONLY` the table, which would not build them at the
+            # partitions
+            self.definitions = [(name, definition.replace(' ON ONLY ', ' ON ', 1))
+                                for name, definition in cursor.fetchall()]
+            self.save()
+            for name, _ in self.definitions:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        return len(self.definitions)
+
+    def rebuild(self, workers: int = 1) -> int:
+        """Create the dropped indexes. PostgreSQL builds different indexes of the same table at the same time, so they
+        are created by a pool of threads, each one with its own connection. The largest tables come first.
+
+        :param workers: The number of indexes that are built at the same time.
+        :return: The number of indexes created.
+        """
+        names = [name for name, _ in self.definitions]
+        definitions = [definition for _, definition in self.definitions]
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            # Consume the results, so that the errors of the builds are raised
+            list(executor.map(build_index, names, definitions))
+        self.definitions, self.saved = [], set()
+        return len(definitions)
+
+    def analyze(self):
+        """Refresh the statistics of the tables, so that the query planner takes the loaded data into account.
+        """
+        with connection.cursor() as cursor:
+            for table in self.tables:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+
+class TimestampIndexes:
+    """The indexes of the timestamp columns of a table whose rows arrive in roughly chronological order (e.g. the
+    creation dates of the incidents). A B-tree indexes every row, while a BRIN index keeps only the range of the values
+    of each block of rows, so for a column that follows the physical order of the rows it answers the range queries
+    at a fraction of the size and of the build and maintenance cost of the B-tree.
+
+    After a bulk load, each column is indexed by its BRIN index if the table is large and the column is well correlated
+    with the order of the rows, and by its B-tree otherwise (the columns without a B-tree keep the BRIN index only when
+    it is chosen).
+    """
+
+    def __init__(self, table: str, columns: typing.Dict[str, bool], min_rows: int, min_correlation: float):
+        """
+        :param table: The table.
+        :param columns: The timestamp columns, with whether they are indexed by a B-tree when the BRIN index is not
+        chosen.
+        :param min_rows: The minimum number of the rows of the table for the BRIN indexes.
+        :param min_correlation: The minimum (absolute) correlation of a column with the order of the rows for its BRIN
+        index.
+        """
+        self.table = table
+        self.columns = columns
+        self.min_rows = min_rows
+        self.min_correlation = min_correlation
+
+    def index_name(self, column: str, method: str) -> str:
+        """Get the name of the index of a column.
+
+        :param column: The column.
+        :param method: The index method, `brin` or `btree`.
+        :return: The name of the index.
+        """
+        return f'{self.table}_{column}_{method}'
+
+    def definition(self, column: str, method: str) -> typing.Tuple[str, str]:
+        """Get the statement that creates the index of a column.
+
+        :param column: The column.
+        :param method: The index method, `brin` or `btree`.
+        :return: The name of the index and the statement.
+        """
+        name = self.index_name(column, method)
+        return name, f'CREATE INDEX {connection.ops.quote_name(name)} ON {connection.ops.quote_name(self.table)} ' \
+                     f'USING {method} ({connection.ops.quote_name(column)})'
+
+    def statistics(self) -> typing.Dict[str, typing.Tuple[int, float]]:
+        """Analyze the columns and find their statistics.
+
+        :return: The number of the rows and the correlation of each column.
+        """
+        statistics = {}
+        with connection.cursor() as cursor:
+            columns = ', '.join(connection.ops.quote_name(column) for column in self.columns)
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(self.table)} ({columns})')
+            for column in self.columns:
+                cursor.execute(CORRELATION_SQL, [self.table, column])
+                rows, correlation = cursor.fetchone()
+                statistics[column] = (int(rows or 0), float(correlation or 0))
+        return statistics
+
+    def choose(self, indexes: DeferredIndexes) -> typing.Dict[str, typing.Optional[str]]:
+        """Choose the index of each column after a bulk load, replacing the dropped indexes of the columns with the
+        chosen ones (also in their persisted statements).
+
+        :param indexes: The dropped indexes of the table.
+        :return: The index method of each column, `brin` or `btree` (or None for a column without index).
+        """
+        methods = {}
+        for column, (rows, correlation) in self.statistics().items():
+            if rows >= self.min_rows and correlation >= self.min_correlation:
+                methods[column] = 'brin'
+            else:
+                methods[column] = 'btree' if self.columns[column] else None
+
+            names = {self.index_name(column, 'brin'), self.index_name(column, 'btree')}
+            indexes.definitions = [(name, definition) for name, definition in indexes.definitions if name not in names]
+            if methods[column]:
+                indexes.definitions.append(self.definition(column, methods[column]))
+        indexes.save()
+        return methods
@@ -0,0 +1,79 @@
+"""In-memory maps of the lookup tables that are shared by the incidents (e.g. `activities`, `trees`)
+"""
+import typing
+
+from django.db.models import Model
+
+
+class LookupCache:
+    """Map of the records of a lookup table by the values of their fields. The existing records are loaded once and
+    the missing ones are created with one bulk insert, so resolving the records of a whole file costs a constant number
+    of queries. The COPY engine creates the missing records itself (see `LookupChild`) and adds them with `add`.
+    """
+
+    def __init__(self, model: typing.Type[Model], fields: typing.List[str], batch_size: int = 250000):
+        """
+        :param model: The model of the lookup table.
+        :param fields: The fields that identify a record.
+        :param batch_size: The batch size of the bulk inserts.
+        """
+        self.model = model
+        self.fields = list(fields)
+        self.batch_size = batch_size
+        self.ids = None
+
+    @staticmethod
+    def make_key(values: typing.Iterable) -> tuple:
+        """Create the key of a record from the values of its fields, as they are stored at the database.
+
+        :param values: The values of the fields.
+        :return: The key.
+        """
+        return tuple(None if value is None else str(value) for value in values)
+
+    def preload(self):
+        """Load the existing records of the lookup table.
+        """
+        self.ids = {tuple(row[:-1]): row[-1] for row in self.model.objects.values_list(*self.fields, 'id').iterator()}
+
+    def missing(self, keys: typing.Iterable[tuple]) -> typing.List[tuple]:
+        """Find the keys whose records do not exist yet, once each and in their order. Keys with all values empty are
+        ignored.
+
+        :param keys: The keys (see `make_key`).
+        :return: The missing keys.
+        """
+        if self.ids is None:
+            self.preload()
+        return list(dict.fromkeys(key for key in keys if any(key) and key not in self.ids))
+
+    def add(self, keys: typing.List[tuple], ids: typing.List[int]):
+        """Add the records that are created for missing keys.
+
+        :param keys: The keys (see `make_key`).
+        :param ids: The ids of the records of the keys.
+        """
+        self.ids.update(zip(keys, ids))
+
+    def resolve(self, keys: typing.Iterable[tuple]) -> int:
+        """Create the records of the keys that do not exist yet. Keys with all values empty are ignored.
+
+        :param keys: The keys (see `make_key`).
+        :return: The number of records created.
+        """
+        new_keys = self.missing(keys)
+        if new_keys:
+            records = self.model.objects.bulk_create([self.model(**dict(zip(self.fields, key))) for key in new_keys],
+                                                     batch_size=self.batch_size)
+            self.add(new_keys, [record.id for record in records])
+        return len(new_keys)
+
+    def get(self, key: tuple) -> typing.Optional[int]:
+        """Get the id of the record of a resolved key.
+
+        :param key: The key (see `make_key`).
+        :return: The id of the record or `None` if the key is empty.
+        """
+        if not any(key):
+            return None
+        return self.ids[key]
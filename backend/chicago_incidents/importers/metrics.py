@@ -0,0 +1,80 @@
+"""Metrics of the imports, used by the benchmarks of the importer
+"""
+import collections
+import contextlib
+import time
+import typing
+
+# The phases of the imports. The ids of the incidents are reserved before their payloads and their joins are built, so
+# the foreign keys are written by the insert and there is no fix-up phase after it
+PHASES = ['read', 'normalize', 'build', 'insert']
+
+
+class ImportMetrics:
+    """Timings of the phases of the imports and number of database queries. The phases are timed exclusively, the time
+    of a nested phase is not counted at the phase that contains it. It is installed as an execute wrapper of the
+    connection (see `connection.execute_wrapper`) so that the database statements are counted at the `insert` phase,
+    and the COPY engine reports its statements explicitly.
+    """
+
+    def __init__(self):
+        self.seconds = collections.Counter()
+        self.queries = 0
+        self.stack = []
+        self.started = None
+
+    def switch(self):
+        """Charge the time since the last switch to the current phase.
+        """
+        now = time.perf_counter()
+        if self.stack:
+            self.seconds[self.stack[-1]] += now - self.started
+        self.started = now
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time a block of code as a phase.
+
+        :param name: The name of the phase.
+        """
+        self.switch()
+        self.stack.append(name)
+        try:
+            yield
+        finally:
+            self.switch()
+            self.stack.pop()
+
+    def timed(self, name: str, iterable: typing.Iterable) -> typing.Iterator:
+        """Time the production of each item of an iterable (e.g. the chunks of a reader) as a phase.
+
+        :param name: The name of the phase.
+        :param iterable: The iterable.
+        :return: The items of the iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    @contextlib.contextmanager
+    def query(self):
+        """Count and time a database statement.
+        """
+        self.queries += 1
+        with self.phase('insert'):
+            yield
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.query():
+            return execute(sql, params, many, context)
+
+    def as_dict(self) -> dict:
+        """Get the metrics.
+
+        :return: The seconds of each phase and the number of queries.
+        """
+        return {'phases': {phase: round(self.seconds[phase], 4) for phase in PHASES}, 'queries': self.queries}
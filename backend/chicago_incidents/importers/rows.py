@@ -0,0 +1,33 @@
+"""Helpers that turn normalized dataframes to rows of python values
+"""
+import collections
+import typing
+
+import pandas as pd
+
+
+def iter_rows(df: pd.DataFrame, name: typing.Optional[str] = 'Row') -> typing.Iterator[tuple]:
+    """Iterate over the rows of a normalized dataframe. The typed columns are converted to python values and the
+    missing values (`NaN`, `NaT`, `NA`) to `None`, once per column, at the point where the rows are written.
+
+    :param df: The normalized dataframe.
+    :param name: The name of the returned namedtuples, or `None` for plain tuples.
+    :return: The rows.
+    """
+    columns = []
+    for _, column in df.items():
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            # Much faster than boxing each value to a `Timestamp`
+            values = column.dt.to_pydatetime()
+        else:
+            values = column.to_numpy(dtype=object)
+        missing = column.isna().to_numpy()
+        if missing.any():
+            values[missing] = None
+        columns.append(values)
+
+    rows = zip(*columns)
+    if name is None:
+        return rows
+    row_type = collections.namedtuple(name, df.columns, rename=True)
+    return map(row_type._make, rows)
@@ -0,0 +1,54 @@
+"""Readers of the files of the datasets, either the raw CSVs or their typed columnar (Parquet/Feather) conversions
+"""
+import os
+import typing
+
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# The suffixes of the columnar files mapped to their formats
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.feather': 'feather'}
+
+
+def csv_name(path: str) -> str:
+    """Get the name of the CSV that a dataset file comes from, which identifies the dataset of the file.
+
+    :param path: The path of the file.
+    :return: The path with the `.csv` suffix.
+    """
+    root, suffix = os.path.splitext(path)
+    if suffix in COLUMNAR_FORMATS:
+        return f'{root}.csv'
+    return path
+
+
+def read_frames(path: str, columns: typing.List[str], chunk_size: int = None, usecols: typing.List[str] = None,
+                dtype=None) -> typing.Iterator[pd.DataFrame]:
+    """Read a dataset file in chunks of rows, or at once. The columnar files are already typed, so they are read without
+    any parsing or type inference.
+
+    :param path: The path of the file.
+    :param columns: The names of the columns of the dataset.
+    :param chunk_size: The number of rows to read at once, by default the file is read at once.
+    :param usecols: The columns to read, by default all of them.
+    :param dtype: The type of the columns of the CSVs.
+    :return: The dataframes.
+    """
+    suffix = os.path.splitext(path)[1]
+    if suffix == '.parquet':
+        if not chunk_size:
+            yield pd.read_parquet(path, columns=usecols or columns)
+            return
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=usecols or columns):
+            yield batch.to_pandas()
+    elif suffix == '.feather':
+        table = feather.read_table(path, columns=usecols or columns, memory_map=True)
+        chunk_size = chunk_size or max(table.num_rows, 1)
+        for start in range(0, table.num_rows, chunk_size):
+            yield table.slice(start, chunk_size).to_pandas()
+    elif not chunk_size:
+        yield pd.read_csv(path, sep=',', header=0, names=columns, usecols=usecols, dtype=dtype)
+    else:
+        yield from pd.read_csv(path, sep=',', header=0, names=columns, usecols=usecols, dtype=dtype,
+                               chunksize=chunk_size)
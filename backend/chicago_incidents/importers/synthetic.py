@@ -0,0 +1,112 @@
+"""Generator of synthetic datasets with the schemas of the CSVs, used by the benchmarks of the importer
+"""
+import typing
+
+import numpy as np
+import pandas as pd
+
+from .. import models
+
+# Format of the dates of the CSVs
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# The values of the columns that are picked from a small set, in order to resemble the lookup tables of the datasets
+CHOICES = {
+    'current_activity': ['FVI - Outcome', 'Final Outcome', 'Inspect for Violation', 'Dispatch Crew',
+                         'Create Work Order'],
+    'most_recent_action': ['Vehicle was moved', 'Pothole Patched', 'Cart Delivered', 'Complete', 'No Cause Found',
+                           'Create Work Order', 'Inspected'],
+    'vehicle_make_model': ['Chevrolet', 'Ford', 'Toyota', 'Honda', 'Dodge', 'Nissan', 'Buick', 'Pontiac'],
+    'vehicle_color': ['Black', 'White', 'Silver', 'Red', 'Blue', 'Gray', 'Green'],
+    'surface': ['Brick - Painted', 'Brick - Unpainted', 'Metal - Painted', 'Wood - Painted', 'Concrete', 'Vinyl'],
+    'graffiti_location': ['Front', 'Rear', 'Side', 'Garage', 'Pole', 'Door', 'Mailbox'],
+    'nature_of_code_violation': ['Garbage in alley', 'Overflowing carts', 'Dumpster not being emptied',
+                                 'Construction Site Cleanliness/Fence', 'Graffiti Commercial Vehicle', 'Other'],
+    'tree_location': ['Parkway', 'Alley', 'Vacant Lot', 'Sidewalk', 'Other'],
+}
+
+# The ranges of the numeric columns
+INTEGER_RANGES = {
+    'zip_code': (60601, 60661), 'zip_codes': (4299, 22620), 'ward': (1, 51), 'wards': (1, 51),
+    'historical_wards_03_15': (1, 54), 'police_district': (1, 26), 'community_area': (1, 78),
+    'community_areas': (1, 78), 'ssa': (1, 60), 'census_tracts': (1, 802), 'number_of_elements': (0, 20),
+    'days_of_report_as_parked': (0, 60), 'number_of_premises_baited': (0, 10), 'number_of_premises_w_garbage': (0, 10),
+    'number_of_premises_w_rats': (0, 10),
+}
+FLOAT_RANGES = {
+    'x_coordinate': (1100000, 1200000), 'y_coordinate': (1800000, 1950000), 'latitude': (41.6, 42.0),
+    'longitude': (-87.9, -87.5),
+}
+
+# The fraction of the values of the optional columns that are left empty
+MISSING_FRACTION = 0.05
+
+
+def synthetic_dataframe(columns: typing.List[str], rows: int, start: int = 0, seed: int = 0) -> pd.DataFrame:
+    """Create a dataframe of random rows with the columns of a CSV, as it is read from the CSV.
+
+    :param columns: The names of the columns of the CSV.
+    :param rows: The number of rows.
+    :param start: The number of the first row, so that the service request numbers of consecutive dataframes are
+        unique.
+    :param seed: The seed of the random generator.
+    :return: The dataframe.
+    """
+    rng = np.random.default_rng([seed, start])
+
+    def missing(values: pd.Series, fraction: float = MISSING_FRACTION) -> pd.Series:
+        return values.where(rng.random(rows) >= fraction)
+
+    creation_dates = pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 10 * 365 * 24, rows), unit='h')
+    completion_dates = creation_dates + pd.to_timedelta(rng.integers(0, 60 * 24, rows), unit='h')
+    statuses = np.array([label for _, label in models.Incident.STATUS_TYPE_CHOICES])
+
+    data = {}
+    for column in columns:
+        if column == 'creation_date':
+            values = pd.Series(creation_dates.strftime(DATE_FORMAT))
+        elif column == 'completion_date':
+            values = missing(pd.Series(completion_dates.strftime(DATE_FORMAT)), 0.1)
+        elif column == 'status':
+            values = pd.Series(statuses[rng.integers(0, len(statuses), rows)])
+        elif column == 'service_request_number':
+            values = pd.Series([f'{number // 100000000 + 10:02d}-{number % 100000000:08d}'
+                                for number in range(start, start + rows)])
+        elif column == 'type_of_service_request':
+            values = pd.Series(['Synthetic Request'] * rows)
+        elif column == 'street_address':
+            values = pd.Series([f'{number} N STATE ST' for number in rng.integers(1, 10000, rows)])
+        elif column == 'license_plate':
+            values = missing(pd.Series([f'{number:07X}' for number in rng.integers(0, 16 ** 7, rows)]))
+        elif column in CHOICES:
+            values = missing(pd.Series(np.array(CHOICES[column])[rng.integers(0, len(CHOICES[column]), rows)]))
+        elif column in INTEGER_RANGES:
+            values = missing(pd.Series(rng.integers(*INTEGER_RANGES[column], rows).astype(float)))
+        elif column in FLOAT_RANGES:
+            values = missing(pd.Series(rng.uniform(*FLOAT_RANGES[column], rows)))
+        elif column == 'location':
+            values = pd.Series([f'({latitude:.8f}, {longitude:.8f})'
+                                for latitude, longitude in zip(rng.uniform(41.6, 42.0, rows),
+                                                               rng.uniform(-87.9, -87.5, rows))])
+        else:
+            values = missing(pd.Series([f'{column} {number}' for number in rng.integers(0, 100, rows)]))
+        data[column] = values.values
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def write_synthetic_csv(path: str, columns: typing.List[str], rows: int, chunk_size: int = 100000, seed: int = 0):
+    """Write a CSV of random rows with the specified columns, chunk by chunk.
+
+    :param path: The path of the CSV.
+    :param columns: The names of the columns of the CSV.
+    :param rows: The number of rows.
+    :param chunk_size: The number of rows that are generated at once.
+    :param seed: The seed of the random generator.
+    """
+    with open(path, 'w', newline='') as f:
+        for start in range(0, rows, chunk_size):
+            synthetic_dataframe(columns, min(chunk_size, rows - start), start=start, seed=seed) \
+                .to_csv(f, header=start == 0, index=False)
+    if not rows:
+        pd.DataFrame(columns=columns).to_csv(path, index=False)
@@ -0,0 +1,132 @@
+import datetime
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+
+from chicago_incidents import models
+
+# The creation date of the first day of the synthetic incidents
+FIRST_DATE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+# The synthetic table of the benchmark, with the columns and the indexes of the incidents that the query reads
+CREATE_TABLE_SQL = """
+    CREATE TEMPORARY TABLE bounding_box_benchmark ON COMMIT DROP AS
+    SELECT g AS id,
+           %(first_date)s + floor(random() * %(days)s) * INTERVAL '1 day' AS creation_date,
+           (%(types)s::varchar[])[1 + floor(random() * %(types_count)s)::int] AS type_of_service_request,
+           (41.6 + random() * 0.4)::numeric(30, 20) AS latitude,
+           (-87.9 + random() * 0.4)::numeric(30, 20) AS longitude
+    FROM generate_series(1, %(rows)s) AS g
+"""
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX ON bounding_box_benchmark (creation_date)',
+    'CREATE INDEX ON bounding_box_benchmark (latitude)',
+    'CREATE INDEX ON bounding_box_benchmark (longitude)',
+    'CREATE INDEX ON bounding_box_benchmark USING gist (point(longitude, latitude))',
+    'ANALYZE bounding_box_benchmark',
+]
+
+# The query of the endpoint before (the ranges of the coordinates) and after (the box of the points) the GiST index
+RANGE_QUERY_SQL = """
+    SELECT type_of_service_request, COUNT(type_of_service_request) AS number_of_requests
+    FROM bounding_box_benchmark
+    WHERE creation_date = %(date)s AND latitude BETWEEN %(b_latitude)s AND %(a_latitude)s
+    AND longitude BETWEEN %(a_longitude)s AND %(b_longitude)s
+    GROUP BY type_of_service_request ORDER BY number_of_requests DESC, type_of_service_request LIMIT 1
+"""
+BOX_QUERY_SQL = """
+    SELECT type_of_service_request, COUNT(type_of_service_request) AS number_of_requests
+    FROM bounding_box_benchmark
+    WHERE point(longitude, latitude) <@ box(point(%(a_longitude)s, %(b_latitude)s),
+                                             point(%(b_longitude)s, %(a_latitude)s))
+    AND creation_date = %(date)s AND latitude BETWEEN %(b_latitude)s AND %(a_latitude)s
+    AND longitude BETWEEN %(a_longitude)s AND %(b_longitude)s
+    GROUP BY type_of_service_request ORDER BY number_of_requests DESC, type_of_service_request LIMIT 1
+"""
+
+
+def plan_indexes(plan: dict) -> list:
+    """Find the indexes that a query plan scans.
+
+    :param plan: The node of the plan.
+    :return: The names of the indexes.
+    """
+    indexes = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        indexes += plan_indexes(child)
+    return indexes
+
+
+class Command(BaseCommand):
+    """Command to benchmark the bounding box query with and without the GiST index of the points
+    """
+    help = 'Benchmark the most common service in bounding box query on a synthetic table of incidents, with the ' \
+           'ranges of the coordinates and with the GiST index of their points. The table is temporary, so the ' \
+           'database is left intact.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=2000000, help='The number of rows of the synthetic table')
+        parser.add_argument('--days', type=int, default=30,
+                            help='The number of the distinct creation dates of the rows')
+        parser.add_argument('--boxes', type=int, default=50, help='The number of the random bounding boxes')
+        parser.add_argument('--box-size', type=float, default=0.02, help='The side of the boxes in degrees')
+        parser.add_argument('--output', type=str, help='The JSON file to write the results to')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark needs PostgreSQL')
+
+        rng = random.Random(0)
+        types = [value for value, _ in models.Incident.SERVICE_TYPE_CHOICES]
+        with transaction.atomic(), connection.cursor() as cursor:
+            start = time.perf_counter()
+            cursor.execute('SELECT setseed(0.5)')
+            cursor.execute(CREATE_TABLE_SQL, {'first_date': FIRST_DATE, 'days': options['days'], 'types': types,
+                                              'types_count': len(types), 'rows': options['rows']})
+            for sql in CREATE_INDEXES_SQL:
+                cursor.execute(sql)
+            self.stdout.write(f"Created {options['rows']} rows in {(time.perf_counter() - start):.2f} seconds")
+
+            results = {'range': {'ms': [], 'indexes': set()}, 'box': {'ms': [], 'indexes': set()}}
+            for _ in range(options['boxes']):
+                b_latitude = rng.uniform(41.6, 42.0 - options['box_size'])
+                a_longitude = rng.uniform(-87.9, -87.5 - options['box_size'])
+                params = {
+                    'date': FIRST_DATE + datetime.timedelta(days=rng.randrange(options['days'])),
+                    'a_latitude': b_latitude + options['box_size'], 'b_latitude': b_latitude,
+                    'a_longitude': a_longitude, 'b_longitude': a_longitude + options['box_size'],
+                }
+                rows = {}
+                for name, sql in (('range', RANGE_QUERY_SQL), ('box', BOX_QUERY_SQL)):
+                    cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql, params)
+                    explain = cursor.fetchone()[0]
+                    explain = json.loads(explain) if isinstance(explain, str) else explain
+                    results[name]['ms'].append(explain[0]['Execution Time'])
+                    results[name]['indexes'].update(plan_indexes(explain[0]['Plan']))
+                    cursor.execute(sql, params)
+                    rows[name] = cursor.fetchall()
+                if rows['range'] != rows['box']:
+                    raise CommandError(f'The queries disagree for {params}: {rows}')
+            transaction.set_rollback(True)
+
+        report = {'rows': options['rows'], 'days': options['days'], 'boxes': options['boxes'],
+                  'box_size': options['box_size']}
+        for name, result in results.items():
+            report[name] = {'median_ms': round(statistics.median(result['ms']), 3),
+                            'max_ms': round(max(result['ms']), 3), 'indexes': sorted(result['indexes'])}
+            self.stdout.write(f"{name}: median {report[name]['median_ms']} ms, max {report[name]['max_ms']} ms, "
+                              f"indexes {', '.join(report[name]['indexes']) or 'none'}")
+        self.stdout.write(f"Speedup of the median: {(report['range']['median_ms'] / report['box']['median_ms']):.1f}x")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
@@ -0,0 +1,114 @@
+import io
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from chicago_incidents.importers import write_synthetic_csv
+from chicago_incidents.management.commands.import_incidents_from_csvs import Command as ImportCommand, \
+    DATASET_COLUMNS
+
+
+def run_benchmark(input_file: str, options: dict) -> dict:
+    """ Import a file with the importer and measure it. The import runs in a transaction that is rolled back, so the
+    benchmarks leave the database intact.
+
+    :param input_file: The file to import.
+    :param options: The options of the importer.
+    :return: The number of incidents imported, the seconds it took, the rows/sec, the peak RSS of the process, the
+        number of queries and the seconds of each phase of the import.
+    """
+    command = ImportCommand(stdout=io.StringIO())
+    command.set_options(options)
+    start = time.perf_counter()
+    with transaction.atomic():
+        count = command.import_file(input_file)
+        transaction.set_rollback(True)
+    seconds = time.perf_counter() - start
+    return {
+        'incidents': count,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(count / max(seconds, 1e-9)),
+        # The maximum resident set size is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        **command.metrics.as_dict(),
+    }
+
+
+def git_commit() -> str:
+    """Get the commit of the working tree, so that the results of different commits can be compared.
+
+    :return: The commit or `None` if it is not available.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                              check=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """Command to benchmark the importer with synthetic CSVs
+    """
+    help = 'Benchmark the importer with synthetic CSVs of each dataset and report the results as JSON'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000],
+                            help='The number of rows of the synthetic CSVs (e.g. 10000 1000000 10000000)')
+        parser.add_argument('--datasets', nargs='+', choices=list(DATASET_COLUMNS), default=list(DATASET_COLUMNS),
+                            help='The datasets to benchmark, by default all of them')
+        parser.add_argument('--engine', choices=['orm', 'copy'], default='orm', help='The engine of the importer')
+        parser.add_argument('--copy-chunk-size', type=int, default=50000,
+                            help='The number of incidents that are written with each COPY by the `copy` engine')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Import the CSVs in chunks of this number of rows')
+        parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'chicago_incidents_benchmark'),
+                            help='The directory of the synthetic CSVs, they are generated once and reused')
+        parser.add_argument('--output', default=None, help='The JSON file of the results, by default they are printed')
+        parser.add_argument('--in-process', action='store_true',
+                            help='Run the benchmarks at the current process. By default each benchmark runs at a new '
+                                 'process, so that its peak RSS is measured on its own')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        import_options = {'engine': options['engine'], 'copy_chunk_size': options['copy_chunk_size'],
+                          'chunk_size': options['chunk_size'], 'incremental': False, 'resume': False}
+        os.makedirs(options['data_dir'], exist_ok=True)
+
+        results = []
+        for size in options['sizes']:
+            for dataset in options['datasets']:
+                input_file = os.path.join(options['data_dir'], f'{size}-311-service-requests-{dataset}')
+                if not os.path.exists(input_file):
+                    write_synthetic_csv(input_file, DATASET_COLUMNS[dataset], size)
+
+                if options['in_process']:
+                    result = run_benchmark(input_file, import_options)
+                else:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=django.setup) as executor:
+                        result = executor.submit(run_benchmark, input_file, import_options).result()
+                results.append({'dataset': dataset, 'rows': size, **result})
+                self.stderr.write(f"{dataset} ({size} rows): {result['seconds']:.2f} seconds, "
+                                  f"{result['rows_per_sec']} rows/sec")
+
+        report = json.dumps({'commit': git_commit(), 'options': import_options, 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
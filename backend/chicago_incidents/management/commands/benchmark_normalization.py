@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandParser
+
+from chicago_incidents import models
+from chicago_incidents.importers import iter_rows, synthetic_dataframe
+from chicago_incidents.management.commands.import_incidents_from_csvs import Command as ImportCommand, \
+    DUPLICATE_SUBSET, POT_HOLES_COLUMNS
+
+
+def legacy_normalization(df: pd.DataFrame, request_type: str) -> list:
+    """ The row by row normalization of the importer before it was vectorized, kept as the baseline of the benchmark.
+
+    :param df: The dataframe as it is read from the CSV.
+    :param request_type: The type of the incident.
+    :return: The normalized rows.
+    """
+    df = df.replace({np.nan: None})
+    df = df.copy(deep=True)
+    df = df.drop_duplicates(DUPLICATE_SUBSET, keep='last')
+    df['type_of_service_request'] = df['type_of_service_request'].str.replace(r'.+', request_type, regex=True)
+    for column in ('creation_date', 'completion_date'):
+        df[column] = pd.to_datetime(df[column], errors='ignore')
+        df[column] = df[column].dt.tz_localize("UTC")
+        df[column] = df[column].astype(object).where(df[column].notnull(), None)
+
+    rows = []
+    for row in df.itertuples(index=False):
+        status = next((value for value, label in models.Incident.STATUS_TYPE_CHOICES if label == row.status), None)
+        rows.append((status, row))
+    return rows
+
+
+def vectorized_normalization(df: pd.DataFrame, request_type: str) -> list:
+    """ The vectorized normalization of the importer, including the conversion of the rows to python values.
+
+    :param df: The dataframe as it is read from the CSV.
+    :param request_type: The type of the incident.
+    :return: The normalized rows.
+    """
+    df = ImportCommand.dataframe_normalization(df, request_type)
+    return [(row.status, row) for row in iter_rows(df)]
+
+
+class Command(BaseCommand):
+    """Command to benchmark the normalization stage of the importer
+    """
+    help = 'Benchmark the normalization stage of the importer (rows/sec before and after vectorization)'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=200000, help='The number of rows of the synthetic dataframe')
+        parser.add_argument('--repeat', type=int, default=3, help='The number of runs, the best one is reported')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        df = synthetic_dataframe(POT_HOLES_COLUMNS, options['rows'])
+        for name, normalization in (('legacy', legacy_normalization), ('vectorized', vectorized_normalization)):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                normalization(df, models.Incident.POT_HOLE)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            self.stdout.write(f"{name}: {best:.3f} seconds ({(options['rows'] / best):.0f} rows/sec)")
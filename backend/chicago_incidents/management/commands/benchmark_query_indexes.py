@@ -0,0 +1,248 @@
+import datetime
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+
+from chicago_incidents import models
+
+# The creation date of the first day of the synthetic incidents
+FIRST_DATE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+# The synthetic tables of the benchmark, with the columns of the incidents, of their payloads and of their rollup that
+# the queries read. The rodent baiting and the pot hole incidents have both payloads, so that the police district query
+# has results
+CREATE_TABLES_SQL = [
+    """
+    CREATE TEMPORARY TABLE query_indexes_incidents AS
+    SELECT g AS id, creation_date,
+           CASE WHEN random() < 0.9 THEN creation_date + floor(random() * 10) * INTERVAL '1 day' END
+               AS completion_date,
+           (%(types)s::varchar[])[1 + floor(random() * %(types_count)s)::int] AS type_of_service_request,
+           CASE WHEN random() < 0.95 THEN 60601 + floor(random() * 60)::int END AS zip_code,
+           CASE WHEN random() < 0.2 THEN 1 + floor(random() * 60)::int END AS ssa,
+           1 + floor(random() * 25)::int AS police_district
+    FROM (SELECT g, %(first_date)s + floor(random() * %(days)s) * INTERVAL '1 day' AS creation_date
+          FROM generate_series(1, %(rows)s) AS g) AS series
+    """,
+    """
+    CREATE TEMPORARY TABLE query_indexes_rodent_baiting AS
+    SELECT id AS incident_id, floor(random() * 5)::int AS number_of_premises_baited
+    FROM query_indexes_incidents WHERE type_of_service_request IN (%(rodent_baiting)s, %(pot_hole)s)
+    """,
+    """
+    CREATE TEMPORARY TABLE query_indexes_potholes AS
+    SELECT id AS incident_id, floor(random() * 5)::int AS number_of_elements
+    FROM query_indexes_incidents WHERE type_of_service_request IN (%(rodent_baiting)s, %(pot_hole)s)
+    """,
+    """
+    CREATE TEMPORARY TABLE query_indexes_rollup AS
+    SELECT creation_date, type_of_service_request, zip_code, ssa, police_district, COUNT(*) AS number_of_requests,
+           COUNT(completion_date) AS number_of_completed, SUM(completion_date - creation_date) AS completion_time
+    FROM query_indexes_incidents GROUP BY creation_date, type_of_service_request, zip_code, ssa, police_district
+    """,
+]
+DROP_TABLES_SQL = 'DROP TABLE IF EXISTS query_indexes_incidents, query_indexes_rodent_baiting, ' \
+                  'query_indexes_potholes, query_indexes_rollup'
+
+# The indexes that the queries read before the covering indexes (the foreign keys of the payloads are always indexed)
+BEFORE_INDEXES_SQL = [
+    'CREATE INDEX query_indexes_incidents_creation ON query_indexes_incidents (creation_date)',
+    'CREATE INDEX query_indexes_incidents_completion ON query_indexes_incidents (completion_date)',
+    'CREATE INDEX query_indexes_incidents_zip_code ON query_indexes_incidents (zip_code)',
+    'CREATE INDEX query_indexes_incidents_type ON query_indexes_incidents (type_of_service_request)',
+    'CREATE INDEX query_indexes_incidents_ssa ON query_indexes_incidents (ssa)',
+    'CREATE INDEX query_indexes_rodent_baiting_incident ON query_indexes_rodent_baiting (incident_id)',
+    'CREATE INDEX query_indexes_potholes_incident ON query_indexes_potholes (incident_id)',
+    'CREATE INDEX query_indexes_rollup_creation_type ON query_indexes_rollup (creation_date, type_of_service_request)',
+]
+# The covering indexes of the 0007 migration, and the indexes that they replace
+AFTER_INDEXES_SQL = [
+    'DROP INDEX query_indexes_incidents_completion',
+    'DROP INDEX query_indexes_rollup_creation_type',
+    'CREATE INDEX query_indexes_incidents_creation_zip ON query_indexes_incidents '
+    '(creation_date, zip_code, type_of_service_request) WHERE zip_code IS NOT NULL',
+    'CREATE INDEX query_indexes_incidents_completion_type ON query_indexes_incidents '
+    '(completion_date, type_of_service_request) INCLUDE (id, police_district)',
+    'CREATE INDEX query_indexes_rodent_baiting_covering ON query_indexes_rodent_baiting '
+    '(incident_id) INCLUDE (number_of_premises_baited)',
+    'CREATE INDEX query_indexes_potholes_covering ON query_indexes_potholes (incident_id) INCLUDE (number_of_elements)',
+    'CREATE INDEX query_indexes_rollup_creation_type_covering ON query_indexes_rollup '
+    '(creation_date, type_of_service_request) INCLUDE (number_of_requests, number_of_completed, completion_time)',
+    'CREATE INDEX query_indexes_rollup_type_creation ON query_indexes_rollup '
+    '(type_of_service_request, creation_date) INCLUDE (number_of_requests)',
+    'CREATE INDEX query_indexes_rollup_ssa ON query_indexes_rollup '
+    '(creation_date) INCLUDE (ssa, number_of_requests) WHERE ssa IS NOT NULL',
+]
+
+# The queries of the endpoints, with a deterministic order of the ties, so that the results can be compared
+QUERIES_SQL = {
+    'totalRequestsPerType': """
+        SELECT type_of_service_request, SUM(number_of_requests) AS number_of_requests
+        FROM query_indexes_rollup WHERE creation_date >= %(start_date)s AND creation_date <= %(end_date)s
+        GROUP BY type_of_service_request ORDER BY number_of_requests DESC, type_of_service_request
+    """,
+    'totalRequestsPerDay': """
+        SELECT creation_date, SUM(number_of_requests) AS number_of_requests
+        FROM query_indexes_rollup WHERE type_of_service_request = %(type_of_service_request)s
+        AND creation_date >= %(start_date)s AND creation_date <= %(end_date)s
+        GROUP BY creation_date ORDER BY creation_date
+    """,
+    'mostCommonServicePerZipcode': """
+        SELECT DISTINCT ON (zip_code) zip_code, type_of_service_request,
+        COUNT(type_of_service_request) AS number_of_requests
+        FROM query_indexes_incidents WHERE zip_code IS NOT NULL AND creation_date = %(date)s
+        GROUP BY zip_code, type_of_service_request
+        ORDER BY zip_code, number_of_requests DESC, type_of_service_request
+    """,
+    'averageCompletionTimePerRequest': """
+        SELECT type_of_service_request, SUM(completion_time) / NULLIF(SUM(number_of_completed), 0)
+        AS average_completion_time
+        FROM query_indexes_rollup WHERE creation_date >= %(start_date)s AND creation_date <= %(end_date)s
+        GROUP BY type_of_service_request ORDER BY type_of_service_request
+    """,
+    'top5SSA': """
+        SELECT ssa, SUM(number_of_requests) AS number_of_requests
+        FROM query_indexes_rollup WHERE creation_date >= %(start_date)s AND creation_date <= %(end_date)s
+        AND ssa IS NOT NULL
+        GROUP BY ssa ORDER BY number_of_requests DESC, ssa LIMIT 5
+    """,
+    'policeDistrict': """
+        SELECT incidents.police_district, SUM(rodent_baiting.number_of_premises_baited) AS rodent_baiting_sum,
+        SUM(potholes.number_of_elements) AS potholes_sum
+        FROM query_indexes_incidents AS incidents
+        LEFT OUTER JOIN query_indexes_rodent_baiting AS rodent_baiting ON (incidents.id = rodent_baiting.incident_id)
+        LEFT OUTER JOIN query_indexes_potholes AS potholes ON (incidents.id = potholes.incident_id)
+        WHERE incidents.completion_date = %(date)s
+        AND (incidents.type_of_service_request = %(rodent_baiting)s OR incidents.type_of_service_request = %(pot_hole)s)
+        GROUP BY incidents.police_district
+        HAVING SUM(potholes.number_of_elements) > 1 AND SUM(rodent_baiting.number_of_premises_baited) > 1
+        ORDER BY incidents.police_district
+    """,
+}
+
+
+def plan_scans(plan: dict) -> list:
+    """Find the scans of the tables of a query plan.
+
+    :param plan: The node of the plan.
+    :return: The scans, as their type with their index (e.g. `Index Only Scan using index`).
+    """
+    scans = []
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        scan = plan['Node Type']
+        if 'Index Name' in plan:
+            scan += f" using {plan['Index Name']}"
+        scans.append(scan)
+    for child in plan.get('Plans', []):
+        scans += plan_scans(child)
+    return scans
+
+
+class Command(BaseCommand):
+    """Command to benchmark the queries endpoints before and after their covering indexes
+    """
+    help = 'Benchmark the queries of the queries endpoints on synthetic tables of incidents, with the indexes before ' \
+           'and after the covering indexes of the 0007 migration. The tables are temporary, so the database is left ' \
+           'intact.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=2000000, help='The number of the synthetic incidents')
+        parser.add_argument('--days', type=int, default=365,
+                            help='The number of the distinct creation dates of the incidents')
+        parser.add_argument('--range-days', type=int, default=30, help='The number of the days of the date ranges')
+        parser.add_argument('--repeat', type=int, default=20, help='The number of the random parameters per query')
+        parser.add_argument('--output', type=str, help='The JSON file to write the results to')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark needs PostgreSQL')
+
+        rng = random.Random(0)
+        types = [value for value, _ in models.Incident.SERVICE_TYPE_CHOICES]
+        constants = {'rodent_baiting': models.Incident.RODENT_BAITING, 'pot_hole': models.Incident.POT_HOLE}
+        parameters = []
+        for _ in range(options['repeat']):
+            start_date = FIRST_DATE + datetime.timedelta(days=rng.randrange(options['days']))
+            parameters.append(dict(constants, date=start_date, start_date=start_date,
+                                   end_date=start_date + datetime.timedelta(days=options['range_days']),
+                                   type_of_service_request=rng.choice(types)))
+
+        results = {}
+        with connection.cursor() as cursor:
+            try:
+                start = time.perf_counter()
+                cursor.execute('SELECT setseed(0.5)')
+                for sql in CREATE_TABLES_SQL:
+                    cursor.execute(sql, dict(constants, first_date=FIRST_DATE, days=options['days'], types=types,
+                                             types_count=len(types), rows=options['rows']))
+                self.stdout.write(f"Created {options['rows']} rows in {(time.perf_counter() - start):.2f} seconds")
+
+                for state, indexes in (('before', BEFORE_INDEXES_SQL), ('after', AFTER_INDEXES_SQL)):
+                    for sql in indexes:
+                        cursor.execute(sql)
+                    self.vacuum(cursor)
+                    results[state] = self.run_queries(cursor, parameters)
+            finally:
+                cursor.execute(DROP_TABLES_SQL)
+
+        report = {'rows': options['rows'], 'days': options['days'], 'range_days': options['range_days'],
+                  'repeat': options['repeat'], 'queries': {}}
+        for name in QUERIES_SQL:
+            before, after = results['before'][name], results['after'][name]
+            if before['rows'] != after['rows']:
+                raise CommandError(f'The results of {name} differ with the covering indexes')
+            report['queries'][name] = {
+                state: {'median_ms': round(statistics.median(result['ms']), 3),
+                        'max_ms': round(max(result['ms']), 3), 'scans': sorted(result['scans'])}
+                for state, result in (('before', before), ('after', after))
+            }
+            query = report['queries'][name]
+            self.stdout.write(f"{name}: median {query['before']['median_ms']} ms -> {query['after']['median_ms']} ms, "
+                              f"scans {', '.join(query['after']['scans']) or 'none'}")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+
+    @staticmethod
+    def vacuum(cursor):
+        """Refresh the statistics of the tables and, outside of a transaction, their visibility maps, so that the
+        index only scans do not fetch the rows from the tables.
+
+        :param cursor: The cursor of the connection.
+        """
+        # VACUUM cannot run inside a transaction (e.g. of a test case), where the tables are only analyzed
+        command = 'ANALYZE' if connection.in_atomic_block else 'VACUUM ANALYZE'
+        for table in ('query_indexes_incidents', 'query_indexes_rodent_baiting', 'query_indexes_potholes',
+                      'query_indexes_rollup'):
+            cursor.execute(f'{command} {table}')
+
+    @staticmethod
+    def run_queries(cursor, parameters: list) -> dict:
+        """Run the queries with each set of parameters, explaining their execution.
+
+        :param cursor: The cursor of the connection.
+        :param parameters: The sets of parameters.
+        :return: The execution times, the scans and the results of each query.
+        """
+        results = {}
+        for name, sql in QUERIES_SQL.items():
+            result = results[name] = {'ms': [], 'scans': set(), 'rows': []}
+            for params in parameters:
+                cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params)
+                explain = cursor.fetchone()[0]
+                explain = json.loads(explain) if isinstance(explain, str) else explain
+                result['ms'].append(explain[0]['Execution Time'])
+                result['scans'].update(plan_scans(explain[0]['Plan']))
+                cursor.execute(sql, params)
+                result['rows'].append(cursor.fetchall())
+        return results
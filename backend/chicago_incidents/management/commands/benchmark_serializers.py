@@ -0,0 +1,94 @@
+import datetime
+import decimal
+import random
+import time
+import typing
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+from rest_framework import serializers as drf_serializers
+
+from chicago_incidents import serializers
+
+# The serializers of the results of the queries
+QUERY_SERIALIZERS = [
+    serializers.TotalRequestsPerTypeSerializer,
+    serializers.TotalRequestsPerDaySerializer,
+    serializers.MostFrequentRequestPerZipCodeSerializer,
+    serializers.AverageCompletionTimePerRequestSerializer,
+    serializers.RequestsPerSSASerializer,
+    serializers.LicensePlatesSerializer,
+    serializers.VehicleColorSerializer,
+    serializers.PoliceDistrictSerializer,
+    serializers.IncidentMinifiedSerializer,
+]
+
+
+def sample_value(field: drf_serializers.Field, rng: random.Random):
+    """Create a random value of a field, as it is read from the database.
+
+    :param field: The field.
+    :param rng: The random generator.
+    :return: The value.
+    """
+    if isinstance(field, drf_serializers.ChoiceField):
+        return rng.choice(list(field.choices))
+    if isinstance(field, drf_serializers.IntegerField):
+        return rng.randrange(1, 100000)
+    if isinstance(field, drf_serializers.DecimalField):
+        return decimal.Decimal(rng.uniform(41.6, 42.0)).quantize(decimal.Decimal(1).scaleb(-field.decimal_places))
+    if isinstance(field, drf_serializers.DateTimeField):
+        return timezone.now() - datetime.timedelta(seconds=rng.randrange(10 ** 8))
+    if field.field_name == 'average_completion_time':
+        return datetime.timedelta(seconds=rng.randrange(10 ** 6))
+    return f'{field.field_name}-{rng.randrange(1000)}'
+
+
+def synthetic_rows(serializer_class: typing.Type[drf_serializers.Serializer], rows: int) -> typing.List[dict]:
+    """Create the random rows of a query, with the columns of the fields of its serializer.
+
+    :param serializer_class: The serializer.
+    :param rows: The number of rows.
+    :return: The rows.
+    """
+    rng = random.Random(0)
+    fields = serializer_class().fields
+    return [{name: None if rng.random() < 0.05 else sample_value(field, rng) for name, field in fields.items()}
+            for _ in range(rows)]
+
+
+class Command(BaseCommand):
+    """Command to benchmark the serializers of the results of the queries
+    """
+    help = 'Benchmark the serialization of the results of the queries (rows/sec of the DRF serializers and of their ' \
+           'fast path)'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=50000, help='The number of rows of each query')
+        parser.add_argument('--repeat', type=int, default=3, help='The number of runs, the best one is reported')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        for serializer_class in QUERY_SERIALIZERS:
+            rows = synthetic_rows(serializer_class, options['rows'])
+            serializations = (
+                ('drf', lambda: serializer_class(rows, many=True).data),
+                ('fast', lambda: serializers.get_fast_serializer(serializer_class).serialize(rows)),
+            )
+            results = {}
+            for name, serialize in serializations:
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    results[name] = serialize()
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                self.stdout.write(f"{serializer_class.__name__} {name}: {best:.3f} seconds "
+                                  f"({(options['rows'] / best):.0f} rows/sec)")
+            if results['drf'] != results['fast']:
+                raise CommandError(f'The fast path of {serializer_class.__name__} differs from the serializer')
@@ -0,0 +1,139 @@
+import datetime
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+
+# The creation date of the first synthetic incident
+FIRST_DATE = datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc)
+
+# The synthetic table of the benchmark, with the timestamps of the incidents and a payload of the width of their rows.
+# The incidents are created in chronological order (as the CSVs are imported) or in random order
+CREATE_TABLE_SQL = """
+    CREATE TEMPORARY TABLE timestamp_indexes_benchmark ON COMMIT DROP AS
+    SELECT g AS id, creation_date, creation_date + floor(random() * 30) * INTERVAL '1 day' AS completion_date,
+           repeat('x', 150) AS payload
+    FROM (SELECT g, %(first_date)s + floor(CASE WHEN %(chronological)s THEN g::float / %(rows)s ELSE random() END
+                                           * %(days)s) * INTERVAL '1 day' AS creation_date
+          FROM generate_series(1, %(rows)s) AS g) AS series
+"""
+# The incidents of an import after the initial load, which are created after the loaded ones
+INSERT_SQL = """
+    INSERT INTO timestamp_indexes_benchmark
+    SELECT g, creation_date, creation_date + floor(random() * 30) * INTERVAL '1 day', repeat('x', 150)
+    FROM (SELECT g, %(first_date)s + (%(days)s + floor(random() * 30)) * INTERVAL '1 day' AS creation_date
+          FROM generate_series(%(rows)s + 1, %(rows)s + %(insert_rows)s) AS g) AS series
+"""
+RANGE_QUERY_SQL = """
+    SELECT COUNT(*) FROM timestamp_indexes_benchmark WHERE creation_date >= %(start)s AND creation_date < %(end)s
+"""
+
+ORDERS = ['chronological', 'random']
+METHODS = ['btree', 'brin']
+
+
+def plan_scans(plan: dict) -> list:
+    """Find the scans of the tables of a query plan.
+
+    :param plan: The node of the plan.
+    :return: The types of the scans.
+    """
+    scans = [plan['Node Type']] if 'Relation Name' in plan or 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        scans += plan_scans(child)
+    return scans
+
+
+class Command(BaseCommand):
+    """Command to benchmark the B-tree and the BRIN index of the creation dates of the incidents
+    """
+    help = 'Benchmark the B-tree and the BRIN index of the creation dates on synthetic tables of incidents, created ' \
+           'in chronological and in random order: the size of the indexes, their build time (as after the fast ' \
+           'loads), the time of an import that maintains them and the latency of date range queries. The tables are ' \
+           'temporary, so the database is left intact.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=2000000, help='The number of rows of the synthetic tables')
+        parser.add_argument('--insert-rows', type=int, default=200000,
+                            help='The number of rows that are imported after the initial load')
+        parser.add_argument('--days', type=int, default=3650,
+                            help='The number of the distinct creation dates of the rows')
+        parser.add_argument('--ranges', type=int, default=50, help='The number of the random date ranges')
+        parser.add_argument('--range-days', type=int, default=7, help='The number of the days of the date ranges')
+        parser.add_argument('--output', type=str, help='The JSON file to write the results to')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark needs PostgreSQL')
+
+        rng = random.Random(0)
+        ranges = []
+        for _ in range(options['ranges']):
+            start = FIRST_DATE + datetime.timedelta(days=rng.randrange(max(options['days'] - options['range_days'], 1)))
+            ranges.append({'start': start, 'end': start + datetime.timedelta(days=options['range_days'])})
+        params = {'first_date': FIRST_DATE, 'rows': options['rows'], 'insert_rows': options['insert_rows'],
+                  'days': options['days']}
+
+        report = {'rows': options['rows'], 'insert_rows': options['insert_rows'], 'days': options['days'],
+                  'ranges': options['ranges'], 'range_days': options['range_days']}
+        for order in ORDERS:
+            report[order] = self.benchmark_order(dict(params, chronological=order == 'chronological'), ranges)
+            for method, result in report[order].items():
+                self.stdout.write(f"{order} {method}: {result['size_bytes'] / 1024 / 1024:.2f} MB, "
+                                  f"build {result['build_ms']} ms, import {result['import_ms']} ms, "
+                                  f"median range query {result['median_ms']} ms ({', '.join(result['scans'])})")
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+
+    @staticmethod
+    def benchmark_order(params: dict, ranges: list) -> dict:
+        """Benchmark the indexes on a synthetic table of incidents.
+
+        :param params: The parameters of the synthetic table.
+        :param ranges: The date ranges of the queries.
+        :return: The results of each index method.
+        """
+        results = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(0.5)')
+            cursor.execute(CREATE_TABLE_SQL, params)
+            cursor.execute('ANALYZE timestamp_indexes_benchmark')
+            for method in METHODS:
+                start = time.perf_counter()
+                cursor.execute(f'CREATE INDEX timestamp_indexes_benchmark_index ON timestamp_indexes_benchmark '
+                               f'USING {method} (creation_date)')
+                build_ms = (time.perf_counter() - start) * 1000
+                cursor.execute("SELECT pg_relation_size('timestamp_indexes_benchmark_index')")
+                size_bytes = cursor.fetchone()[0]
+
+                # The imported rows are rolled back, so that both indexes are measured on the same rows
+                savepoint = transaction.savepoint()
+                start = time.perf_counter()
+                cursor.execute(INSERT_SQL, params)
+                import_ms = (time.perf_counter() - start) * 1000
+                transaction.savepoint_rollback(savepoint)
+
+                milliseconds, scans = [], set()
+                for range_params in ranges:
+                    cursor.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + RANGE_QUERY_SQL, range_params)
+                    explain = cursor.fetchone()[0]
+                    explain = json.loads(explain) if isinstance(explain, str) else explain
+                    milliseconds.append(explain[0]['Execution Time'])
+                    scans.update(plan_scans(explain[0]['Plan']))
+                cursor.execute('DROP INDEX timestamp_indexes_benchmark_index')
+                results[method] = {'size_bytes': size_bytes, 'build_ms': round(build_ms, 3),
+                                   'import_ms': round(import_ms, 3),
+                                   'median_ms': round(statistics.median(milliseconds), 3),
+                                   'max_ms': round(max(milliseconds), 3), 'scans': sorted(scans)}
+            transaction.set_rollback(True)
+        return results
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from chicago_incidents import caching, partitions
+
+
+class Command(BaseCommand):
+    """Command to find the payloads and the joins of the incidents whose incident does not exist
+    """
+    help = 'Find the rows of the payloads and of the joins of the incidents (e.g. `abandoned_vehicles_incidents`) ' \
+           'whose incident does not exist. The partitioned incidents cannot be referenced by foreign keys, so the ' \
+           'database does not cascade the deletions of the incidents that bypass Django (e.g. raw SQL). Fails if any ' \
+           'are found, unless `--delete` is given.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--delete', action='store_true', help='Delete the rows that are found')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        orphans = partitions.find_orphans(delete=options['delete'])
+        for table, count in orphans.items():
+            self.stdout.write(f"{'Deleted' if options['delete'] else 'Found'} {count} rows of {table} without incident")
+        if orphans and not options['delete']:
+            raise CommandError(f'{sum(orphans.values())} rows point to incidents that do not exist, run the command '
+                               f'with --delete to delete them')
+        if orphans:
+            caching.bump_data_version()
+        self.stdout.write(f'The rows of {len(partitions.incident_relations())} tables point to existing incidents')
@@ -0,0 +1,106 @@
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.management.base import BaseCommand, CommandParser
+
+from chicago_incidents.importers import read_frames
+from chicago_incidents.management.commands.import_incidents_from_csvs import DATASET_COLUMNS, FLOAT_COLUMNS, \
+    INTEGER_COLUMNS
+
+# The columns of the CSVs that are parsed to datetimes and numbers, the rest of them are kept as strings
+DATE_COLUMNS = ['creation_date', 'completion_date']
+NUMERIC_COLUMNS = INTEGER_COLUMNS + FLOAT_COLUMNS
+
+
+def columnar_schema(columns: list) -> pa.Schema:
+    """ Create the schema of the columnar conversion of a CSV. The schema is fixed, so that all the chunks of the CSV
+    are written with the same types.
+
+    :param columns: The names of the columns of the CSV.
+    :return: The schema.
+    """
+    def column_type(column):
+        if column in DATE_COLUMNS:
+            return pa.timestamp('ns')
+        if column in NUMERIC_COLUMNS:
+            return pa.float64()
+        return pa.string()
+
+    return pa.schema([(column, column_type(column)) for column in columns])
+
+
+def type_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """ Parse the columns of a CSV, that is read as strings, to the types of the columnar schema.
+
+    :param df: The dataframe of the CSV.
+    :return: The typed dataframe.
+    """
+    columns = {}
+    for column in df.columns.intersection(DATE_COLUMNS):
+        columns[column] = pd.to_datetime(df[column])
+    for column in df.columns.intersection(NUMERIC_COLUMNS):
+        columns[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    return df.assign(**columns)
+
+
+class Command(BaseCommand):
+    """Command to convert the CSVs to typed columnar files (Parquet or Feather) that can be imported without parsing
+    """
+    help = 'Convert the CSVs to typed columnar files (Parquet or Feather) that can be imported without parsing'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('input_files', nargs='+', help='The CSV files to convert')
+        parser.add_argument('--format', choices=['parquet', 'feather'], default='parquet',
+                            help='The format of the converted files')
+        parser.add_argument('--output-dir', default=None,
+                            help='The directory of the converted files, by default the directory of each CSV')
+        parser.add_argument('--chunk-size', type=int, default=250000,
+                            help='The number of rows that are converted at once')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        for input_file in options['input_files']:
+            columns = next((columns for suffix, columns in DATASET_COLUMNS.items() if input_file.endswith(suffix)),
+                           None)
+            if columns is None:
+                self.stdout.write(f"File '{input_file}' cannot be processed, skipping.")
+                continue
+
+            output_dir = options['output_dir'] or os.path.dirname(input_file)
+            root = os.path.splitext(os.path.basename(input_file))[0]
+            output_file = os.path.join(output_dir, f"{root}.{options['format']}")
+
+            start = time.time()
+            rows = self.convert(input_file, output_file, columns, options['format'], options['chunk_size'])
+            self.stdout.write(f"Converted {rows} rows of {input_file} to {output_file}, "
+                              f"took {(time.time() - start):.2f} seconds")
+
+    @staticmethod
+    def convert(input_file: str, output_file: str, columns: list, file_format: str, chunk_size: int) -> int:
+        """ Convert a CSV to a columnar file, chunk by chunk.
+
+        :param input_file: The CSV file.
+        :param output_file: The columnar file.
+        :param columns: The names of the columns of the CSV.
+        :param file_format: The format of the columnar file (`parquet` or `feather`).
+        :param chunk_size: The number of rows that are converted at once.
+        :return: The number of rows converted.
+        """
+        schema = columnar_schema(columns)
+        # Feather (V2) is the Arrow IPC file format, so it can be written in batches too
+        writer = pq.ParquetWriter(output_file, schema) if file_format == 'parquet' else \
+            pa.ipc.new_file(output_file, schema)
+        rows = 0
+        with writer:
+            for chunk in read_frames(input_file, columns, chunk_size=chunk_size, dtype=str):
+                writer.write_table(pa.Table.from_pandas(type_columns(chunk), schema=schema, preserve_index=False))
+                rows += len(chunk)
+        return rows
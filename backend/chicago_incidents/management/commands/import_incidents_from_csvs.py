@@ -1,13 +1,130 @@
+import contextlib
 import time
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import pandas as pd
 import numpy as np
-import hashlib
 
-from django.core.management.base import BaseCommand, CommandParser
-from django.db import transaction
-
-from chicago_incidents import models
+import django
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from chicago_incidents import caching, models, partitions
+from chicago_incidents.importers import CopyLoader, DeferredIndexes, LookupChild, LookupCache, DetailChild, \
+    ImportMetrics, TimestampIndexes, WriteCounter, cap, csv_name, hash_file, iter_rows, read_frames
+
+# The payload of the incidents that have activities, used by the COPY engine
+ACTIVITY_CHILD = dict(lookup_model=models.Activity, link_model=models.ActivityIncident, link_field='activity',
+                      fields={'current_activity': 'current_activity', 'most_recent_action': 'most_recent_action'})
+
+# The incidents and the tables of their payloads, whose non-unique indexes are rebuilt after the fast loads
+FAST_LOAD_MODELS = [models.Incident, models.ActivityIncident, models.AbandonedVehicleIncident,
+                    models.NumberOfCartsAndPotholes, models.GraffitiIncident, models.RodentBaitingPremises,
+                    models.SanitationCodeViolationIncident, models.TreeIncident]
+
+# The timestamp columns of the incidents that the fast loads index by BRIN indexes when they are in chronological order,
+# with whether they fall back to a B-tree (the completion dates lead the covering index of the police district query)
+TIMESTAMP_COLUMNS = {'creation_date': True, 'completion_date': False}
+
+# The columns that identify duplicate rows of the CSVs
+DUPLICATE_SUBSET = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                    'street_address', 'zip_code']
+
+# The column that identifies an incident between the imports, and the fields that the incremental imports update at
+# the incidents that are already stored
+INCREMENTAL_KEY = 'service_request_number'
+INCREMENTAL_FIELDS = ['status', 'completion_date']
+
+# The statuses of the CSVs mapped to the values that are stored
+STATUS_TYPES = {label: value for value, label in models.Incident.STATUS_TYPE_CHOICES}
+STATUS_DTYPE = pd.CategoricalDtype([value for value, _ in models.Incident.STATUS_TYPE_CHOICES])
+
+# The columns that are normalized to nullable integers and floats
+INTEGER_COLUMNS = ['zip_code', 'zip_codes', 'ward', 'wards', 'historical_wards_03_15', 'police_district',
+                   'community_area', 'community_areas', 'ssa', 'census_tracts', 'number_of_elements',
+                   'days_of_report_as_parked', 'number_of_premises_baited', 'number_of_premises_w_garbage',
+                   'number_of_premises_w_rats']
+FLOAT_COLUMNS = ['x_coordinate', 'y_coordinate', 'latitude', 'longitude']
+
+# The columns of the CSVs of each dataset
+ABANDONED_VEHICLES_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                              'type_of_service_request', 'license_plate', 'vehicle_make_model', 'vehicle_color',
+                              'current_activity', 'most_recent_action', 'days_of_report_as_parked', 'street_address',
+                              'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
+                              'ssa', 'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
+                              'community_areas', 'census_tracts', 'wards']
+GARBAGE_CARTS_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                         'type_of_service_request', 'number_of_elements', 'current_activity', 'most_recent_action',
+                         'street_address', 'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district',
+                         'community_area', 'ssa', 'latitude', 'longitude', 'location', 'historical_wards_03_15',
+                         'zip_codes', 'community_areas', 'census_tracts', 'wards']
+POT_HOLES_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                     'current_activity', 'most_recent_action', 'number_of_elements', 'street_address', 'zip_code',
+                     'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area', 'ssa', 'latitude',
+                     'longitude', 'location', 'historical_wards_03_15', 'zip_codes', 'community_areas', 'census_tracts',
+                     'wards']
+GRAFFITI_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                    'surface', 'graffiti_location', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
+                    'ward', 'police_district', 'community_area', 'ssa', 'latitude', 'longitude', 'location',
+                    'historical_wards_03_15', 'zip_codes', 'community_areas', 'census_tracts', 'wards']
+RODENT_BAITING_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                          'type_of_service_request', 'number_of_premises_baited', 'number_of_premises_w_garbage',
+                          'number_of_premises_w_rats', 'current_activity', 'most_recent_action', 'street_address',
+                          'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
+                          'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes', 'community_areas',
+                          'census_tracts', 'wards']
+SANITATION_CODE_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                           'type_of_service_request', 'nature_of_code_violation', 'street_address', 'zip_code',
+                           'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area', 'latitude',
+                           'longitude', 'location', 'historical_wards_03_15', 'zip_codes', 'community_areas',
+                           'census_tracts', 'wards']
+TREE_DEBRIS_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                       'type_of_service_request', 'tree_location', 'current_activity', 'most_recent_action',
+                       'street_address', 'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district',
+                       'community_area', 'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
+                       'community_areas', 'census_tracts', 'wards']
+TREE_TRIMS_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                      'tree_location', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate', 'ward',
+                      'police_district', 'community_area', 'latitude', 'longitude', 'location',
+                      'historical_wards_03_15', 'zip_codes', 'community_areas', 'census_tracts', 'wards']
+LIGHTS_OUT_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number', 'type_of_service_request',
+                      'street_address', 'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district',
+                      'community_area', 'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
+                      'community_areas', 'census_tracts', 'wards']
+STREET_LIGHT_ONE_OUT_COLUMNS = ['creation_date', 'status', 'completion_date', 'service_request_number',
+                                'type_of_service_request', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
+                                'ward', 'police_district', 'community_area', 'latitude', 'longitude', 'location']
+
+# The columns of the CSVs mapped by the suffix of their file names
+DATASET_COLUMNS = {
+    'abandoned-vehicles.csv': ABANDONED_VEHICLES_COLUMNS,
+    'alley-lights-out.csv': LIGHTS_OUT_COLUMNS,
+    'garbage-carts.csv': GARBAGE_CARTS_COLUMNS,
+    'graffiti-removal.csv': GRAFFITI_COLUMNS,
+    'pot-holes-reported.csv': POT_HOLES_COLUMNS,
+    'rodent-baiting.csv': RODENT_BAITING_COLUMNS,
+    'sanitation-code-complaints.csv': SANITATION_CODE_COLUMNS,
+    'tree-debris.csv': TREE_DEBRIS_COLUMNS,
+    'tree-trims.csv': TREE_TRIMS_COLUMNS,
+    'street-lights-all-out.csv': LIGHTS_OUT_COLUMNS,
+    'street-lights-one-out.csv': STREET_LIGHT_ONE_OUT_COLUMNS,
+}
+
+
+def import_file_worker(input_file: str, options: dict) -> typing.Tuple[str, int, float]:
+    """Import a file at a worker process. Each worker process opens its own database connection.
+
+    :param input_file: The file to import.
+    :param options: The options of the command.
+    :return: The file, the number of incidents imported and the seconds it took.
+    """
+    command = Command()
+    command.set_options(options)
+    start = time.time()
+    count = command.import_file(input_file)
+    return input_file, count, time.time() - start
 
 
 class Command(BaseCommand):
@@ -21,41 +138,258 @@ class Command(BaseCommand):
         :param parser: The argument parser.
         """
         parser.add_argument('input_files', nargs='+', help='The input files to parse')
+        parser.add_argument('--engine', choices=['orm', 'copy'], default='orm',
+                            help='The engine that writes the records to the database. The `orm` engine uses '
+                                 '`bulk_create` and the `copy` engine streams the records with PostgreSQL '
+                                 '`COPY FROM STDIN` in bounded chunks')
+        parser.add_argument('--copy-chunk-size', type=int, default=50000,
+                            help='The number of incidents that are written with each COPY by the `copy` engine')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Read, normalize and write the CSVs in chunks of this number of rows, in order to '
+                                 'keep the memory usage flat. By default each CSV is read at once')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='The number of processes that import files at the same time')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Import only the delta of the CSVs. The rows are matched to the stored incidents by '
+                                 'their service request number, the new ones are inserted and the ones whose status '
+                                 'or completion date changed are updated')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue the chunked imports of the CSVs from their last committed chunk, and '
+                                 'rebuild the indexes that an interrupted `--fast-load` left dropped. Requires '
+                                 '`--chunk-size`')
+        parser.add_argument('--fast-load', action='store_true',
+                            help='Drop the non-unique indexes of the incidents and of their payload tables before '
+                                 'the import and rebuild them afterwards, followed by an ANALYZE of the tables')
+        parser.add_argument('--index-workers', type=int, default=4,
+                            help='The number of indexes that are rebuilt at the same time by `--fast-load`')
+        parser.add_argument('--brin-min-rows', type=int, default=1000000,
+                            help='The minimum number of incidents for which `--fast-load` indexes the creation and the '
+                                 'completion dates by BRIN indexes instead of B-trees')
+        parser.add_argument('--brin-min-correlation', type=float, default=0.9,
+                            help='The minimum correlation of the dates with the physical order of the incidents for '
+                                 'which `--fast-load` indexes them by BRIN indexes instead of B-trees')
 
     def handle(self, *args, **options):
 
         """Implement the logic of the command.
         """
+        if options['resume'] and not options['chunk_size']:
+            raise CommandError('--resume requires --chunk-size, only the chunked imports are checkpointed')
+        if options['fast_load'] and options['incremental']:
+            raise CommandError('--fast-load cannot be combined with --incremental, the incremental imports look up '
+                               'the stored incidents by their indexes')
+        self.set_options(options)
+        input_files = options['input_files']
+        if options['fast_load'] or options['resume']:
+            # The indexes that an interrupted fast load left dropped are rebuilt before the import
+            start = time.time()
+            count = DeferredIndexes.restore(options['index_workers'])
+            if count:
+                self.stdout.write(f"Restored {count} indexes of an interrupted fast load, "
+                                  f"took {(time.time() - start):.2f} seconds")
         start = time.time()
-        for input_file in options['input_files']:
-            self.stdout.write(f"Processing file {input_file}")
-            if input_file.endswith('abandoned-vehicles.csv'):
-                self.import_abandoned_vehicles(input_file)
-            elif input_file.endswith('alley-lights-out.csv'):
-                self.import_alley_lights_out_or_street_lights_all_out(input_file, street_lights=False)
-            elif input_file.endswith('garbage-carts.csv'):
-                self.import_garbage_carts_or_potholes(input_file, garbage_carts=True)
-            elif input_file.endswith('graffiti-removal.csv'):
-                self.import_graffiti_removal(input_file)
-            elif input_file.endswith('pot-holes-reported.csv'):
-                self.import_garbage_carts_or_potholes(input_file, garbage_carts=False)
-            elif input_file.endswith('rodent-baiting.csv'):
-                self.import_rodent_baiting(input_file)
-            elif input_file.endswith('sanitation-code-complaints.csv'):
-                self.import_sanitation_complaints(input_file)
-            elif input_file.endswith('tree-debris.csv'):
-                self.import_tree_incidents(input_file, debris=True)
-            elif input_file.endswith('tree-trims.csv'):
-                self.import_tree_incidents(input_file, debris=False)
-            elif input_file.endswith('street-lights-all-out.csv'):
-                self.import_alley_lights_out_or_street_lights_all_out(input_file, street_lights=True)
-            elif input_file.endswith('street-lights-one-out.csv'):
-                self.import_street_lights_one_out(input_file)
-            else:
-                self.stdout.write(f"File '{input_file}' cannot be processed, skipping.")
+        if options['fast_load']:
+            total = self.fast_load(input_files, options)
+        else:
+            total = self.import_files(input_files, options)
 
         end = time.time()
-        self.stdout.write(f"Finished importing datasets, took {(end - start):.2f} seconds")
+        self.stdout.write(f"Finished importing datasets, took {(end - start):.2f} seconds "
+                          f"({(total / max(end - start, 1e-9)):.0f} rows/sec)")
+
+    def import_files(self, input_files: typing.List[str], options: dict) -> int:
+        """Import the files, one after the other or at separate processes.
+
+        :param input_files: The files to import.
+        :param options: The options of the command.
+        :return: The number of incidents imported.
+        """
+        total = 0
+        if options['workers'] > 1:
+            # The lookup records that are shared between the files are created before the files are imported, so
+            # that the workers only read them
+            self.create_shared_lookups(input_files)
+            # The forked processes must not share the connection of the main process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+                futures = [executor.submit(import_file_worker, input_file, options) for input_file in input_files]
+                for future in as_completed(futures):
+                    input_file, count, seconds = future.result()
+                    total += count
+                    self.stdout.write(f"Imported {count} incidents from {input_file}, took {seconds:.2f} seconds")
+        else:
+            for input_file in input_files:
+                file_start = time.time()
+                count = self.import_file(input_file)
+                total += count
+                self.stdout.write(f"Imported {count} incidents from {input_file}, "
+                                  f"took {(time.time() - file_start):.2f} seconds")
+        return total
+
+    def fast_load(self, input_files: typing.List[str], options: dict) -> int:
+        """Import the files without maintaining the non-unique indexes of the incidents and of their payloads. The
+        indexes are dropped before the import and rebuilt in parallel afterwards (even if the import fails), then the
+        tables are analyzed. The timestamp columns of the incidents are indexed by BRIN indexes or B-trees depending on
+        the loaded incidents (see `TimestampIndexes`).
+
+        :param input_files: The files to import.
+        :param options: The options of the command.
+        :return: The number of incidents imported.
+        """
+        indexes = DeferredIndexes([model._meta.db_table for model in FAST_LOAD_MODELS])
+        start = time.time()
+        count = indexes.drop()
+        self.stdout.write(f"Dropped {count} indexes, took {(time.time() - start):.2f} seconds")
+        try:
+            start = time.time()
+            total = self.import_files(input_files, options)
+            self.stdout.write(f"Loaded {total} incidents, took {(time.time() - start):.2f} seconds")
+        except BaseException:
+            # The indexes are rebuilt even if the load fails, but a failure of the rebuild is only reported, so that
+            # the error of the load is raised. The indexes that are left dropped are persisted, to be rebuilt later
+            try:
+                self.rebuild_indexes(indexes, options)
+            except Exception as error:
+                self.stderr.write(f"Failed to rebuild the dropped indexes after the failed load ({error}), run "
+                                  f"`python manage.py rebuild_deferred_indexes` to rebuild them")
+            raise
+
+        timestamp_indexes = TimestampIndexes(models.Incident._meta.db_table, TIMESTAMP_COLUMNS,
+                                             options['brin_min_rows'], options['brin_min_correlation'])
+        for column, method in timestamp_indexes.choose(indexes).items():
+            self.stdout.write(f"Indexing {column} by {method or 'no'} index")
+        self.rebuild_indexes(indexes, options)
+
+        start = time.time()
+        indexes.analyze()
+        self.stdout.write(f"Analyzed {len(indexes.tables)} tables, took {(time.time() - start):.2f} seconds")
+
+        start = time.time()
+        models.IncidentDailyRollup.refresh()
+        models.refresh_materialized_views()
+        caching.bump_data_version()
+        self.stdout.write(f"Rebuilt the daily rollup of the incidents and the materialized views, "
+                          f"took {(time.time() - start):.2f} seconds")
+        return total
+
+    def rebuild_indexes(self, indexes: DeferredIndexes, options: dict):
+        """Rebuild the indexes that were dropped by a fast load.
+
+        :param indexes: The dropped indexes.
+        :param options: The options of the command.
+        """
+        start = time.time()
+        count = indexes.rebuild(options['index_workers'])
+        self.stdout.write(f"Rebuilt {count} indexes, took {(time.time() - start):.2f} seconds")
+
+    def set_options(self, options: dict):
+        """Keep the options of the command that are used by the importers.
+
+        :param options: The options of the command.
+        """
+        self.engine = options['engine']
+        self.copy_chunk_size = options['copy_chunk_size']
+        self.chunk_size = options['chunk_size']
+        self.incremental = options['incremental']
+        self.resume = options['resume']
+        # Counts the records that are written to each table, for the checkpoints of the chunked imports
+        self.counter = WriteCounter()
+        # The timings of the phases of the imports and the number of queries, reported by the benchmarks
+        self.metrics = ImportMetrics()
+        self.imported = 0
+        self.updated = 0
+        # The range of the creation dates of the imported file, whose rollup is refreshed after the import. The fast
+        # loads rebuild the whole rollup at the end instead
+        self.rollup_range = []
+        self.refresh_rollup = not options.get('fast_load', False)
+        # The partitions of the months of the imported incidents are created before the incidents are written
+        self.partitioned = partitions.is_partitioned()
+        # The activities are resolved in memory, they are loaded once and the missing ones are bulk inserted
+        self.activities = LookupCache(models.Activity, ['current_activity', 'most_recent_action'])
+        self.trees = LookupCache(models.Tree, ['location'])
+        self.abandoned_vehicles = LookupCache(models.AbandonedVehicle,
+                                              ['license_plate', 'vehicle_color', 'vehicle_make_model'])
+        self.graffiti = LookupCache(models.Graffiti, ['surface', 'location'])
+        self.code_violations = LookupCache(models.SanitationCodeViolation, ['nature_of_code_violation'])
+
+    def import_file(self, input_file: str) -> int:
+        """Import a file with the importer that matches its name.
+
+        :param input_file: The file to import.
+        :return: The number of incidents imported.
+        """
+        self.imported = 0
+        self.updated = 0
+        self.rollup_range = []
+        self.stdout.write(f"Processing file {input_file}")
+        # The columnar conversions of the CSVs are dispatched as the CSVs they come from
+        dataset = csv_name(input_file)
+        with connection.execute_wrapper(self.metrics), self.metrics.phase('build'):
+            self.dispatch(dataset, input_file)
+            if self.refresh_rollup and self.rollup_range:
+                models.IncidentDailyRollup.refresh(*self.rollup_range)
+            # The materialized views aggregate the abandoned vehicles only
+            if self.refresh_rollup and dataset.endswith('abandoned-vehicles.csv'):
+                models.refresh_materialized_views()
+        # The cached responses of the queries are computed again with the imported incidents
+        caching.bump_data_version()
+        if self.incremental:
+            self.stdout.write(f"Updated {self.updated} incidents from {input_file}")
+        return self.imported
+
+    def dispatch(self, dataset: str, input_file: str):
+        """Import a file with the importer of its dataset.
+
+        :param dataset: The name of the CSV of the dataset.
+        :param input_file: The file to import.
+        """
+        if dataset.endswith('abandoned-vehicles.csv'):
+            self.import_abandoned_vehicles(input_file)
+        elif dataset.endswith('alley-lights-out.csv'):
+            self.import_alley_lights_out_or_street_lights_all_out(input_file, street_lights=False)
+        elif dataset.endswith('garbage-carts.csv'):
+            self.import_garbage_carts_or_potholes(input_file, garbage_carts=True)
+        elif dataset.endswith('graffiti-removal.csv'):
+            self.import_graffiti_removal(input_file)
+        elif dataset.endswith('pot-holes-reported.csv'):
+            self.import_garbage_carts_or_potholes(input_file, garbage_carts=False)
+        elif dataset.endswith('rodent-baiting.csv'):
+            self.import_rodent_baiting(input_file)
+        elif dataset.endswith('sanitation-code-complaints.csv'):
+            self.import_sanitation_complaints(input_file)
+        elif dataset.endswith('tree-debris.csv'):
+            self.import_tree_incidents(input_file, debris=True)
+        elif dataset.endswith('tree-trims.csv'):
+            self.import_tree_incidents(input_file, debris=False)
+        elif dataset.endswith('street-lights-all-out.csv'):
+            self.import_alley_lights_out_or_street_lights_all_out(input_file, street_lights=True)
+        elif dataset.endswith('street-lights-one-out.csv'):
+            self.import_street_lights_one_out(input_file)
+        else:
+            self.stdout.write(f"File '{input_file}' cannot be processed, skipping.")
+
+    def create_shared_lookups(self, input_files: typing.List[str]):
+        """Create the activities and the trees of all the files that do not exist yet. These lookup records are shared
+        between the datasets, so they are created once before the files are imported in parallel in order to avoid
+        races and unique constraint failures between the workers.
+
+        :param input_files: The files to import.
+        """
+        shared = [(self.activities, ['current_activity', 'most_recent_action']),
+                  (self.trees, ['tree_location'])]
+        for input_file in input_files:
+            columns = next((columns for suffix, columns in DATASET_COLUMNS.items()
+                            if csv_name(input_file).endswith(suffix)), None)
+            for cache, lookup_columns in shared:
+                if columns is None or not set(lookup_columns).issubset(columns):
+                    continue
+                for chunk in read_frames(input_file, columns, chunk_size=self.chunk_size or 250000,
+                                         usecols=lookup_columns, dtype=str):
+                    values = iter_rows(chunk[lookup_columns], name=None)
+                    created = cache.resolve(cache.make_key(value) for value in values)
+                    if created:
+                        self.stdout.write(f"Created {created} {cache.model._meta.verbose_name_plural} "
+                                          f"from {input_file}")
 
     def import_abandoned_vehicles(self, input_file: str):
         """ Import the requests for abandoned abandoned_vehicles to the database.
@@ -64,79 +398,69 @@ class Command(BaseCommand):
         """
         self.stdout.write("Getting requests for abandoned vehicles")
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'license_plate', 'vehicle_make_model', 'vehicle_color',
-                            'current_activity', 'most_recent_action', 'days_of_report_as_parked', 'street_address',
-                            'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
-                            'ssa', 'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
-                            'community_areas', 'census_tracts', 'wards']
-
-        input_df = self.dataframe_normalization(input_df, models.Incident.ABANDONED_VEHICLE)
-
-        incidents = list()
-        activity_incidents = list()
-        abandoned_vehicles = list()
-        abandoned_vehicles_dict = dict()
-        abandoned_vehicles_incidents = list()
-        with transaction.atomic():
-            for row in input_df.itertuples(index=False):
-                # Retrieve or create the current incident
-                incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                           completion_date=row.completion_date,
-                                           service_request_number=row.service_request_number,
-                                           type_of_service_request=row.type_of_service_request,
-                                           street_address=row.street_address, zip_code=row.zip_code,
-                                           zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
-                                           y_coordinate=row.y_coordinate, ward=row.ward,
-                                           wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
-                                           police_district=row.police_district, community_area=row.community_area,
-                                           community_areas=row.community_areas, ssa=row.ssa,
-                                           census_tracts=row.census_tracts, latitude=row.latitude,
-                                           longitude=row.longitude, location=row.location)
-                incidents.append(incident)
-
-                if any([row.license_plate, row.vehicle_color, row.vehicle_make_model]):
-                    abandoned_vehicle = models.AbandonedVehicle(license_plate=row.license_plate,
-                                                                vehicle_color=row.vehicle_color,
-                                                                vehicle_make_model=row.vehicle_make_model)
-
-                    # In order to avoid inserting duplicate abandoned cars without querying the database
-                    # we use in memory hashing from the dataframe values
-                    obj_str = f'{str(row.license_plate or "")}{str(row.vehicle_color or "")}' \
-                              f'{str(row.vehicle_make_model or "")}'
-                    vehicle_hash = hashlib.md5(obj_str.encode()).hexdigest()
-                    if vehicle_hash not in abandoned_vehicles_dict:
-                        abandoned_vehicles_dict.update({vehicle_hash: abandoned_vehicle})
-                        abandoned_vehicles.append(abandoned_vehicle)
-
-                    days_of_report_as_parked = row.days_of_report_as_parked
-                    if days_of_report_as_parked and int(days_of_report_as_parked) > 1000000:
-                        days_of_report_as_parked = 1000000
-                    abandoned_vehicles_incident = models. \
-                        AbandonedVehicleIncident(abandoned_vehicle=abandoned_vehicles_dict[vehicle_hash],
-                                                 incident=incident,
-                                                 days_of_report_as_parked=days_of_report_as_parked)
-                    abandoned_vehicles_incidents.append(abandoned_vehicles_incident)
-
-                # Get the activity of the incident
-                activity, _ = self.import_activity(row)
-                if activity:
-                    activity_incident = models.ActivityIncident(activity=activity, incident=incident)
-                    activity_incidents.append(activity_incident)
-
-        models.AbandonedVehicle.objects.bulk_create(abandoned_vehicles, batch_size=250000)
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-
-        for activity_incident in activity_incidents:
-            activity_incident.incident_id = activity_incident.incident.id
-            activity_incident.activity_id = activity_incident.activity.id
-        for abandoned_vehicle_incident in abandoned_vehicles_incidents:
-            abandoned_vehicle_incident.incident_id = abandoned_vehicle_incident.incident.id
-            abandoned_vehicle_incident.abandoned_vehicle_id = abandoned_vehicle_incident.abandoned_vehicle.id
-
-        models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
-        models.AbandonedVehicleIncident.objects.bulk_create(abandoned_vehicles_incidents, batch_size=250000)
+        input_dfs = self.read_input(input_file, ABANDONED_VEHICLES_COLUMNS, models.Incident.ABANDONED_VEHICLE)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs, [
+                LookupChild(lookup_model=models.AbandonedVehicle, link_model=models.AbandonedVehicleIncident,
+                            link_field='abandoned_vehicle',
+                            fields={'license_plate': 'license_plate', 'vehicle_color': 'vehicle_color',
+                                    'vehicle_make_model': 'vehicle_make_model'},
+                            link_fields={'days_of_report_as_parked': 'days_of_report_as_parked'},
+                            converters={'days_of_report_as_parked': cap(1000000)}),
+                LookupChild(**ACTIVITY_CHILD),
+            ])
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            activity_incidents = list()
+            abandoned_vehicles_incidents = list()
+            self.resolve_lookup(self.abandoned_vehicles, input_df,
+                                ['license_plate', 'vehicle_color', 'vehicle_make_model'])
+            self.resolve_activities(input_df)
+            # The ids of the incidents are reserved up front, so the payloads point to them as they are built and
+            # nothing is fixed up after the inserts
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            with transaction.atomic():
+                for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                    # Retrieve or create the current incident
+                    incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
+                                               completion_date=row.completion_date,
+                                               service_request_number=row.service_request_number,
+                                               type_of_service_request=row.type_of_service_request,
+                                               street_address=row.street_address, zip_code=row.zip_code,
+                                               zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
+                                               y_coordinate=row.y_coordinate, ward=row.ward,
+                                               wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
+                                               police_district=row.police_district, community_area=row.community_area,
+                                               community_areas=row.community_areas, ssa=row.ssa,
+                                               census_tracts=row.census_tracts, latitude=row.latitude,
+                                               longitude=row.longitude, location=row.location)
+                    incidents.append(incident)
+
+                    abandoned_vehicle_id = self.abandoned_vehicles.get(LookupCache.make_key(
+                        (row.license_plate, row.vehicle_color, row.vehicle_make_model)))
+                    if abandoned_vehicle_id:
+                        days_of_report_as_parked = row.days_of_report_as_parked
+                        if days_of_report_as_parked and int(days_of_report_as_parked) > 1000000:
+                            days_of_report_as_parked = 1000000
+                        abandoned_vehicles_incident = models. \
+                            AbandonedVehicleIncident(abandoned_vehicle_id=abandoned_vehicle_id,
+                                                     incident_id=incident_id,
+                                                     days_of_report_as_parked=days_of_report_as_parked)
+                        abandoned_vehicles_incidents.append(abandoned_vehicles_incident)
+
+                    # Get the activity of the incident
+                    activity_id = self.import_activity(row)
+                    if activity_id:
+                        activity_incident = models.ActivityIncident(activity_id=activity_id, incident_id=incident_id)
+                        activity_incidents.append(activity_incident)
+
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
+
+            models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
+            models.AbandonedVehicleIncident.objects.bulk_create(abandoned_vehicles_incidents, batch_size=250000)
 
     def import_garbage_carts_or_potholes(self, input_file: str, garbage_carts: bool):
         """ Import the requests for garbage carts incidents
@@ -149,31 +473,84 @@ class Command(BaseCommand):
         else:
             self.stdout.write("Getting requests for potholes")
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-
         if garbage_carts:
-            input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                                'type_of_service_request', 'number_of_elements', 'current_activity',
-                                'most_recent_action', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
-                                'ward', 'police_district', 'community_area', 'ssa', 'latitude', 'longitude',
-                                'location', 'historical_wards_03_15', 'zip_codes', 'community_areas',
-                                'census_tracts', 'wards']
-            input_df = self.dataframe_normalization(input_df, models.Incident.GARBAGE_CART)
+            input_dfs = self.read_input(input_file, GARBAGE_CARTS_COLUMNS, models.Incident.GARBAGE_CART)
         else:
-            input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                                'type_of_service_request', 'current_activity', 'most_recent_action',
-                                'number_of_elements', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
-                                'ward', 'police_district', 'community_area', 'ssa', 'latitude', 'longitude',
-                                'location', 'historical_wards_03_15', 'zip_codes', 'community_areas',
-                                'census_tracts', 'wards']
-            input_df = self.dataframe_normalization(input_df, models.Incident.POT_HOLE)
-
-        incidents = list()
-        number_of_elements = list()
-        activity_incidents = list()
-        with transaction.atomic():
-            for row in input_df.itertuples(index=False):
-                incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
+            input_dfs = self.read_input(input_file, POT_HOLES_COLUMNS, models.Incident.POT_HOLE)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs, [
+                DetailChild(model=models.NumberOfCartsAndPotholes,
+                            fields={'number_of_elements': 'number_of_elements'},
+                            converters={'number_of_elements': cap(1000000)}),
+                LookupChild(**ACTIVITY_CHILD),
+            ])
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            number_of_elements = list()
+            activity_incidents = list()
+            self.resolve_activities(input_df)
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            with transaction.atomic():
+                for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                    incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
+                                               completion_date=row.completion_date,
+                                               service_request_number=row.service_request_number,
+                                               type_of_service_request=row.type_of_service_request,
+                                               street_address=row.street_address, zip_code=row.zip_code,
+                                               zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
+                                               y_coordinate=row.y_coordinate, ward=row.ward,
+                                               wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
+                                               police_district=row.police_district, community_area=row.community_area,
+                                               community_areas=row.community_areas, ssa=row.ssa,
+                                               census_tracts=row.census_tracts, latitude=row.latitude,
+                                               longitude=row.longitude, location=row.location)
+                    incidents.append(incident)
+
+                    if row.number_of_elements:
+                        number_of_elements_to_int = row.number_of_elements
+                        if int(number_of_elements_to_int) > 1000000:
+                            number_of_elements_to_int = 1000000
+                        elements = models.NumberOfCartsAndPotholes(incident_id=incident_id,
+                                                                   number_of_elements=number_of_elements_to_int)
+                        number_of_elements.append(elements)
+
+                    # Get the activity of the incident
+                    activity_id = self.import_activity(row)
+                    if activity_id:
+                        activity_incident = models.ActivityIncident(activity_id=activity_id, incident_id=incident_id)
+                        activity_incidents.append(activity_incident)
+
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
+
+            models.NumberOfCartsAndPotholes.objects.bulk_create(number_of_elements, batch_size=250000)
+            models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
+
+    def import_graffiti_removal(self, input_file: str):
+        """ Import the requests for graffiti removal incidents
+
+        :param input_file: The file from which to load the requests for graffiti removal incidents.
+        """
+        self.stdout.write("Getting requests for graffiti removal")
+
+        input_dfs = self.read_input(input_file, GRAFFITI_COLUMNS, models.Incident.GRAFFITI)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs, [
+                LookupChild(lookup_model=models.Graffiti, link_model=models.GraffitiIncident, link_field='graffiti',
+                            fields={'surface': 'surface', 'location': 'graffiti_location'}),
+            ])
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            graffiti_incidents = list()
+            self.resolve_lookup(self.graffiti, input_df, ['surface', 'graffiti_location'])
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
                                            completion_date=row.completion_date,
                                            service_request_number=row.service_request_number,
                                            type_of_service_request=row.type_of_service_request,
@@ -187,85 +564,14 @@ class Command(BaseCommand):
                                            longitude=row.longitude, location=row.location)
                 incidents.append(incident)
 
-                if row.number_of_elements:
-                    number_of_elements_to_int = row.number_of_elements
-                    if int(number_of_elements_to_int) > 1000000:
-                        number_of_elements_to_int = 1000000
-                    elements = models.NumberOfCartsAndPotholes(incident=incident,
-                                                               number_of_elements=number_of_elements_to_int)
-                    number_of_elements.append(elements)
+                graffiti_id = self.graffiti.get(LookupCache.make_key((row.surface, row.graffiti_location)))
+                if graffiti_id:
+                    graffiti_incident = models.GraffitiIncident(graffiti_id=graffiti_id, incident_id=incident_id)
+                    graffiti_incidents.append(graffiti_incident)
 
-                # Get the activity of the incident
-                activity, _ = self.import_activity(row)
-                if activity:
-                    activity_incident = models.ActivityIncident(activity=activity, incident=incident)
-                    activity_incidents.append(activity_incident)
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
 
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-
-        for activity_incident in activity_incidents:
-            activity_incident.incident_id = activity_incident.incident.id
-            activity_incident.activity_id = activity_incident.activity.id
-        for element in number_of_elements:
-            element.incident_id = element.incident.id
-
-        models.NumberOfCartsAndPotholes.objects.bulk_create(number_of_elements, batch_size=250000)
-        models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
-
-    def import_graffiti_removal(self, input_file: str):
-        """ Import the requests for graffiti removal incidents
-
-        :param input_file: The file from which to load the requests for graffiti removal incidents.
-        """
-        self.stdout.write("Getting requests for graffiti removal")
-
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'surface', 'graffiti_location', 'street_address',
-                            'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
-                            'ssa', 'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
-                            'community_areas', 'census_tracts', 'wards']
-
-        input_df = self.dataframe_normalization(input_df, models.Incident.GRAFFITI)
-
-        incidents = list()
-        graffiti_list = list()
-        graffiti_dict = dict()
-        graffiti_incidents = list()
-        for row in input_df.itertuples(index=False):
-            incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                       completion_date=row.completion_date,
-                                       service_request_number=row.service_request_number,
-                                       type_of_service_request=row.type_of_service_request,
-                                       street_address=row.street_address, zip_code=row.zip_code,
-                                       zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
-                                       y_coordinate=row.y_coordinate, ward=row.ward,
-                                       wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
-                                       police_district=row.police_district, community_area=row.community_area,
-                                       community_areas=row.community_areas, ssa=row.ssa,
-                                       census_tracts=row.census_tracts, latitude=row.latitude,
-                                       longitude=row.longitude, location=row.location)
-            incidents.append(incident)
-
-            if any([row.surface, row.graffiti_location]):
-                graffiti = models.Graffiti(surface=row.surface, location=row.graffiti_location)
-                obj_str = f'{str(row.surface or "")}{str(row.graffiti_location or "")}'
-                graffiti_hash = hashlib.md5(obj_str.encode()).hexdigest()
-                if graffiti_hash not in graffiti_dict:
-                    graffiti_dict.update({graffiti_hash: graffiti})
-                    graffiti_list.append(graffiti)
-
-                graffiti_incident = models.GraffitiIncident(graffiti=graffiti_dict[graffiti_hash], incident=incident)
-                graffiti_incidents.append(graffiti_incident)
-
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-        models.Graffiti.objects.bulk_create(graffiti_list, batch_size=250000)
-
-        for graffiti_incident in graffiti_incidents:
-            graffiti_incident.incident_id = graffiti_incident.incident.id
-            graffiti_incident.graffiti_id = graffiti_incident.graffiti.id
-
-        models.GraffitiIncident.objects.bulk_create(graffiti_incidents, batch_size=250000)
+            models.GraffitiIncident.objects.bulk_create(graffiti_incidents, batch_size=250000)
 
     def import_rodent_baiting(self, input_file: str):
         """ Import the requests for rodent baiting incidents to the database
@@ -274,22 +580,83 @@ class Command(BaseCommand):
         """
         self.stdout.write("Getting requests for rodent baiting")
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'number_of_premises_baited', 'number_of_premises_w_garbage',
-                            'number_of_premises_w_rats', 'current_activity', 'most_recent_action', 'street_address',
-                            'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
-                            'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
-                            'community_areas', 'census_tracts', 'wards']
-
-        input_df = self.dataframe_normalization(input_df, models.Incident.RODENT_BAITING)
-
-        incidents = list()
-        rodent_baiting_premises = list()
-        activity_incidents = list()
-        with transaction.atomic():
-            for row in input_df.itertuples(index=False):
-                incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
+        input_dfs = self.read_input(input_file, RODENT_BAITING_COLUMNS, models.Incident.RODENT_BAITING)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs, [
+                DetailChild(model=models.RodentBaitingPremises,
+                            fields={'number_of_premises_baited': 'number_of_premises_baited',
+                                    'number_of_premises_w_garbage': 'number_of_premises_w_garbage',
+                                    'number_of_premises_w_rats': 'number_of_premises_w_rats'}),
+                LookupChild(**ACTIVITY_CHILD),
+            ])
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            rodent_baiting_premises = list()
+            activity_incidents = list()
+            self.resolve_activities(input_df)
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            with transaction.atomic():
+                for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                    incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
+                                               completion_date=row.completion_date,
+                                               service_request_number=row.service_request_number,
+                                               type_of_service_request=row.type_of_service_request,
+                                               street_address=row.street_address, zip_code=row.zip_code,
+                                               zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
+                                               y_coordinate=row.y_coordinate, ward=row.ward,
+                                               wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
+                                               police_district=row.police_district, community_area=row.community_area,
+                                               community_areas=row.community_areas, census_tracts=row.census_tracts,
+                                               latitude=row.latitude, longitude=row.longitude, location=row.location)
+                    incidents.append(incident)
+
+                    if any([row.number_of_premises_baited, row.number_of_premises_w_garbage,
+                            row.number_of_premises_w_rats]):
+                        rodent_baiting = models. \
+                            RodentBaitingPremises(number_of_premises_baited=row.number_of_premises_baited,
+                                                  number_of_premises_w_garbage=row.number_of_premises_w_garbage,
+                                                  number_of_premises_w_rats=row.number_of_premises_w_rats,
+                                                  incident_id=incident_id)
+                        rodent_baiting_premises.append(rodent_baiting)
+
+                    # Get the activity of the incident
+                    activity_id = self.import_activity(row)
+                    if activity_id:
+                        activity_incident = models.ActivityIncident(activity_id=activity_id, incident_id=incident_id)
+                        activity_incidents.append(activity_incident)
+
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
+
+            models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
+            models.RodentBaitingPremises.objects.bulk_create(rodent_baiting_premises, batch_size=250000)
+
+    def import_sanitation_complaints(self, input_file: str):
+        """ Import the requests for sanitation code complaints requests to tha database.
+
+        :param input_file: The file from which to load the requests for sanitation code violations.
+        """
+        self.stdout.write("Getting requests for sanitation code complaints")
+
+        input_dfs = self.read_input(input_file, SANITATION_CODE_COLUMNS, models.Incident.SANITATION_CODE)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs, [
+                LookupChild(lookup_model=models.SanitationCodeViolation,
+                            link_model=models.SanitationCodeViolationIncident, link_field='sanitation_code_violation',
+                            fields={'nature_of_code_violation': 'nature_of_code_violation'}),
+            ])
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            sanitation_code_incidents = list()
+            self.resolve_lookup(self.code_violations, input_df, ['nature_of_code_violation'])
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
                                            completion_date=row.completion_date,
                                            service_request_number=row.service_request_number,
                                            type_of_service_request=row.type_of_service_request,
@@ -302,87 +669,15 @@ class Command(BaseCommand):
                                            latitude=row.latitude, longitude=row.longitude, location=row.location)
                 incidents.append(incident)
 
-                if any([row.number_of_premises_baited, row.number_of_premises_w_garbage,
-                        row.number_of_premises_w_rats]):
-                    rodent_baiting = models. \
-                        RodentBaitingPremises(number_of_premises_baited=row.number_of_premises_baited,
-                                              number_of_premises_w_garbage=row.number_of_premises_w_garbage,
-                                              number_of_premises_w_rats=row.number_of_premises_w_rats,
-                                              incident=incident)
-                    rodent_baiting_premises.append(rodent_baiting)
+                code_violation_id = self.code_violations.get(LookupCache.make_key((row.nature_of_code_violation,)))
+                if code_violation_id:
+                    sanitation_code_incident = models.SanitationCodeViolationIncident(
+                        sanitation_code_violation_id=code_violation_id, incident_id=incident_id)
+                    sanitation_code_incidents.append(sanitation_code_incident)
 
-                # Get the activity of the incident
-                activity, _ = self.import_activity(row)
-                if activity:
-                    activity_incident = models.ActivityIncident(activity=activity, incident=incident)
-                    activity_incidents.append(activity_incident)
-
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-
-        for activity_incident in activity_incidents:
-            activity_incident.incident_id = activity_incident.incident.id
-            activity_incident.activity_id = activity_incident.activity.id
-        for premise in rodent_baiting_premises:
-            premise.incident_id = premise.incident.id
-
-        models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
-        models.RodentBaitingPremises.objects.bulk_create(rodent_baiting_premises, batch_size=250000)
-
-    def import_sanitation_complaints(self, input_file: str):
-        """ Import the requests for sanitation code complaints requests to tha database.
-
-        :param input_file: The file from which to load the requests for sanitation code violations.
-        """
-        self.stdout.write("Getting requests for sanitation code complaints")
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'nature_of_code_violation', 'street_address',
-                            'zip_code', 'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
-                            'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
-                            'community_areas', 'census_tracts', 'wards']
-
-        input_df = self.dataframe_normalization(input_df, models.Incident.SANITATION_CODE)
-
-        incidents = list()
-        code_violations = list()
-        code_violations_dict = dict()
-        sanitation_code_incidents = list()
-        for row in input_df.itertuples(index=False):
-            incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                       completion_date=row.completion_date,
-                                       service_request_number=row.service_request_number,
-                                       type_of_service_request=row.type_of_service_request,
-                                       street_address=row.street_address, zip_code=row.zip_code,
-                                       zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
-                                       y_coordinate=row.y_coordinate, ward=row.ward,
-                                       wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
-                                       police_district=row.police_district, community_area=row.community_area,
-                                       community_areas=row.community_areas, census_tracts=row.census_tracts,
-                                       latitude=row.latitude, longitude=row.longitude, location=row.location)
-            incidents.append(incident)
-
-            if row.nature_of_code_violation:
-                code_violation = models.SanitationCodeViolation(nature_of_code_violation=row.nature_of_code_violation)
-                obj_str = f'{str(row.nature_of_code_violation or "")}'
-                code_violation_hash = hashlib.md5(obj_str.encode()).hexdigest()
-                if code_violation_hash not in code_violations_dict:
-                    code_violations_dict.update({code_violation_hash: code_violation})
-                    code_violations.append(code_violation)
-
-                sanitation_code_incident = models. \
-                    SanitationCodeViolationIncident(sanitation_code_violation=code_violations_dict[code_violation_hash],
-                                                    incident=incident)
-                sanitation_code_incidents.append(sanitation_code_incident)
-
-        models.SanitationCodeViolation.objects.bulk_create(code_violations, batch_size=250000)
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-
-        for code_incident in sanitation_code_incidents:
-            code_incident.incident_id = code_incident.incident.id
-            code_incident.sanitation_code_violation_id = code_incident.sanitation_code_violation.id
-
-        models.SanitationCodeViolationIncident.objects.bulk_create(sanitation_code_incidents, batch_size=250000)
+            models.SanitationCodeViolationIncident.objects.bulk_create(sanitation_code_incidents, batch_size=250000)
 
     def import_tree_incidents(self, input_file: str, debris: bool):
         """ Import the requests that refer to tree incidents (debris & trims) to the database.
@@ -395,65 +690,58 @@ class Command(BaseCommand):
         else:
             self.stdout.write("Getting requests for tree trims")
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-
         if debris:
-            input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                                'type_of_service_request', 'tree_location', 'current_activity',
-                                'most_recent_action', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
-                                'ward', 'police_district', 'community_area', 'latitude', 'longitude',
-                                'location', 'historical_wards_03_15', 'zip_codes', 'community_areas',
-                                'census_tracts', 'wards']
-            input_df = self.dataframe_normalization(input_df, models.Incident.TREE_DEBRIS)
+            input_dfs = self.read_input(input_file, TREE_DEBRIS_COLUMNS, models.Incident.TREE_DEBRIS)
         else:
-            input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                                'type_of_service_request', 'tree_location', 'street_address', 'zip_code',
-                                'x_coordinate', 'y_coordinate', 'ward', 'police_district', 'community_area',
-                                'latitude', 'longitude', 'location', 'historical_wards_03_15', 'zip_codes',
-                                'community_areas', 'census_tracts', 'wards']
-            input_df = self.dataframe_normalization(input_df, models.Incident.TREE_TRIM)
-
-        incidents = list()
-        trees_incidents = list()
-        activity_incidents = list()
-        with transaction.atomic():
-            for row in input_df.itertuples(index=False):
-                incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                           completion_date=row.completion_date,
-                                           service_request_number=row.service_request_number,
-                                           type_of_service_request=row.type_of_service_request,
-                                           street_address=row.street_address, zip_code=row.zip_code,
-                                           zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
-                                           y_coordinate=row.y_coordinate, ward=row.ward,
-                                           wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
-                                           police_district=row.police_district, community_area=row.community_area,
-                                           community_areas=row.community_areas, census_tracts=row.census_tracts,
-                                           latitude=row.latitude, longitude=row.longitude, location=row.location)
-                incidents.append(incident)
-
-                if row.location:
-                    # In memory hashing with dataframe values can't be applied here because this importer runs more
-                    # than one times (tree debris & tree trims)
-                    tree, _ = models.Tree.objects.get_or_create(location=row.tree_location)
-                    tree_incident = models.TreeIncident(tree=tree, incident=incident)
-                    trees_incidents.append(tree_incident)
-
-                # Get the activity of the incident
-                activity, _ = self.import_activity(row)
-                if activity:
-                    activity_incident = models.ActivityIncident(activity=activity, incident=incident)
-                    activity_incidents.append(activity_incident)
-
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
-
-        for activity_incident in activity_incidents:
-            activity_incident.incident_id = activity_incident.incident.id
-            activity_incident.activity_id = activity_incident.activity.id
-        for tree_incident in trees_incidents:
-            tree_incident.incident_id = tree_incident.incident.id
-            tree_incident.tree_id = tree_incident.tree.id
-
-        models.TreeIncident.objects.bulk_create(trees_incidents, batch_size=250000)
+            input_dfs = self.read_input(input_file, TREE_TRIMS_COLUMNS, models.Incident.TREE_TRIM)
+
+        if self.engine == 'copy':
+            children = [LookupChild(lookup_model=models.Tree, link_model=models.TreeIncident, link_field='tree',
+                                    fields={'location': 'tree_location'})]
+            if debris:
+                children.append(LookupChild(**ACTIVITY_CHILD))
+            self.copy_incidents(input_dfs, children)
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+            trees_incidents = list()
+            activity_incidents = list()
+            self.resolve_lookup(self.trees, input_df, ['tree_location'])
+            self.resolve_activities(input_df)
+            incident_ids = CopyLoader.reserve_ids(models.Incident, len(input_df))
+            with transaction.atomic():
+                for incident_id, row in zip(incident_ids, iter_rows(input_df)):
+                    incident = models.Incident(id=incident_id, creation_date=row.creation_date, status=row.status,
+                                               completion_date=row.completion_date,
+                                               service_request_number=row.service_request_number,
+                                               type_of_service_request=row.type_of_service_request,
+                                               street_address=row.street_address, zip_code=row.zip_code,
+                                               zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
+                                               y_coordinate=row.y_coordinate, ward=row.ward,
+                                               wards=row.wards, historical_wards_03_15=row.historical_wards_03_15,
+                                               police_district=row.police_district, community_area=row.community_area,
+                                               community_areas=row.community_areas, census_tracts=row.census_tracts,
+                                               latitude=row.latitude, longitude=row.longitude, location=row.location)
+                    incidents.append(incident)
+
+                    if row.tree_location:
+                        # The trees are shared by tree debris & tree trims, so they are resolved from the database
+                        # (loaded once and bulk inserted per chunk)
+                        tree_id = self.trees.get(LookupCache.make_key((row.tree_location,)))
+                        tree_incident = models.TreeIncident(tree_id=tree_id, incident_id=incident_id)
+                        trees_incidents.append(tree_incident)
+
+                    # Get the activity of the incident
+                    activity_id = self.import_activity(row)
+                    if activity_id:
+                        activity_incident = models.ActivityIncident(activity_id=activity_id, incident_id=incident_id)
+                        activity_incidents.append(activity_incident)
+
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
+
+            models.ActivityIncident.objects.bulk_create(activity_incidents, batch_size=250000)
+            models.TreeIncident.objects.bulk_create(trees_incidents, batch_size=250000)
 
     def import_alley_lights_out_or_street_lights_all_out(self, input_file: str, street_lights: bool):
         """ Import the requests for alley lights out or street lights all out (works the same for both of them) to the
@@ -467,34 +755,33 @@ class Command(BaseCommand):
         else:
             self.stdout.write("Getting requests for alley lights out")
 
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
-                            'ward', 'police_district', 'community_area', 'latitude', 'longitude', 'location',
-                            'historical_wards_03_15', 'zip_codes', 'community_areas', 'census_tracts', 'wards']
-
         if street_lights:
-            input_df = self.dataframe_normalization(input_df, models.Incident.STREET_LIGHTS_ALL_OUT)
+            input_dfs = self.read_input(input_file, LIGHTS_OUT_COLUMNS, models.Incident.STREET_LIGHTS_ALL_OUT)
         else:
-            input_df = self.dataframe_normalization(input_df, models.Incident.ALLEY_LIGHTS_OUT)
-
-        incidents = list()
-
-        for row in input_df.itertuples(index=False):
-            incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                       completion_date=row.completion_date,
-                                       service_request_number=row.service_request_number,
-                                       type_of_service_request=row.type_of_service_request,
-                                       street_address=row.street_address, zip_code=row.zip_code,
-                                       zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
-                                       y_coordinate=row.y_coordinate, ward=row.ward, wards=row.wards,
-                                       historical_wards_03_15=row.historical_wards_03_15,
-                                       police_district=row.police_district, community_area=row.community_area,
-                                       community_areas=row.community_areas, census_tracts=row.census_tracts,
-                                       latitude=row.latitude, longitude=row.longitude, location=row.location)
-            incidents.append(incident)
-
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
+            input_dfs = self.read_input(input_file, LIGHTS_OUT_COLUMNS, models.Incident.ALLEY_LIGHTS_OUT)
+
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs)
+            return
+
+        for input_df in input_dfs:
+            incidents = list()
+
+            for row in iter_rows(input_df):
+                incident = models.Incident(creation_date=row.creation_date, status=row.status,
+                                           completion_date=row.completion_date,
+                                           service_request_number=row.service_request_number,
+                                           type_of_service_request=row.type_of_service_request,
+                                           street_address=row.street_address, zip_code=row.zip_code,
+                                           zip_codes=row.zip_codes, x_coordinate=row.x_coordinate,
+                                           y_coordinate=row.y_coordinate, ward=row.ward, wards=row.wards,
+                                           historical_wards_03_15=row.historical_wards_03_15,
+                                           police_district=row.police_district, community_area=row.community_area,
+                                           community_areas=row.community_areas, census_tracts=row.census_tracts,
+                                           latitude=row.latitude, longitude=row.longitude, location=row.location)
+                incidents.append(incident)
+
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
 
     def import_street_lights_one_out(self, input_file: str):
         """ Import the requests for street lights one out to the database.
@@ -502,84 +789,315 @@ class Command(BaseCommand):
         :param input_file: The file from which to load the requests for lights incidents.
         """
         self.stdout.write("Getting requests for street lights one out")
-        input_df = pd.read_csv(input_file, sep=',').replace({np.nan: None})
-        input_df.columns = ['creation_date', 'status', 'completion_date', 'service_request_number',
-                            'type_of_service_request', 'street_address', 'zip_code', 'x_coordinate', 'y_coordinate',
-                            'ward', 'police_district', 'community_area', 'latitude', 'longitude', 'location']
+        input_dfs = self.read_input(input_file, STREET_LIGHT_ONE_OUT_COLUMNS, models.Incident.STREET_LIGHT_ONE_OUT)
 
-        input_df = self.dataframe_normalization(input_df, models.Incident.STREET_LIGHT_ONE_OUT)
+        if self.engine == 'copy':
+            self.copy_incidents(input_dfs)
+            return
 
-        incidents = list()
+        for input_df in input_dfs:
+            incidents = list()
 
-        for row in input_df.itertuples(index=False):
-            incident = models.Incident(creation_date=row.creation_date, status=self.get_status_type(row.status),
-                                       completion_date=row.completion_date,
-                                       service_request_number=row.service_request_number,
-                                       type_of_service_request=row.type_of_service_request,
-                                       street_address=row.street_address, zip_code=row.zip_code,
-                                       x_coordinate=row.x_coordinate, y_coordinate=row.y_coordinate, ward=row.ward,
-                                       police_district=row.police_district, community_area=row.community_area,
-                                       latitude=row.latitude, longitude=row.longitude, location=row.location)
-            incidents.append(incident)
+            for row in iter_rows(input_df):
+                incident = models.Incident(creation_date=row.creation_date, status=row.status,
+                                           completion_date=row.completion_date,
+                                           service_request_number=row.service_request_number,
+                                           type_of_service_request=row.type_of_service_request,
+                                           street_address=row.street_address, zip_code=row.zip_code,
+                                           x_coordinate=row.x_coordinate, y_coordinate=row.y_coordinate, ward=row.ward,
+                                           police_district=row.police_district, community_area=row.community_area,
+                                           latitude=row.latitude, longitude=row.longitude, location=row.location)
+                incidents.append(incident)
 
-        models.Incident.objects.bulk_create(incidents, batch_size=250000)
+            models.Incident.objects.bulk_create(incidents, batch_size=250000)
 
-    @staticmethod
-    def import_activity(row: pd.DataFrame) -> tuple:
-        """ This method creates Activity objects in order to store them to the db
+    def read_input(self, input_file: str, columns: typing.List[str],
+                   request_type: str) -> typing.Iterator[pd.DataFrame]:
+        """ Read a CSV (or its columnar conversion) and yield it normalized. When a chunk size is specified the CSV is
+        yielded in chunks of that size, otherwise it is yielded at once.
 
-        :param row: The row we read from the csv
-        :return: The Activity object
+        :param input_file: The CSV file, or its Parquet/Feather conversion.
+        :param columns: The names of the columns of the CSV.
+        :param request_type: The type of the incidents.
+        :return: The normalized dataframes.
         """
-        try:
-            current_activity = row.current_activity
-        except AttributeError:
-            current_activity = None
-        try:
-            most_recent_action = row.most_recent_action
-        except AttributeError:
-            most_recent_action = None
-        if any([current_activity, most_recent_action]):
-            # Naively just get or create the activity
-            return models.Activity.objects.get_or_create(current_activity=current_activity,
-                                                         most_recent_action=most_recent_action)
+        if not self.chunk_size:
+            for input_df in self.metrics.timed('read', read_frames(input_file, columns)):
+                with self.metrics.phase('normalize'):
+                    input_df = self.dataframe_normalization(input_df, request_type)
+                    self.track_creation_dates(input_df['creation_date'])
+                    if self.incremental:
+                        input_df = self.apply_incremental(input_df, request_type)
+                self.create_partitions(input_df['creation_date'])
+                self.imported += len(input_df)
+                yield input_df
+            return
+
+        checkpoint = self.get_checkpoint(input_file)
+        if checkpoint.completed:
+            self.stdout.write(f"File {input_file} is already imported, skipping")
+            return
+
+        # The duplicate rows are detected over the whole CSV beforehand, so that they are removed across the chunks,
+        # and the partitions of its months are created before the chunks are written in their transactions
+        with self.metrics.phase('read'):
+            duplicates, creation_dates = self.find_duplicates(input_file, columns, self.chunk_size)
+        self.create_partitions(creation_dates)
+        offset = 0
+        for input_df in self.metrics.timed('read', read_frames(input_file, columns, chunk_size=self.chunk_size)):
+            chunk_start = offset
+            offset += len(input_df)
+            if chunk_start < checkpoint.rows:
+                # The committed rows are rolled up again with the rest of the file
+                self.track_creation_dates(pd.to_datetime(input_df['creation_date']).dt.tz_localize('UTC'))
+            if offset <= checkpoint.rows:
+                # The chunk is committed already
+                continue
+
+            start = time.time()
+            mask = ~duplicates[chunk_start:offset]
+            # The rows of the chunk before the checkpoint are committed already
+            mask[:max(checkpoint.rows - chunk_start, 0)] = False
+            input_df = input_df[mask]
+
+            # Each chunk is committed together with its checkpoint, the consumer writes the chunk during the yield
+            with transaction.atomic(), connection.execute_wrapper(self.counter):
+                if not input_df.empty:
+                    with self.metrics.phase('normalize'):
+                        input_df = self.dataframe_normalization(input_df, request_type)
+                        self.track_creation_dates(input_df['creation_date'])
+                        if self.incremental:
+                            input_df = self.apply_incremental(input_df, request_type)
+                    self.imported += len(input_df)
+                prepared = time.time()
+                if not input_df.empty:
+                    yield input_df
+                written = time.time()
+                self.save_checkpoint(checkpoint, offset)
+
+            self.stdout.write(f"Committed rows {chunk_start}-{offset} of {input_file}: {len(input_df)} incidents, "
+                              f"read & normalized in {(prepared - start):.2f} seconds, written in "
+                              f"{(written - prepared):.2f} seconds "
+                              f"({(len(input_df) / max(time.time() - start, 1e-9)):.0f} rows/sec)")
+
+        checkpoint.completed = True
+        checkpoint.save()
+
+    def get_checkpoint(self, input_file: str) -> models.ImportCheckpoint:
+        """ Get the checkpoint of a CSV, identified by the hash of its contents. Unless the import is resumed, the
+        checkpoint starts from the beginning of the CSV.
+
+        :param input_file: The CSV file.
+        :return: The checkpoint.
+        """
+        checkpoint, created = models.ImportCheckpoint.objects.get_or_create(file_hash=hash_file(input_file),
+                                                                            defaults={'file_name': input_file})
+        if created:
+            return checkpoint
+
+        if self.resume:
+            if checkpoint.rows and not checkpoint.completed:
+                self.stdout.write(f"Resuming {input_file} from row {checkpoint.rows}")
         else:
-            return None, None
+            checkpoint.rows = 0
+            checkpoint.counts = {}
+            checkpoint.completed = False
+        checkpoint.file_name = input_file
+        checkpoint.save()
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: models.ImportCheckpoint, rows: int):
+        """ Record that the rows of a CSV up to an offset are committed, along with the records that were written to
+        each table.
+
+        :param checkpoint: The checkpoint of the CSV.
+        :param rows: The number of rows of the CSV that are committed.
+        """
+        counts = checkpoint.counts
+        for table, count in self.counter.pop().items():
+            counts[table] = counts.get(table, 0) + count
+        checkpoint.rows = rows
+        checkpoint.counts = counts
+        checkpoint.save()
+
+    def track_creation_dates(self, creation_dates: pd.Series):
+        """ Extend the range of the creation dates of the imported file with the creation dates of a dataframe.
+
+        :param creation_dates: The creation dates.
+        """
+        creation_dates = creation_dates.dropna()
+        if creation_dates.empty:
+            return
+        start, end = creation_dates.min().to_pydatetime(), creation_dates.max().to_pydatetime()
+        if self.rollup_range:
+            start, end = min(start, self.rollup_range[0]), max(end, self.rollup_range[1])
+        self.rollup_range = [start, end]
+
+    def create_partitions(self, creation_dates: pd.Series):
+        """ Create the missing partitions of the months of the creation dates of a file, before its incidents are
+        written. Creating a partition locks the incidents, so it is kept out of the transactions that write the
+        incidents, which would hold the locks until they are committed (and serialize the workers).
+
+        :param creation_dates: The creation dates.
+        """
+        creation_dates = creation_dates.dropna()
+        if not self.partitioned or creation_dates.empty:
+            return
+        partitions.ensure_partitions(creation_dates.min().to_pydatetime(), creation_dates.max().to_pydatetime())
 
     @staticmethod
-    def dataframe_normalization(df: pd.DataFrame, request_type: str) -> pd.DataFrame:
-        """ Normalizes a given dataframe to a desired condition (removes duplicate rows, convert times to timezone
-        aware etc.)
+    def find_duplicates(input_file: str, columns: typing.List[str],
+                        chunk_size: int) -> typing.Tuple[np.ndarray, pd.Series]:
+        """ Find the rows of a CSV that are duplicated by a later row, as `dataframe_normalization` does, and the range
+        of its creation dates at the same pass. Only the columns that identify the duplicates are read (in chunks) and
+        each row is kept as a 64-bit hash.
+
+        :param input_file: The CSV file.
+        :param columns: The names of the columns of the CSV.
+        :param chunk_size: The number of rows to read at once.
+        :return: A boolean array that marks the duplicate rows, and the earliest and the latest creation dates of each
+        chunk (in UTC).
+        """
+        hashes = []
+        creation_dates = []
+        for chunk in read_frames(input_file, columns, chunk_size=chunk_size, usecols=DUPLICATE_SUBSET, dtype=str):
+            hashes.append(pd.util.hash_pandas_object(chunk, index=False).values)
+            chunk_dates = pd.to_datetime(chunk['creation_date'])
+            creation_dates.extend([chunk_dates.min(), chunk_dates.max()])
+        creation_dates = pd.Series(pd.to_datetime(creation_dates), dtype='datetime64[ns]').dt.tz_localize('UTC')
+        if not hashes:
+            return np.zeros(0, dtype=bool), creation_dates
+        return pd.Series(np.concatenate(hashes)).duplicated(keep='last').values, creation_dates
+
+    def apply_incremental(self, input_df: pd.DataFrame, request_type: str) -> pd.DataFrame:
+        """ Compare the rows of a normalized dataframe with the incidents that are already stored, by their service
+        request number. The incidents whose fingerprint (status & completion date) changed are updated in place and
+        only the new rows are returned, in order to be inserted.
+
+        :param input_df: The normalized dataframe.
+        :param request_type: The type of the incidents.
+        :return: The rows of the dataframe that are not stored yet.
+        """
+        input_df = input_df.drop_duplicates(INCREMENTAL_KEY, keep='last')
+        existing = self.find_existing_incidents(input_df[INCREMENTAL_KEY].tolist(), request_type)
 
-        :param df: A pandas dataframe
-        :param request_type: The type of the incident
-        :return:  The normalized dataframe
+        ids = input_df[INCREMENTAL_KEY].map(existing['id'])
+        new = ids.isna()
+        stored = input_df[INCREMENTAL_KEY].map(self.fingerprint(existing[INCREMENTAL_FIELDS]))
+        changed = ~new & (self.fingerprint(input_df[INCREMENTAL_FIELDS]) != stored)
+
+        if changed.any():
+            now = timezone.now()
+            incidents = [models.Incident(id=incident_id, status=row.status, completion_date=row.completion_date,
+                                         updated_at=now)
+                         for incident_id, row in zip(ids[changed].astype(int), iter_rows(input_df[changed]))]
+            models.Incident.objects.bulk_update(incidents, INCREMENTAL_FIELDS + ['updated_at'], batch_size=10000)
+            self.updated += len(incidents)
+
+        return input_df[new]
+
+    @staticmethod
+    def find_existing_incidents(service_request_numbers: typing.List[str], request_type: str,
+                                batch_size: int = 10000) -> pd.DataFrame:
+        """ Get the stored incidents of a type that have the given service request numbers. When a request number
+        matches more than one incident, the latest one is kept.
+
+        :param service_request_numbers: The service request numbers.
+        :param request_type: The type of the incidents.
+        :param batch_size: The number of request numbers that are queried at once.
+        :return: The `id` and the incremental fields of the incidents indexed by their service request number.
         """
-        df = df.copy(deep=True)
+        records = []
+        for start in range(0, len(service_request_numbers), batch_size):
+            records.extend(models.Incident.objects
+                           .filter(type_of_service_request=request_type,
+                                   service_request_number__in=service_request_numbers[start:start + batch_size])
+                           .values_list('id', INCREMENTAL_KEY, *INCREMENTAL_FIELDS))
+        existing = pd.DataFrame.from_records(records, columns=['id', INCREMENTAL_KEY] + INCREMENTAL_FIELDS)
+        existing = existing.sort_values('id').drop_duplicates(INCREMENTAL_KEY, keep='last')
+        # The same types as the normalized dataframes, so that the fingerprints are comparable
+        existing['status'] = existing['status'].astype(STATUS_DTYPE)
+        existing['completion_date'] = pd.to_datetime(existing['completion_date'], utc=True)
+        return existing.set_index(INCREMENTAL_KEY)
 
-        df = df.drop_duplicates(['creation_date', 'status', 'completion_date', 'service_request_number',
-                                 'type_of_service_request', 'street_address', 'zip_code'], keep='last')
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> pd.Series:
+        """ Compute a 64-bit hash of each row of a dataframe.
 
-        # Normalize type_of_service_request with the given
-        df['type_of_service_request'] = df['type_of_service_request'].str.replace(r'.+', request_type)
+        :param df: The dataframe.
+        :return: The hashes, with the index of the dataframe.
+        """
+        return pd.util.hash_pandas_object(df, index=False)
 
-        # Add UTC timezone to datetime fields
-        df['creation_date'] = pd.to_datetime(df['creation_date'], errors='ignore')
-        df['creation_date'] = df['creation_date'].dt.tz_localize("UTC")
-        df['creation_date'] = df['creation_date'].astype(object).where(df['creation_date'].notnull(), None)
-        df['completion_date'] = pd.to_datetime(df['completion_date'], errors='ignore')
-        df['completion_date'] = df['completion_date'].dt.tz_localize("UTC")
-        df['completion_date'] = df['completion_date'].astype(object).where(df['completion_date'].notnull(), None)
+    def copy_incidents(self, input_dfs: typing.Iterable[pd.DataFrame], children: list = ()):
+        """ Write the incidents of normalized dataframes and their payloads with the COPY engine.
 
-        return df
+        :param input_dfs: The normalized dataframes.
+        :param children: The payloads of the incidents (`LookupChild` or `DetailChild`).
+        """
+        loader = CopyLoader(chunk_size=self.copy_chunk_size, counter=self.counter, metrics=self.metrics)
+        count = 0
+        # The chunked imports commit each chunk separately (see `read_input`), otherwise the file is read at once and
+        # written in one transaction, which starts after the file is read (and its partitions are created)
+        for input_df in input_dfs:
+            with transaction.atomic() if not self.chunk_size else contextlib.nullcontext():
+                count += loader.load(input_df, children)
+        self.stdout.write(f"Copied {count} incidents")
+
+    def resolve_activities(self, input_df: pd.DataFrame):
+        """ Create the activities of a normalized dataframe that do not exist yet, with one bulk insert.
+
+        :param input_df: The normalized dataframe.
+        """
+        if 'current_activity' not in input_df.columns:
+            return
+        self.resolve_lookup(self.activities, input_df, ['current_activity', 'most_recent_action'])
 
     @staticmethod
-    def get_status_type(value: str) -> str:
+    def resolve_lookup(cache: LookupCache, input_df: pd.DataFrame, columns: typing.List[str]):
+        """ Create the lookup records of a normalized dataframe that do not exist yet, with one bulk insert.
+
+        :param cache: The lookup table.
+        :param input_df: The normalized dataframe.
+        :param columns: The columns of the dataframe that fill the fields of the lookup records.
+        """
+        values = iter_rows(input_df[columns], name=None)
+        cache.resolve(LookupCache.make_key(value) for value in values)
+
+    def import_activity(self, row: tuple) -> typing.Optional[int]:
+        """ Get the activity of a row from the activities that are resolved in memory
+
+        :param row: The row we read from the csv
+        :return: The id of the activity or `None` if the row has no activity
         """
+        return self.activities.get(LookupCache.make_key((getattr(row, 'current_activity', None),
+                                                         getattr(row, 'most_recent_action', None))))
 
-        :param value:
-        :return:
+    @staticmethod
+    def dataframe_normalization(df: pd.DataFrame, request_type: str) -> pd.DataFrame:
+        """ Normalizes a given dataframe to a desired condition (removes duplicate rows, maps the statuses, convert
+        times to timezone aware etc.). All the steps are vectorized and the columns are kept typed, the missing values
+        are converted to `None` only when the rows are written (see `iter_rows`).
+
+        :param df: A pandas dataframe
+        :param request_type: The type of the incident
+        :return:  The normalized dataframe
         """
-        for x in models.Incident.STATUS_TYPE_CHOICES:
-            if x[1] == value:
-                return x[0]
+        df = df.drop_duplicates(DUPLICATE_SUBSET, keep='last')
+
+        columns = {
+            # Map the statuses with a categorical lookup
+            'status': df['status'].map(STATUS_TYPES).astype(STATUS_DTYPE),
+            # Normalize type_of_service_request with the given
+            'type_of_service_request': request_type,
+            # Add UTC timezone to datetime fields
+            'creation_date': pd.to_datetime(df['creation_date']).dt.tz_localize('UTC'),
+            'completion_date': pd.to_datetime(df['completion_date']).dt.tz_localize('UTC'),
+        }
+        for column in df.columns.intersection(INTEGER_COLUMNS):
+            # Integer fields truncate the values, as `int()` does
+            columns[column] = np.trunc(pd.to_numeric(df[column], errors='coerce')).astype('Int64')
+        for column in df.columns.intersection(FLOAT_COLUMNS):
+            columns[column] = pd.to_numeric(df[column], errors='coerce').astype('Float64')
+
+        return df.assign(**columns)
@@ -0,0 +1,72 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from chicago_incidents import caching, models, partitions
+
+
+def parse_month(value: str) -> datetime.date:
+    """Parse a month of the command line.
+
+    :param value: The month, as `YYYY-MM`.
+    :return: The first day of the month.
+    """
+    return datetime.datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    """Command to create the partitions of the next months of the incidents and to detach the partitions of the old
+    months
+    """
+    help = 'Create the monthly partitions of the incidents of the current and of the next months (moving their ' \
+           'incidents out of the default partition), and detach the partitions of the months before a month. The ' \
+           'detached partitions are kept as tables, renamed with the `_detached` suffix, and the materialized views are ' \
+           'refreshed without their incidents. After the incidents are partitioned, `--split-default` moves the ' \
+           'stored incidents out of the default partition, a month per transaction.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='The number of the months after the current one whose partitions are created')
+        parser.add_argument('--detach-before', type=parse_month,
+                            help='Detach the partitions of the months before this month (YYYY-MM)')
+        parser.add_argument('--split-default', action='store_true',
+                            help='Create the partitions of all the months of the incidents that are kept by the '
+                                 'default partition (e.g. the incidents that were stored before the incidents were '
+                                 'partitioned). Each month is moved in its own transaction, which locks the default '
+                                 'partition while it is scanned')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        if not partitions.is_partitioned():
+            raise CommandError('The incidents are not partitioned, apply the migrations first')
+        if options['ahead'] < 0:
+            raise CommandError('The number of the months ahead cannot be negative')
+
+        months = [partitions.month_start(timezone.now())]
+        for _ in range(options['ahead']):
+            months.append(partitions.next_month(months[-1]))
+        if options['split_default']:
+            months = sorted(set(partitions.default_months() + months))
+        created = [month for month in months if partitions.create_partition(month)]
+        for month in created:
+            self.stdout.write(f'Created the partition {partitions.partition_name(month)}')
+
+        detached = []
+        if options['detach_before']:
+            detached = [month for month in partitions.list_partitions() if month < options['detach_before']]
+            for month in detached:
+                partitions.detach_partition(month)
+                self.stdout.write(f'Detached the partition {partitions.partition_name(month)}')
+        if detached:
+            # The materialized views (which join the incidents) and the cached responses of the queries are computed
+            # again without the detached incidents
+            models.refresh_materialized_views()
+            caching.bump_data_version()
+        self.stdout.write(f'Created {len(created)} and detached {len(detached)} partitions, '
+                          f'{len(partitions.list_partitions())} partitions are attached')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from chicago_incidents.importers import DeferredIndexes
+
+
+class Command(BaseCommand):
+    """Command to rebuild the indexes that an interrupted fast load left dropped
+    """
+    help = 'Rebuild the indexes that were dropped by an interrupted `import_incidents_from_csvs --fast-load` (e.g. ' \
+           'killed or disconnected before the indexes were rebuilt), from the statements that the load persisted ' \
+           'before dropping them. The indexes that exist already are skipped.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--index-workers', type=int, default=4,
+                            help='The number of indexes that are rebuilt at the same time')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        start = time.time()
+        count = DeferredIndexes.restore(options['index_workers'])
+        self.stdout.write(f"Rebuilt {count} indexes, took {(time.time() - start):.2f} seconds")
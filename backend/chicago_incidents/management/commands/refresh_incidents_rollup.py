@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chicago_incidents import caching
+from chicago_incidents.models import IncidentDailyRollup
+
+
+class Command(BaseCommand):
+    """Command to rebuild the daily rollup of the incidents
+    """
+    help = 'Rebuild the daily rollup of the incidents, e.g. after the incidents are changed outside of the importer ' \
+           'and the API (fixtures, manual changes)'
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        start = time.time()
+        IncidentDailyRollup.refresh()
+        caching.bump_data_version()
+        self.stdout.write(f"Rebuilt the daily rollup of {IncidentDailyRollup.objects.count()} rows, "
+                          f"took {(time.time() - start):.2f} seconds")
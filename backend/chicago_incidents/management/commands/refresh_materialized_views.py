@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from chicago_incidents import caching
+from chicago_incidents.models import MATERIALIZED_VIEWS
+
+
+class Command(BaseCommand):
+    """Command to refresh the materialized views of the queries endpoints
+    """
+    help = 'Refresh the materialized views of the queries endpoints (license plates, vehicle colors), e.g. on a ' \
+           'schedule or after the incidents are changed outside of the importer. The views are refreshed ' \
+           'concurrently, so the endpoints keep reading the previous results during the refresh.'
+
+    def add_arguments(self, parser: CommandParser):
+        """Add the command arguments.
+
+        :param parser: The argument parser.
+        """
+        parser.add_argument('--blocking', action='store_true',
+                            help='Refresh the views with a lock that blocks their queries, which is faster than the '
+                                 'concurrent refresh')
+
+    def handle(self, *args, **options):
+        """Implement the logic of the command.
+        """
+        for view in MATERIALIZED_VIEWS:
+            start = time.time()
+            view.refresh(concurrently=not options['blocking'])
+            self.stdout.write(f"Refreshed {view._meta.db_table} with {view.objects.count()} rows, "
+                              f"took {(time.time() - start):.2f} seconds")
+        caching.bump_data_version()
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.3 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0002_auto_20201201_1657'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['service_request_number', 'type_of_service_request'],
+                               name='incidents_service_dc8e9e_idx'),
+        ),
+    ]
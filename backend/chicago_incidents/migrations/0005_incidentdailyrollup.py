@@ -0,0 +1,46 @@
+# Generated by Django 3.1.3 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0004_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentDailyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creation_date', models.DateTimeField()),
+                ('type_of_service_request', models.CharField(choices=[('ABANDONED_VEHICLE', 'Abandoned Vehicle Complaint'), ('ALLEY_LIGHTS_OUT', 'Alley Lights Out'), ('GARBAGE_CART', 'Garbage Cart Black Maintenance/Replacement'), ('GRAFFITI', 'Graffiti Removal'), ('POT_HOLE', 'Pothole in Street'), ('RODENT_BAITING', 'Rodent Baiting/Rat Complaint'), ('SANITATION_CODE', 'Sanitation Code Violation'), ('STREET_LIGHTS_ALL_OUT', 'Street Lights - All/Out'), ('STREET_LIGHT_ONE_OUT', 'Street Light Out'), ('TREE_DEBRIS', 'Tree Debris'), ('TREE_TRIM', 'Tree Trim')], max_length=30)),
+                ('zip_code', models.IntegerField(blank=True, null=True)),
+                ('ssa', models.IntegerField(blank=True, null=True)),
+                ('police_district', models.IntegerField(blank=True, null=True)),
+                ('ward', models.IntegerField(blank=True, null=True)),
+                ('community_area', models.IntegerField(blank=True, null=True)),
+                ('number_of_requests', models.PositiveIntegerField()),
+                ('number_of_completed', models.PositiveIntegerField()),
+                ('completion_time', models.DurationField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'incidents_daily_rollup',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='incidentdailyrollup',
+            index=models.Index(fields=['creation_date', 'type_of_service_request'], name='incidents_d_creatio_ea3c1a_idx'),
+        ),
+        # Roll up the incidents that are already stored
+        migrations.RunSQL(
+            sql='INSERT INTO incidents_daily_rollup (creation_date, type_of_service_request, zip_code, ssa, '
+                'police_district, ward, community_area, number_of_requests, number_of_completed, completion_time) '
+                'SELECT creation_date, type_of_service_request, zip_code, ssa, police_district, ward, community_area, '
+                'COUNT(*), COUNT(completion_date), SUM(completion_date - creation_date) FROM incidents '
+                'GROUP BY creation_date, type_of_service_request, zip_code, ssa, police_district, ward, '
+                'community_area',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
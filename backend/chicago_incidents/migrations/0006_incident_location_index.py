@@ -0,0 +1,19 @@
+# Generated by Django 3.1.3 on 2026-10-18 16:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0005_incidentdailyrollup'),
+    ]
+
+    operations = [
+        # The points of the coordinates are indexed together, so that the bounding box queries search both coordinates
+        # with one index (Django 3.1 cannot declare expression indexes in the Meta of the models)
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_location_gist ON incidents USING gist (point(longitude, latitude))',
+            reverse_sql='DROP INDEX incidents_location_gist',
+        ),
+    ]
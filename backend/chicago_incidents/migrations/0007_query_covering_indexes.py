@@ -0,0 +1,59 @@
+# Generated by Django 3.1.3 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0006_incident_location_index'),
+    ]
+
+    operations = [
+        # The covering indexes of the queries endpoints hold every column that the queries read, so that they are
+        # answered by index only scans (Django 3.1 cannot declare the INCLUDE columns in the Meta of the models)
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_completion_type_covering_idx ON incidents '
+                '(completion_date, type_of_service_request) INCLUDE (id, police_district)',
+            reverse_sql='DROP INDEX incidents_completion_type_covering_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX rodent_baiting_premises_incident_covering_idx ON rodent_baiting_premises '
+                '(incident_id) INCLUDE (number_of_premises_baited)',
+            reverse_sql='DROP INDEX rodent_baiting_premises_incident_covering_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX number_of_carts_and_potholes_incident_covering_idx ON number_of_carts_and_potholes '
+                '(incident_id) INCLUDE (number_of_elements)',
+            reverse_sql='DROP INDEX number_of_carts_and_potholes_incident_covering_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_daily_rollup_creation_type_idx ON incidents_daily_rollup '
+                '(creation_date, type_of_service_request) '
+                'INCLUDE (number_of_requests, number_of_completed, completion_time)',
+            reverse_sql='DROP INDEX incidents_daily_rollup_creation_type_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_daily_rollup_type_creation_idx ON incidents_daily_rollup '
+                '(type_of_service_request, creation_date) INCLUDE (number_of_requests)',
+            reverse_sql='DROP INDEX incidents_daily_rollup_type_creation_idx',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_daily_rollup_ssa_creation_idx ON incidents_daily_rollup '
+                '(creation_date) INCLUDE (ssa, number_of_requests) WHERE ssa IS NOT NULL',
+            reverse_sql='DROP INDEX incidents_daily_rollup_ssa_creation_idx',
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(condition=models.Q(zip_code__isnull=False), fields=['creation_date', 'zip_code', 'type_of_service_request'], name='incidents_creation_zip_idx'),
+        ),
+        # The indexes that the covering indexes start with
+        migrations.RemoveIndex(
+            model_name='incident',
+            name='incidents_complet_b8f19e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='incidentdailyrollup',
+            name='incidents_d_creatio_ea3c1a_idx',
+        ),
+    ]
@@ -0,0 +1,168 @@
+# Generated by Django 3.1.3 on 2026-10-18 18:05
+
+import typing
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The incidents are partitioned by the month of their creation date. The stored incidents are not copied: their table
+# becomes the default partition as it is, and they are moved to the partitions of their months afterwards, a month per
+# transaction, by `manage_incident_partitions --split-default`. The new months get their partitions by the importer and
+# by the same command
+DEFAULT_PARTITION = 'incidents_default'
+# The suffix of the names of the indexes and of the constraints of the table of the stored incidents, whose names are
+# taken by the ones of the partitioned table
+DEFAULT_SUFFIX = '_default'
+
+
+def incident_foreign_keys(apps):
+    """Find the foreign keys of the models that point to the incidents.
+
+    :param apps: The models of the migration.
+    :return: The tables and the columns of the foreign keys.
+    """
+    return [(model._meta.db_table, field.column) for model in apps.get_models() for field in model._meta.local_fields
+            if field.remote_field and field.related_model._meta.db_table == 'incidents']
+
+
+def table_definition(cursor) -> typing.Tuple[typing.List[typing.Tuple[str, str]], typing.List[tuple], str]:
+    """Find the indexes, the constraints and the sequence of the ids of the incidents.
+
+    :param cursor: The cursor of the connection.
+    :return: The names and the statements of the indexes that are not constraints, the names, the types and the
+    definitions of the primary key and of the unique constraints, and the sequence.
+    """
+    cursor.execute("SELECT index_class.relname, pg_get_indexdef(indexrelid) FROM pg_index "
+                   "JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+                   "WHERE indrelid = 'incidents'::regclass "
+                   "AND indexrelid NOT IN (SELECT conindid FROM pg_constraint WHERE conrelid = 'incidents'::regclass)")
+    indexes = [(name, definition.replace(' ON ONLY ', ' ON ', 1)) for name, definition in cursor.fetchall()]
+    cursor.execute("SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                   "WHERE conrelid = 'incidents'::regclass AND contype IN ('p', 'u')")
+    constraints = cursor.fetchall()
+    cursor.execute("SELECT pg_get_serial_sequence('incidents', 'id')")
+    return indexes, constraints, cursor.fetchone()[0]
+
+
+def partition_incidents(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        # The foreign keys cannot point to the id of a partitioned table, which is unique only with the creation date,
+        # so the deletions of the incidents are cascaded to their payloads by Django, and the rows of the payloads
+        # whose incident is deleted otherwise are found by the `check_incident_relations` command
+        cursor.execute("SELECT conrelid::regclass, conname FROM pg_constraint "
+                       "WHERE confrelid = 'incidents'::regclass AND contype = 'f'")
+        for table, name in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+
+        indexes, constraints, sequence = table_definition(cursor)
+        cursor.execute(f'ALTER TABLE incidents RENAME TO {DEFAULT_PARTITION}')
+        # The names of the indexes and of the unique constraints are freed for the partitioned table, whose ones are
+        # attached to them instead of being built again. The primary key changes, so it is built again
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX {name} RENAME TO {name[:63 - len(DEFAULT_SUFFIX)]}{DEFAULT_SUFFIX}')
+        for name, constraint_type, _ in constraints:
+            if constraint_type == 'p':
+                cursor.execute(f'ALTER TABLE {DEFAULT_PARTITION} DROP CONSTRAINT {name}')
+            else:
+                cursor.execute(f'ALTER TABLE {DEFAULT_PARTITION} RENAME CONSTRAINT {name} '
+                               f'TO {name[:63 - len(DEFAULT_SUFFIX)]}{DEFAULT_SUFFIX}')
+
+        cursor.execute(f'CREATE TABLE incidents (LIKE {DEFAULT_PARTITION} INCLUDING DEFAULTS INCLUDING STORAGE) '
+                       f'PARTITION BY RANGE (creation_date)')
+        # Without other partitions, the default partition is attached without scanning its rows
+        cursor.execute(f'ALTER TABLE incidents ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY incidents.id')
+        for name, constraint_type, definition in constraints:
+            if constraint_type == 'p':
+                # The unique constraints of a partitioned table include the partition key
+                definition = 'PRIMARY KEY (id, creation_date)'
+            cursor.execute(f'ALTER TABLE incidents ADD CONSTRAINT {name} {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+
+def unpartition_incidents(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        # The incidents of all the partitions are copied to a new table, with the incidents locked until the migration
+        # is committed. The detached partitions are left as they are
+        indexes, constraints, sequence = table_definition(cursor)
+        cursor.execute('ALTER TABLE incidents RENAME TO incidents_previous')
+        cursor.execute('CREATE TABLE incidents (LIKE incidents_previous INCLUDING DEFAULTS INCLUDING STORAGE)')
+        cursor.execute('INSERT INTO incidents SELECT * FROM incidents_previous')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY incidents.id')
+        cursor.execute('DROP TABLE incidents_previous')
+
+        for name, constraint_type, definition in constraints:
+            if constraint_type == 'p':
+                definition = 'PRIMARY KEY (id)'
+            cursor.execute(f'ALTER TABLE incidents ADD CONSTRAINT {name} {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for table, column in incident_foreign_keys(apps):
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fk_incidents_id '
+                           f'FOREIGN KEY ({column}) REFERENCES incidents (id) DEFERRABLE INITIALLY DEFERRED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0007_query_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_incidents, unpartition_incidents),
+        # The foreign keys of the database are dropped by the partitioning above
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='abandonedvehicleincident',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='abandoned_vehicles_incidents',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='activityincident',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='activities_incidents',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='graffitiincident',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='graffiti_incidents',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='numberofcartsandpotholes',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='number_of_carts_and_potholes',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='rodentbaitingpremises',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='rodent_baiting_premises',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='sanitationcodeviolationincident',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='sanitation_code_violations_incidents',
+                                            to='chicago_incidents.incident'),
+                ),
+                migrations.AlterField(
+                    model_name='treeincident',
+                    name='incident',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='tree_incidents',
+                                            to='chicago_incidents.incident'),
+                ),
+            ],
+        ),
+    ]
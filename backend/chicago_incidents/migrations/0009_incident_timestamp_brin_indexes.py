@@ -0,0 +1,42 @@
+# Generated by Django 3.1.3 on 2026-10-18 19:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0008_partition_incidents'),
+    ]
+
+    operations = [
+        # The indexes of the timestamp columns are chosen by the fast loads of the importer, so they are not declared in
+        # the Meta of the model. The B-tree of the creation dates is kept, with the name that the importer knows
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='incident',
+                    name='incidents_creatio_c7a7cb_idx',
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='ALTER INDEX incidents_creatio_c7a7cb_idx RENAME TO incidents_creation_date_btree',
+                    # A fast load may have replaced the B-tree by the BRIN index, so the index of the model is
+                    # created again if it was not renamed
+                    reverse_sql=[
+                        'ALTER INDEX IF EXISTS incidents_creation_date_btree RENAME TO incidents_creatio_c7a7cb_idx',
+                        'CREATE INDEX IF NOT EXISTS incidents_creatio_c7a7cb_idx ON incidents (creation_date)',
+                    ],
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_creation_date_brin ON incidents USING brin (creation_date)',
+            reverse_sql='DROP INDEX IF EXISTS incidents_creation_date_brin',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX incidents_completion_date_brin ON incidents USING brin (completion_date)',
+            reverse_sql='DROP INDEX IF EXISTS incidents_completion_date_brin',
+        ),
+    ]
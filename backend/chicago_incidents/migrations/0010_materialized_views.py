@@ -0,0 +1,58 @@
+# Generated by Django 3.1.3 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0009_incident_timestamp_brin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicensePlateRequests',
+            fields=[
+                ('license_plate', models.CharField(max_length=400, primary_key=True, serialize=False)),
+                ('number_of_requests', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'license_plate_requests',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VehicleColorCount',
+            fields=[
+                ('vehicle_color', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('color_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'vehicle_color_counts',
+                'managed': False,
+            },
+        ),
+        # The views have unique indexes, so that they can be refreshed concurrently
+        migrations.RunSQL(
+            sql=['CREATE MATERIALIZED VIEW license_plate_requests AS '
+                 'SELECT abandoned_vehicles.license_plate, '
+                 'COUNT(DISTINCT incidents.street_address) AS number_of_requests '
+                 'FROM abandoned_vehicles '
+                 'LEFT OUTER JOIN abandoned_vehicles_incidents '
+                 'ON (abandoned_vehicles.id = abandoned_vehicles_incidents.abandoned_vehicle_id) '
+                 'LEFT OUTER JOIN incidents ON (abandoned_vehicles_incidents.incident_id = incidents.id) '
+                 'WHERE abandoned_vehicles.license_plate IS NOT NULL AND incidents.status = \'OPEN\' '
+                 'GROUP BY abandoned_vehicles.license_plate '
+                 'HAVING COUNT(DISTINCT incidents.street_address) > 1',
+                 'CREATE UNIQUE INDEX license_plate_requests_license_plate ON license_plate_requests (license_plate)'],
+            reverse_sql='DROP MATERIALIZED VIEW license_plate_requests',
+        ),
+        migrations.RunSQL(
+            sql=['CREATE MATERIALIZED VIEW vehicle_color_counts AS '
+                 'SELECT vehicle_color, COUNT(vehicle_color) AS color_count '
+                 'FROM abandoned_vehicles WHERE vehicle_color IS NOT NULL '
+                 'GROUP BY vehicle_color',
+                 'CREATE UNIQUE INDEX vehicle_color_counts_vehicle_color ON vehicle_color_counts (vehicle_color)'],
+            reverse_sql='DROP MATERIALIZED VIEW vehicle_color_counts',
+        ),
+    ]
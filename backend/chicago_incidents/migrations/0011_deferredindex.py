@@ -0,0 +1,26 @@
+# Generated by Django 3.1.3 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chicago_incidents', '0010_materialized_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeferredIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=63, unique=True)),
+                ('definition', models.TextField()),
+            ],
+            options={
+                'db_table': 'deferred_indexes',
+            },
+        ),
+    ]
@@ -1,5 +1,5 @@
-from django.db import models
-from django.db.models import Q
+from django.db import connection, models, transaction
+from django.db.models import Max, Min, Q
 from rest_framework.exceptions import ValidationError
 
 
@@ -14,6 +14,25 @@ class AutoCreatedUpdatedModel(models.Model):
         abstract = True
 
 
+class IncidentQuerySet(models.QuerySet):
+    """QuerySet of the incidents, which keeps the daily rollup up to date when they are deleted
+    """
+
+    def delete(self):
+        """Delete the incidents and refresh the rollup of the range of their creation dates once, in the same
+        transaction.
+        """
+        with transaction.atomic():
+            creation_dates = self.aggregate(start=Min('creation_date'), end=Max('creation_date'))
+            result = super().delete()
+            if creation_dates['start'] is not None:
+                IncidentDailyRollup.refresh(creation_dates['start'], creation_dates['end'])
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Incident(AutoCreatedUpdatedModel):
     """Model for incident requests
     """
@@ -50,6 +69,11 @@ class Incident(AutoCreatedUpdatedModel):
         (TREE_TRIM, 'Tree Trim')
     ]
 
+    # The GiST index of the points of the coordinates, `point(longitude, latitude)`, for the bounding box queries
+    LOCATION_INDEX = 'incidents_location_gist'
+    # The covering index of the incidents of a completion date per type, for the police district query
+    COMPLETION_INDEX = 'incidents_completion_type_covering_idx'
+
     creation_date = models.DateTimeField()
     status = models.CharField(max_length=15, choices=STATUS_TYPE_CHOICES)
     completion_date = models.DateTimeField(null=True, blank=True)
@@ -72,22 +96,35 @@ class Incident(AutoCreatedUpdatedModel):
     longitude = models.DecimalField(max_digits=30, decimal_places=20, null=True, blank=True)
     location = models.JSONField(null=True, blank=True)
 
+    objects = IncidentQuerySet.as_manager()
+
     class Meta:
+        # Partitioned by the month of the creation date by the 0008 migration, see `partitions`
         db_table = 'incidents'
         # Constraint to avoid duplication of data
         unique_together = [['creation_date', 'status', 'completion_date', 'service_request_number',
                            'type_of_service_request', 'street_address']
                            ]
-        # The 1st index is useful for the importers
-        indexes = [models.Index(fields=['creation_date']),
-                   models.Index(fields=['completion_date']),
-                   models.Index(fields=['status']),
+        # The creation and the completion dates are indexed by BRIN indexes (`incidents_creation_date_brin` and
+        # `incidents_completion_date_brin`) and the creation date by a B-tree (`incidents_creation_date_btree`),
+        # which the fast loads of the importer keep or drop depending on the loaded incidents (see
+        # `TimestampIndexes`), so they are created by the 0009 migration
+        indexes = [models.Index(fields=['status']),
                    models.Index(fields=['street_address']),
                    models.Index(fields=['zip_code']),
                    models.Index(fields=['type_of_service_request']),
                    models.Index(fields=['latitude']),
                    models.Index(fields=['longitude']),
+                   # LOCATION_INDEX is an expression index, so it is created by the 0006 migration, and
+                   # COMPLETION_INDEX (which replaces the index of the completion date) has INCLUDE columns, so it is
+                   # created by the 0007 migration
                    models.Index(fields=['ssa']),
+                   # Covers the most common service per zip code query, which counts the incidents of a date per zip
+                   # code and type
+                   models.Index(fields=['creation_date', 'zip_code', 'type_of_service_request'],
+                                name='incidents_creation_zip_idx', condition=Q(zip_code__isnull=False)),
+                   # Useful for the incremental imports, that match the incidents by their request number
+                   models.Index(fields=['service_request_number', 'type_of_service_request']),
                    ]
 
     def full_clean(self, exclude=None, validate_unique=True):
@@ -101,7 +138,23 @@ class Incident(AutoCreatedUpdatedModel):
     
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
         self.full_clean()
-        return super(Incident, self).save()
+        # The rollup is refreshed in the same transaction as the incident, also for the previous creation date in case
+        # it changes
+        creation_dates = {self.creation_date}
+        with transaction.atomic():
+            if self.pk and not force_insert and (update_fields is None or 'creation_date' in update_fields):
+                creation_dates.update(Incident.objects.filter(pk=self.pk).values_list('creation_date', flat=True))
+            super(Incident, self).save(force_insert=force_insert, force_update=force_update, using=using,
+                                       update_fields=update_fields)
+            for creation_date in creation_dates:
+                IncidentDailyRollup.refresh(creation_date, creation_date)
+
+    def delete(self, using=None, keep_parents=False):
+        # The rollup is refreshed in the same transaction as the deletion
+        with transaction.atomic():
+            result = super(Incident, self).delete(using=using, keep_parents=keep_parents)
+            IncidentDailyRollup.refresh(self.creation_date, self.creation_date)
+        return result
 
     def __str__(self):
         """Return the string representation of the incident.
@@ -134,7 +187,8 @@ class ActivityIncident(AutoCreatedUpdatedModel):
     """Model that holds intermediate connection between activities and incidents
     """
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='activities_incidents')
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='activities_incidents')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='activities_incidents',
+                                 db_constraint=False)
 
     class Meta:
         db_table = 'activities_incidents'
@@ -176,7 +230,8 @@ class AbandonedVehicleIncident(AutoCreatedUpdatedModel):
     """
     abandoned_vehicle = models.ForeignKey(AbandonedVehicle, on_delete=models.CASCADE,
                                           related_name='abandoned_vehicles_incidents')
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='abandoned_vehicles_incidents')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='abandoned_vehicles_incidents',
+                                 db_constraint=False)
     # THIS VALUE DIFFERS PER REQUEST!
     days_of_report_as_parked = models.IntegerField(null=True, blank=True)
 
@@ -193,7 +248,12 @@ class NumberOfCartsAndPotholes(AutoCreatedUpdatedModel):
     These are merged to one table because the data type is exactly the same.
     """
     number_of_elements = models.IntegerField()
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='number_of_carts_and_potholes')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='number_of_carts_and_potholes',
+                                 db_constraint=False)
+
+    # The index of the incidents with the number of elements, which `policeDistrict` sums (created by the 0007
+    # migration)
+    INCIDENT_INDEX = 'number_of_carts_and_potholes_incident_covering_idx'
 
     class Meta:
         db_table = 'number_of_carts_and_potholes'
@@ -225,7 +285,8 @@ class GraffitiIncident(AutoCreatedUpdatedModel):
     """Model that holds intermediate connection between graffiti and incidents
      """
     graffiti = models.ForeignKey(Graffiti, on_delete=models.CASCADE, related_name='graffiti_incidents')
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='graffiti_incidents')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='graffiti_incidents',
+                                 db_constraint=False)
 
     class Meta:
         db_table = 'graffiti_incidents'
@@ -248,7 +309,8 @@ class TreeIncident(AutoCreatedUpdatedModel):
     """Model that holds intermediate connection between graffiti and incidents
     """
     tree = models.ForeignKey(Tree, on_delete=models.CASCADE, related_name='tree_incidents')
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='tree_incidents')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='tree_incidents',
+                                 db_constraint=False)
 
     class Meta:
         db_table = 'tree_incidents'
@@ -262,7 +324,12 @@ class RodentBaitingPremises(AutoCreatedUpdatedModel):
     number_of_premises_baited = models.IntegerField(null=True, blank=True)
     number_of_premises_w_garbage = models.IntegerField(null=True, blank=True)
     number_of_premises_w_rats = models.IntegerField(null=True, blank=True)
-    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='rodent_baiting_premises')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='rodent_baiting_premises',
+                                 db_constraint=False)
+
+    # The index of the incidents with the number of the baited premises, which `policeDistrict` sums (created by the
+    # 0007 migration)
+    INCIDENT_INDEX = 'rodent_baiting_premises_incident_covering_idx'
 
     class Meta:
         db_table = 'rodent_baiting_premises'
@@ -298,9 +365,173 @@ class SanitationCodeViolationIncident(AutoCreatedUpdatedModel):
     sanitation_code_violation = models.ForeignKey(SanitationCodeViolation, on_delete=models.CASCADE,
                                                   related_name='sanitation_code_violations_incidents')
     incident = models.ForeignKey(Incident, on_delete=models.CASCADE,
-                                 related_name='sanitation_code_violations_incidents')
+                                 related_name='sanitation_code_violations_incidents', db_constraint=False)
 
     class Meta:
         db_table = 'sanitation_code_violations_incidents'
         # Constraint to avoid duplication of data
         unique_together = ['sanitation_code_violation', 'incident']
+
+
+class ImportCheckpoint(AutoCreatedUpdatedModel):
+    """Model that holds the progress of the chunked imports of the CSVs, so that an interrupted import can be resumed
+    from the last committed chunk.
+    """
+    file_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=500)
+    rows = models.PositiveBigIntegerField(default=0)
+    counts = models.JSONField(default=dict)
+    completed = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'import_checkpoints'
+
+    def __str__(self):
+        """Return the string representation of the checkpoint.
+
+        :return: The file name and the number of rows committed.
+        """
+        return f'{self.file_name} ({self.rows} rows)'
+
+
+class DeferredIndex(AutoCreatedUpdatedModel):
+    """Model that holds the statements of the indexes that are dropped by a fast load until they are rebuilt, so that
+    the indexes of an interrupted load can be restored (see `importers.DeferredIndexes.restore`).
+    """
+    name = models.CharField(max_length=63, unique=True)
+    definition = models.TextField()
+
+    class Meta:
+        db_table = 'deferred_indexes'
+
+    def __str__(self):
+        """Return the string representation of the deferred index.
+
+        :return: The name of the index.
+        """
+        return self.name
+
+
+class IncidentDailyRollup(models.Model):
+    """Model that holds the number of incidents and their total completion time per creation date, type and area. It
+    is derived from the incidents and kept up to date by the importer and the create endpoints (see `refresh`), so
+    that the queries endpoints aggregate the rollup instead of the incidents.
+
+    The incidents are rolled up by their exact creation date, not by its day: the endpoints filter and group the
+    incidents by their exact creation dates, which a rollup per day could not reproduce. The datasets record only the
+    creation day, so their incidents are rolled up per day, but each incident that is created by the API with a time of
+    day gets rows of its own.
+    """
+    creation_date = models.DateTimeField()
+    type_of_service_request = models.CharField(max_length=30, choices=Incident.SERVICE_TYPE_CHOICES)
+    zip_code = models.IntegerField(null=True, blank=True)
+    ssa = models.IntegerField(null=True, blank=True)
+    police_district = models.IntegerField(null=True, blank=True)
+    ward = models.IntegerField(null=True, blank=True)
+    community_area = models.IntegerField(null=True, blank=True)
+    number_of_requests = models.PositiveIntegerField()
+    # The number of the incidents that have a completion date and the sum of their completion times
+    number_of_completed = models.PositiveIntegerField()
+    completion_time = models.DurationField(null=True, blank=True)
+
+    # The columns that the incidents are grouped by
+    KEY_COLUMNS = ['creation_date', 'type_of_service_request', 'zip_code', 'ssa', 'police_district', 'ward',
+                   'community_area']
+    # The key of the advisory lock of the refreshes. The whole rollup is rebuilt with the lock, while the refreshes of a
+    # range share it and lock only the months of their range (as the second key of the lock)
+    REFRESH_LOCK = 311
+    # The covering indexes of the queries endpoints, so that they are answered by index only scans: the rows of a date
+    # range per type (`totalRequestsPerType`, `averageCompletionTimePerRequest`), of a type per date
+    # (`totalRequestsPerDay`) and the rows with an SSA of a date range (`top5SSA`). They have INCLUDE columns, so they
+    # are created by the 0007 migration
+    DATE_RANGE_INDEX = 'incidents_daily_rollup_creation_type_idx'
+    TYPE_INDEX = 'incidents_daily_rollup_type_creation_idx'
+    SSA_INDEX = 'incidents_daily_rollup_ssa_creation_idx'
+
+    class Meta:
+        db_table = 'incidents_daily_rollup'
+
+    @classmethod
+    def refresh(cls, start=None, end=None):
+        """Aggregate the incidents that were created within a time range (inclusive) to the rollup, replacing the
+        rows of the range. Without a range the whole rollup is rebuilt.
+
+        :param start: The start of the range.
+        :param end: The end of the range.
+        """
+        where, params = '', []
+        if start is not None and end is not None:
+            where, params = 'WHERE creation_date >= %s AND creation_date <= %s', [start, end]
+        columns = ', '.join(cls.KEY_COLUMNS)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The refreshes of the same months are serialized, so that concurrent refreshes do not duplicate rows,
+            # while the refreshes of different months (e.g. the creates of the API) run at the same time
+            if where:
+                cursor.execute('SELECT pg_advisory_xact_lock_shared(%s)', [cls.REFRESH_LOCK])
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(to_char(month, 'YYYY-MM'))) "
+                               "FROM generate_series(date_trunc('month', %s::timestamptz AT TIME ZONE 'UTC'), "
+                               "%s::timestamptz AT TIME ZONE 'UTC', INTERVAL '1 month') AS month ORDER BY month",
+                               [cls.REFRESH_LOCK, start, end])
+            else:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [cls.REFRESH_LOCK])
+            cursor.execute(f'DELETE FROM {cls._meta.db_table} {where}', params)
+            cursor.execute(f'INSERT INTO {cls._meta.db_table} ({columns}, number_of_requests, number_of_completed, '
+                           f'completion_time) '
+                           f'SELECT {columns}, COUNT(*), COUNT(completion_date), SUM(completion_date - creation_date) '
+                           f'FROM {Incident._meta.db_table} {where} GROUP BY {columns}', params)
+
+
+class MaterializedView(models.Model):
+    """Base of the models of the materialized views, which hold the results of the aggregations that are too slow to
+    compute on each request. They are refreshed by the importer and by the `refresh_materialized_views` command.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def refresh(cls, concurrently: bool = True):
+        """Compute the view again. The concurrent refreshes do not block the queries of the view, which read the
+        previous results until the refresh is committed.
+
+        :param concurrently: Whether the view is refreshed concurrently (it needs a unique index).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " if concurrently else ""}'
+                           f'{connection.ops.quote_name(cls._meta.db_table)}')
+
+
+class LicensePlateRequests(MaterializedView):
+    """Materialized view of the license plates of the open abandoned vehicle incidents that are reported at more than
+    one address, with the number of the addresses.
+    """
+    license_plate = models.CharField(max_length=400, primary_key=True)
+    number_of_requests = models.IntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'license_plate_requests'
+
+
+class VehicleColorCount(MaterializedView):
+    """Materialized view of the number of the abandoned vehicles of each color.
+    """
+    vehicle_color = models.CharField(max_length=100, primary_key=True)
+    color_count = models.IntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'vehicle_color_counts'
+
+
+# The materialized views, which are refreshed together
+MATERIALIZED_VIEWS = [LicensePlateRequests, VehicleColorCount]
+
+
+def refresh_materialized_views(concurrently: bool = True):
+    """Refresh all the materialized views.
+
+    :param concurrently: Whether the views are refreshed concurrently.
+    """
+    for view in MATERIALIZED_VIEWS:
+        view.refresh(concurrently)
@@ -1,11 +1,107 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset pagination on the ids of the incidents. Each page is read after the last id of the previous one
+    (`WHERE id > %s ORDER BY id LIMIT %s`) instead of skipping the previous pages with an `OFFSET`, so a deep page is
+    read as fast as the first one. The previous and next pages are given by opaque cursors, and the total number of
+    results is only counted on the page that asks for it (`count=true`).
+
+    See: https://www.django-rest-framework.org/api-guide/pagination/#cursorpagination
+    """
+    page_size = 500
+    page_size_query_param = 'per_page'
+    max_page_size = 500
+    ordering = 'id'
+    count_query_param = 'count'
+    count_query_description = 'Whether to count the total number of results.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+        page = super().paginate_queryset(queryset, request, view)
+        # The pages of the cursors are not counted again
+        self.base_url = remove_query_param(self.base_url, self.count_query_param)
+        return page
+
+    def get_paginated_response(self, data):
+        content = [('next', self.get_next_link()), ('previous', self.get_previous_link()), ('results', data)]
+        if self.count is not None:
+            content.insert(0, ('count', self.count))
+        return Response(OrderedDict(content))
 
 
 class Pagination(PageNumberPagination):
     """Pagination configuration
 
+    The results are paginated by page number and the response is the list of the results of the page. When the
+    `cursor` query parameter is given (empty for the first page), they are paginated by `KeysetPagination` instead and
+    the response holds the results with the cursors of the previous and next pages. The keyset is given by
+    `keyset_ordering`, the ids of the incidents by default.
+
     See: https://www.django-rest-framework.org/api-guide/pagination/#configuration
     """
     page_size = 500
     page_size_query_param = 'per_page'
     max_page_size = 500
+    keyset_ordering = KeysetPagination.ordering
+    keyset_description = 'the ids of the incidents'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.keyset_ordering
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response(data)
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view)
+        return fields + [
+            coreapi.Field(
+                name=KeysetPagination.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(
+                    title='Cursor',
+                    description=f'The cursor of the page, empty for the first page, to paginate by '
+                                f'{self.keyset_description} instead of the page number.'
+                )
+            ),
+            coreapi.Field(
+                name=KeysetPagination.count_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Boolean(
+                    title='Count',
+                    description=KeysetPagination.count_query_description
+                )
+            ),
+        ]
+
+
+class LicensePlatesPagination(Pagination):
+    """Opt-in pagination of the license plates, whose keyset is the (unique) license plate. The license plates are
+    paginated only when the `page`, `per_page` or `cursor` query parameter is given, otherwise all of them are returned
+    as before.
+    """
+    keyset_ordering = 'license_plate'
+    keyset_description = 'the license plates'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = (self.page_query_param, self.page_size_query_param, KeysetPagination.cursor_query_param)
+        if not any(param in request.query_params for param in params):
+            self.keyset = None
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,205 @@
+"""Monthly range partitions of the incidents by their creation date. The date range queries read (and the imports of
+a month write) only the partitions of their months, and the old months can be detached from the table without
+rewriting it. The incidents of the months without a partition are kept by the default partition, until the partition
+of their month is created.
+
+The partitions are named after their month (e.g. `incidents_p2020_11`), with the months in UTC.
+"""
+import datetime
+import re
+import typing
+
+from django.db import connection, transaction
+
+from . import models
+
+# The names of the partitions, of the default partition and of the detached partitions
+PARTITION_NAME = '{table}_p{month:%Y_%m}'
+PARTITION_PATTERN = re.compile(r'_p(\d{4})_(\d{2})$')
+DEFAULT_PARTITION = '{table}_default'
+DETACHED_NAME = '{partition}_detached'
+# The key of the advisory lock that serializes the changes of the partitions
+PARTITION_LOCK = 312
+
+# The partitions of the incidents that are attached
+PARTITIONS_SQL = '''
+    SELECT partition_class.relname
+    FROM pg_inherits
+    JOIN pg_class partition_class ON partition_class.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = %s::regclass
+'''
+
+
+def month_start(value: typing.Union[datetime.date, datetime.datetime]) -> datetime.date:
+    """Find the first day of the month of a date.
+
+    :param value: The date (the date times are converted to UTC).
+    :return: The first day of the month.
+    """
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return datetime.date(value.year, value.month, 1)
+
+
+def next_month(month: datetime.date) -> datetime.date:
+    """Find the first day of the next month.
+
+    :param month: The first day of the month.
+    :return: The first day of the next month.
+    """
+    return datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months_between(start: typing.Union[datetime.date, datetime.datetime],
+                   end: typing.Union[datetime.date, datetime.datetime]) -> typing.List[datetime.date]:
+    """Find the months of a range of dates (inclusive).
+
+    :param start: The start of the range.
+    :param end: The end of the range.
+    :return: The first days of the months.
+    """
+    month, last = month_start(start), month_start(end)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def partition_name(month: datetime.date) -> str:
+    """Get the name of the partition of a month.
+
+    :param month: The first day of the month.
+    :return: The name of the partition.
+    """
+    return PARTITION_NAME.format(table=models.Incident._meta.db_table, month=month)
+
+
+def is_partitioned() -> bool:
+    """Check whether the incidents are partitioned (e.g. not before their migration).
+
+    :return: True if the table of the incidents is partitioned.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [models.Incident._meta.db_table])
+        return cursor.fetchone()[0] == 'p'
+
+
+def list_partitions() -> typing.List[datetime.date]:
+    """List the months of the attached partitions.
+
+    :return: The first days of the months, in order.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL, [models.Incident._meta.db_table])
+        names = [row[0] for row in cursor.fetchall()]
+    matches = [PARTITION_PATTERN.search(name) for name in names]
+    return sorted(datetime.date(int(match.group(1)), int(match.group(2)), 1) for match in matches if match)
+
+
+def create_partition(month: datetime.date) -> bool:
+    """Create the partition of a month, if it does not exist. The incidents of the month that are kept by the default
+    partition are moved to it.
+
+    :param month: The first day of the month.
+    :return: True if the partition is created.
+    """
+    table = connection.ops.quote_name(models.Incident._meta.db_table)
+    name = connection.ops.quote_name(partition_name(month))
+    default = connection.ops.quote_name(DEFAULT_PARTITION.format(table=models.Incident._meta.db_table))
+    bounds = [f'{month:%Y-%m-%d} 00:00:00+00', f'{next_month(month):%Y-%m-%d} 00:00:00+00']
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PARTITION_LOCK])
+        if month in list_partitions():
+            return False
+        # The partition is attached after it is filled, since the default partition cannot keep the rows of an
+        # attached partition. The indexes of the table are created at the partition when it is attached
+        cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING STORAGE)')
+        cursor.execute(f'WITH moved AS (DELETE FROM {default} WHERE creation_date >= %s AND creation_date < %s '
+                       f'RETURNING *) INSERT INTO {name} SELECT * FROM moved', bounds)
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+    return True
+
+
+def ensure_partitions(start: typing.Union[datetime.date, datetime.datetime],
+                      end: typing.Union[datetime.date, datetime.datetime]) -> int:
+    """Create the missing partitions of the months of a range of dates (inclusive).
+
+    :param start: The start of the range.
+    :param end: The end of the range.
+    :return: The number of the partitions that are created.
+    """
+    existing = set(list_partitions())
+    return sum(create_partition(month) for month in months_between(start, end) if month not in existing)
+
+
+def default_months() -> typing.List[datetime.date]:
+    """List the months of the incidents that are kept by the default partition (e.g. the incidents that were stored
+    before the incidents were partitioned).
+
+    :return: The first days of the months, in order.
+    """
+    default = connection.ops.quote_name(DEFAULT_PARTITION.format(table=models.Incident._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', creation_date AT TIME ZONE 'UTC')::date FROM {default} "
+                       f"ORDER BY 1")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def incident_relations() -> typing.List[typing.Tuple[str, str]]:
+    """Find the tables that point to the incidents (the payloads and the joins with the shared records), which have no
+    foreign keys at the database since the incidents are partitioned.
+
+    :return: The tables and the columns of the incidents.
+    """
+    return [(relation.related_model._meta.db_table, relation.field.column)
+            for relation in models.Incident._meta.related_objects if relation.one_to_many]
+
+
+def find_orphans(delete: bool = False) -> typing.Dict[str, int]:
+    """Find the rows of the tables that point to the incidents whose incident does not exist. The database does not
+    check these tables (see `incident_relations`), so the deletions of the incidents that bypass Django (e.g. raw SQL)
+    leave their rows behind.
+
+    :param delete: Whether the rows are deleted.
+    :return: The number of the rows of each table that has any.
+    """
+    incidents = connection.ops.quote_name(models.Incident._meta.db_table)
+    orphans = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for relation, column in incident_relations():
+            condition = f'NOT EXISTS (SELECT 1 FROM {incidents} WHERE {incidents}.id = ' \
+                        f'{connection.ops.quote_name(relation)}.{connection.ops.quote_name(column)})'
+            if delete:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(relation)} WHERE {condition}')
+                count = cursor.rowcount
+            else:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(relation)} WHERE {condition}')
+                count = cursor.fetchone()[0]
+            if count:
+                orphans[relation] = count
+    return orphans
+
+
+def detach_partition(month: datetime.date):
+    """Detach the partition of a month from the incidents. The partition is kept as a table (renamed with
+    `DETACHED_NAME`), the rows that point to its incidents (payloads and joins) are deleted, since nothing would
+    reference them, and the rollup of the month is refreshed. The shared records (e.g. the trees and the activities)
+    are kept.
+
+    :param month: The first day of the month.
+    """
+    table = connection.ops.quote_name(models.Incident._meta.db_table)
+    name = partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PARTITION_LOCK])
+        for relation, column in incident_relations():
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(relation)} '
+                           f'WHERE {connection.ops.quote_name(column)} IN '
+                           f'(SELECT id FROM {connection.ops.quote_name(name)})')
+        cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {connection.ops.quote_name(name)}')
+        cursor.execute(f'ALTER TABLE {connection.ops.quote_name(name)} '
+                       f'RENAME TO {connection.ops.quote_name(DETACHED_NAME.format(partition=name))}')
+        start = datetime.datetime.combine(month, datetime.time(), tzinfo=datetime.timezone.utc)
+        end = datetime.datetime.combine(next_month(month), datetime.time(), tzinfo=datetime.timezone.utc)
+        models.IncidentDailyRollup.refresh(start, end - datetime.timedelta(microseconds=1))
@@ -0,0 +1,51 @@
+"""JSON renderer backed by orjson, a JSON encoder written in Rust that encodes the datetimes natively and calls back
+into python only for the values that it does not support (Decimal, timedelta, lazy strings). When orjson is not
+installed, or the response asks for an output that orjson does not produce (e.g. `indent=4`), the responses are
+rendered by the `JSONRenderer` of DRF. The output is the same, except for the notation of some floats (`1e-7` instead of
+`1e-07`) and the NaN floats, which are rendered as null instead of failing.
+
+Select it globally with `DEFAULT_RENDERER_CLASSES` of `REST_FRAMEWORK`, or per view with `renderer_classes`.
+"""
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Renderer with the output of `JSONRenderer`, encoded by orjson when it is installed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.encoder = self.encoder_class()
+
+    def default(self, obj):
+        """Encode the values that orjson does not support as the encoder of DRF does (e.g. Decimal as float,
+        timedelta as its total seconds).
+
+        :param obj: The value.
+        :return: The encoded value.
+        """
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring.
+        """
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # The data that orjson refuses (e.g. integers beyond 64 bits) is left to the stdlib encoder
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # The same escaping of \u2028 and \u2029 as JSONRenderer, so that the output is a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -1,4 +1,5 @@
 from .base import *
+from .fast import *
 from .authentication import *
 from .abandoned_vehicle import *
 from .activity import *
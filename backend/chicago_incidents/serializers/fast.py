@@ -0,0 +1,160 @@
+"""Fast path for serializing read-only query results. The rows of the `.values()` queries are already flat dicts, so
+instead of going through the fields of a serializer for every value of every row, the converters of the fields are
+compiled once per serializer and applied to the rows directly. The output is the same as the output of the serializer.
+"""
+import datetime
+import decimal
+import functools
+import typing
+
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+__all__ = ['FastSerializer', 'get_fast_serializer']
+
+
+def datetime_converter(field: serializers.DateTimeField) -> typing.Callable:
+    """Compile the converter of a date time field.
+
+    :param field: The field.
+    :return: The converter of the values of the field.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime.datetime) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    return convert
+
+
+def date_converter(field: serializers.DateField) -> typing.Callable:
+    """Compile the converter of a date field.
+
+    :param field: The field.
+    :return: The converter of the values of the field.
+    """
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return field.to_representation(value)
+
+    return convert
+
+
+def decimal_converter(field: serializers.DecimalField) -> typing.Callable:
+    """Compile the converter of a decimal field, with the quantization context of the field.
+
+    :param field: The field.
+    :return: The converter of the values of the field.
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+
+    return convert
+
+
+def choice_converter(field: serializers.ChoiceField) -> typing.Callable:
+    """Compile the converter of a choice field.
+
+    :param field: The field.
+    :return: The converter of the values of the field.
+    """
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '':
+            return value
+        return choices.get(str(value), value)
+
+    return convert
+
+
+def compile_converter(field: serializers.Field) -> typing.Callable:
+    """Compile the converter of the (not null) values of a field, falling back to the field itself for the fields
+    without a simpler equivalent.
+
+    :param field: The field.
+    :return: The converter of the values of the field.
+    """
+    if isinstance(field, serializers.BooleanField):
+        return field.to_representation
+    if type(field) is serializers.ChoiceField:
+        return choice_converter(field)
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.FloatField):
+        return float
+    if isinstance(field, serializers.CharField):
+        return str
+    if isinstance(field, serializers.DateTimeField):
+        return datetime_converter(field)
+    if isinstance(field, serializers.DateField):
+        return date_converter(field)
+    if isinstance(field, serializers.DecimalField):
+        return decimal_converter(field)
+    if isinstance(field, serializers.DurationField):
+        return duration_string
+    return field.to_representation
+
+
+class FastSerializer:
+    """Serializer of flat rows (e.g. the dicts of `.values()` queries) with the output of a DRF serializer, for the
+    read-only results of the queries.
+    """
+
+    def __init__(self, serializer_class: typing.Type[serializers.Serializer]):
+        """Compile the converters of the readable fields of a serializer.
+
+        :param serializer_class: The serializer.
+        """
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ValueError(f'The field {name} of {serializer_class.__name__} is not a column of the rows')
+            self.fields.append((name, field.source, compile_converter(field)))
+
+    def serialize(self, rows: typing.Iterable[typing.Mapping]) -> typing.List[dict]:
+        """Serialize the rows.
+
+        :param rows: The rows.
+        :return: The serialized rows.
+        """
+        fields = self.fields
+        return [{name: None if row[source] is None else convert(row[source]) for name, source, convert in fields}
+                for row in rows]
+
+
+@functools.lru_cache(maxsize=None)
+def get_fast_serializer(serializer_class: typing.Type[serializers.Serializer]) -> FastSerializer:
+    """Get the fast serializer of a serializer, compiled once.
+
+    :param serializer_class: The serializer.
+    :return: The fast serializer.
+    """
+    return FastSerializer(serializer_class)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from chicago_incidents import exports
 from chicago_incidents.models import Incident
 from chicago_incidents.serializers import BaseSerializer
 
@@ -77,11 +78,28 @@ class SearchByAddressZipcodeParams(BaseSerializer):
     zipcode = serializers.IntegerField(help_text='The zipcode', required=False)
 
     def validate(self, data):
-        if not data:
+        if not data.get('address') and data.get('zipcode') is None:
             raise ValidationError({'address, zipcode': 'You must enter at least an address or a zipcode'})
         return data
 
 
+class ExportParams(BaseSerializer):
+    """The params serializer for the format of an export
+    """
+    output_format = serializers.ChoiceField(choices=exports.FORMAT_CHOICES, default=exports.NDJSON,
+                                            help_text='The format of the export')
+
+
+class RodentBaitingExportParams(RodentBaitingParams, ExportParams):
+    """The params serializer for exporting the rodent baiting incidents
+    """
+
+
+class SearchByAddressZipcodeExportParams(SearchByAddressZipcodeParams, ExportParams):
+    """The params serializer for exporting the incidents by address and zipcode
+    """
+
+
 class TotalRequestsPerTypeSerializer(BaseSerializer):
     """The serializer for the total requests per type
     """
@@ -143,3 +161,12 @@ class PoliceDistrictSerializer(BaseSerializer):
     police_district = serializers.IntegerField()
     rodent_baiting_sum = serializers.IntegerField()
     potholes_sum = serializers.IntegerField()
+
+
+class QueriesCacheStatsSerializer(BaseSerializer):
+    """The serializer for the hits and misses of the cache of the queries
+    """
+    data_version = serializers.IntegerField()
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    actions = serializers.DictField(child=serializers.DictField(child=serializers.IntegerField()))
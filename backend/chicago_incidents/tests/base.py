@@ -1,12 +1,20 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from chicago_incidents import caching
+
 
 class BaseAPITestCase(APITestCase):
     """Base class for API test cases
     """
 
+    def setUp(self):
+        # The cache (and its in-process tier) is not rolled back with the database after each test
+        caching.flush_counters()
+        cache.clear()
+
     def authenticate(self, username: str):
         """Authenticate the user with the specified email.
 
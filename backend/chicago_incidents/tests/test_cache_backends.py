@@ -0,0 +1,41 @@
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import SimpleTestCase, override_settings
+
+from ..cache_backends import TieredCache
+
+OPTIONS = {'SHARED': 'shared', 'MAX_ENTRIES': 100, 'LOCAL_TIMEOUT': 60}
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'chicago_incidents.cache_backends.TieredCache', 'OPTIONS': OPTIONS},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-cache-tests'},
+})
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        # Two processes, each one with its own local tier in front of the same shared tier
+        self.first = TieredCache('', {'OPTIONS': OPTIONS})
+        self.second = TieredCache('', {'OPTIONS': OPTIONS})
+        self.addCleanup(self.first.clear)
+
+    def test_local_tier(self):
+        """Test that the values are served by the local tier, which keeps them until its timeout
+        """
+        self.first.set('key', 1)
+        self.assertEqual(self.second.get('key'), 1)
+        self.first.delete('key')
+        self.assertIsNone(self.first.get('key'))
+        # The other process keeps the value for LOCAL_TIMEOUT seconds
+        self.assertEqual(self.second.get('key'), 1)
+
+    def test_session_deletion(self):
+        """Test that a deleted session (e.g. at a logout) is not accepted by the other processes
+        """
+        key = SessionStore.cache_key_prefix + 'session'
+        self.first.set(key, {'_auth_user_id': '1'})
+        self.assertEqual(self.second.get(key), {'_auth_user_id': '1'})
+        self.assertTrue(self.second.has_key(key))
+
+        self.first.delete(key)
+        self.assertIsNone(self.second.get(key))
+        self.assertFalse(self.second.has_key(key))
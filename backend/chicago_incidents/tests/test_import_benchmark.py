@@ -0,0 +1,152 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+import pandas as pd
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase
+
+from ..importers import INDEX_DEFINITIONS_SQL, PHASES, DeferredIndexes, TimestampIndexes, synthetic_dataframe, \
+    write_synthetic_csv
+from ..management.commands.benchmark_import import run_benchmark
+from ..management.commands.import_incidents_from_csvs import DATASET_COLUMNS, TIMESTAMP_COLUMNS, Command
+from ..models import DeferredIndex, Incident, RodentBaitingPremises
+
+
+class ImportBenchmarkTests(TestCase):
+    rows = 200
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+
+    def test_synthetic_dataframe(self):
+        """Test that the synthetic rows have the columns of the CSVs and unique service request numbers
+        """
+        for dataset, columns in DATASET_COLUMNS.items():
+            with self.subTest(dataset=dataset):
+                df = synthetic_dataframe(columns, self.rows)
+                self.assertEqual(list(df.columns), columns)
+                self.assertEqual(len(df), self.rows)
+                self.assertTrue(df['service_request_number'].is_unique)
+                self.assertFalse(pd.to_datetime(df['creation_date']).isna().any())
+
+        # Consecutive chunks continue the service request numbers
+        first = synthetic_dataframe(DATASET_COLUMNS['pot-holes-reported.csv'], self.rows)
+        second = synthetic_dataframe(DATASET_COLUMNS['pot-holes-reported.csv'], self.rows, start=self.rows)
+        self.assertTrue(pd.concat([first, second])['service_request_number'].is_unique)
+
+    def test_benchmark_each_dataset(self):
+        """Test that each importer is benchmarked with both engines and that the benchmarks leave no data behind
+        """
+        for engine in ('orm', 'copy'):
+            options = {'engine': engine, 'copy_chunk_size': 50, 'chunk_size': None, 'incremental': False,
+                       'resume': False}
+            for dataset, columns in DATASET_COLUMNS.items():
+                with self.subTest(engine=engine, dataset=dataset):
+                    input_file = os.path.join(self.data_dir.name, f'{self.rows}-311-service-requests-{dataset}')
+                    write_synthetic_csv(input_file, columns, self.rows, chunk_size=75)
+
+                    result = run_benchmark(input_file, options)
+                    self.assertEqual(result['incidents'], self.rows)
+                    self.assertGreater(result['rows_per_sec'], 0)
+                    self.assertGreater(result['peak_rss_mb'], 0)
+                    self.assertGreater(result['queries'], 0)
+                    self.assertEqual(list(result['phases']), PHASES)
+                    self.assertGreater(result['phases']['insert'], 0)
+
+        self.assertEqual(Incident.objects.count(), 0)
+
+    def test_timestamp_indexes(self):
+        """Test that the timestamp columns are indexed by BRIN indexes only above the thresholds, replacing the dropped
+        indexes of the columns
+        """
+        indexes = DeferredIndexes([Incident._meta.db_table])
+        indexes.definitions = [('incidents_creation_date_btree', 'CREATE INDEX incidents_creation_date_btree'),
+                               ('incidents_creation_date_brin', 'CREATE INDEX incidents_creation_date_brin'),
+                               ('incidents_status', 'CREATE INDEX incidents_status')]
+        timestamp_indexes = TimestampIndexes(Incident._meta.db_table, TIMESTAMP_COLUMNS, 10 ** 9, 0.9)
+        self.assertEqual(timestamp_indexes.choose(indexes), {'creation_date': 'btree', 'completion_date': None})
+        self.assertEqual([name for name, _ in indexes.definitions],
+                         ['incidents_status', 'incidents_creation_date_btree'])
+
+        timestamp_indexes = TimestampIndexes(Incident._meta.db_table, TIMESTAMP_COLUMNS, 0, 0)
+        self.assertEqual(timestamp_indexes.choose(indexes), {'creation_date': 'brin', 'completion_date': 'brin'})
+        self.assertEqual([name for name, _ in indexes.definitions],
+                         ['incidents_status', 'incidents_creation_date_brin', 'incidents_completion_date_brin'])
+        self.assertIn('USING brin ("creation_date")', indexes.definitions[1][1])
+
+
+class DeferredIndexesTests(TransactionTestCase):
+
+    @staticmethod
+    def index_names(tables: list) -> set:
+        """Find the non-unique indexes of tables.
+
+        :param tables: The tables.
+        :return: The names of the indexes.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(INDEX_DEFINITIONS_SQL, [tables])
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_restore_after_interrupted_load(self):
+        """Test that the indexes that are left dropped by an interrupted fast load are rebuilt from their persisted
+        statements
+        """
+        tables = [RodentBaitingPremises._meta.db_table]
+        names = self.index_names(tables)
+        self.assertTrue(names)
+
+        indexes = DeferredIndexes(tables)
+        self.addCleanup(DeferredIndexes.restore)
+        self.assertEqual(indexes.drop(), len(names))
+        # The load fails before the rebuild, and the statements kept in memory are lost with the process
+        del indexes
+        self.assertEqual(self.index_names(tables), set())
+        self.assertEqual(set(DeferredIndex.objects.values_list('name', flat=True)), names)
+
+        call_command('rebuild_deferred_indexes', index_workers=2, stdout=io.StringIO())
+        self.assertEqual(self.index_names(tables), names)
+        self.assertFalse(DeferredIndex.objects.exists())
+        self.assertEqual(DeferredIndexes.restore(), 0)
+
+    def test_fast_load_rebuild_failure(self):
+        """Test that a failure of the rebuild of the indexes after a failed fast load does not replace the error of the
+        load, and that the indexes are left to `rebuild_deferred_indexes`
+        """
+        def rebuild(indexes, workers=1):
+            if indexes.definitions:
+                raise DatabaseError('rebuild failed')
+            return 0
+
+        self.addCleanup(DeferredIndexes.restore)
+        stderr = io.StringIO()
+        with mock.patch.object(Command, 'import_files', side_effect=ValueError('load failed')), \
+                mock.patch.object(DeferredIndexes, 'rebuild', autospec=True, side_effect=rebuild):
+            with self.assertRaisesMessage(ValueError, 'load failed'):
+                call_command('import_incidents_from_csvs', 'pot-holes-reported.csv', fast_load=True,
+                             stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('rebuild failed', stderr.getvalue())
+        self.assertIn('rebuild_deferred_indexes', stderr.getvalue())
+        self.assertTrue(DeferredIndex.objects.exists())
+
+    def test_restore_skips_existing_indexes(self):
+        """Test that the persisted statements of the indexes that exist (e.g. rebuilt before the failure) are skipped
+        """
+        tables = [RodentBaitingPremises._meta.db_table]
+        names = self.index_names(tables)
+        indexes = DeferredIndexes(tables)
+        self.addCleanup(DeferredIndexes.restore)
+        indexes.drop()
+        _, definition = indexes.definitions[0]
+        with connection.cursor() as cursor:
+            cursor.execute(definition)
+
+        self.assertEqual(DeferredIndexes.restore(), len(names))
+        self.assertEqual(self.index_names(tables), names)
+        self.assertFalse(DeferredIndex.objects.exists())
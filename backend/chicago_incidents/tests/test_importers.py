@@ -0,0 +1,312 @@
+import io
+import os
+import tempfile
+import typing
+from unittest import mock
+
+import pandas as pd
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import Model
+from django.test import TestCase
+
+from .. import partitions
+from ..importers import LookupCache, synthetic_dataframe
+from ..management.commands.import_incidents_from_csvs import DATASET_COLUMNS, STATUS_TYPES, TREE_DEBRIS_COLUMNS, \
+    TREE_TRIMS_COLUMNS
+from ..models import Activity, ActivityIncident, ImportCheckpoint, Incident, Tree, TreeIncident
+
+# The fields that are set by the writes of the records, rather than by the rows of the CSVs
+GENERATED_FIELDS = {'id', 'created_at', 'updated_at'}
+
+
+def field_paths(model: typing.Type[Model]) -> typing.List[str]:
+    """Get the paths of the fields of a model that are set by the rows of the CSVs, following its foreign keys, so that
+    the records are compared by their values instead of their ids.
+
+    :param model: The model.
+    :return: The paths of the fields.
+    """
+    paths = []
+    for field in model._meta.concrete_fields:
+        if field.name in GENERATED_FIELDS:
+            continue
+        if not field.is_relation:
+            paths.append(field.name)
+        elif field.related_model is Incident:
+            paths.append(f'{field.name}__service_request_number')
+        else:
+            paths.extend(f'{field.name}__{path}' for path in field_paths(field.related_model))
+    return paths
+
+
+def incident_models() -> typing.List[typing.Type[Model]]:
+    """Get the models of the incidents, of the tables that point to them and of the records that they share.
+
+    :return: The models.
+    """
+    children = [relation.related_model for relation in Incident._meta.related_objects if relation.one_to_many]
+    lookups = [field.related_model for model in children for field in model._meta.concrete_fields
+               if field.is_relation and field.related_model is not Incident]
+    return [Incident] + children + list(dict.fromkeys(lookups))
+
+
+def stored_incidents() -> typing.Dict[str, list]:
+    """Get the stored records of the incidents, by their values.
+
+    :return: The sorted values of the records of each table.
+    """
+    return {model._meta.db_table: sorted(model.objects.values_list(*field_paths(model)), key=str)
+            for model in incident_models()}
+
+
+def delete_incidents():
+    """Delete the stored incidents, along with the records that point to them and the records that they share.
+    """
+    for model in incident_models():
+        model.objects.all().delete()
+
+
+class LookupCacheTests(TestCase):
+
+    def setUp(self):
+        self.existing = Activity.objects.create(current_activity='Dispatch Crew', most_recent_action='Complete')
+        self.cache = LookupCache(Activity, ['current_activity', 'most_recent_action'])
+
+    def test_resolve(self):
+        """Test that the existing keys are resolved to their records, and that the new keys are created once
+        """
+        keys = [LookupCache.make_key(values) for values in [('Dispatch Crew', 'Complete'), ('Dispatch Crew', None),
+                                                            ('Inspect', 'Complete'), ('Inspect', 'Complete'),
+                                                            (None, None)]]
+        self.assertEqual(self.cache.resolve(keys), 2)
+        self.assertEqual(self.cache.resolve(keys), 0)
+        self.assertEqual(Activity.objects.count(), 3)
+
+        self.assertEqual(self.cache.get(keys[0]), self.existing.id)
+        self.assertEqual(self.cache.get(keys[1]),
+                         Activity.objects.get(current_activity='Dispatch Crew', most_recent_action=None).id)
+        self.assertEqual(self.cache.get(keys[2]),
+                         Activity.objects.get(current_activity='Inspect', most_recent_action='Complete').id)
+        # The keys without values have no record
+        self.assertIsNone(self.cache.get(keys[4]))
+
+    def test_get_unresolved(self):
+        """Test that the keys that were not resolved are not looked up at the database
+        """
+        self.cache.resolve([])
+        self.assertEqual(self.cache.get(LookupCache.make_key(('Dispatch Crew', 'Complete'))), self.existing.id)
+        with self.assertRaises(KeyError):
+            self.cache.get(LookupCache.make_key(('Inspect', 'Complete')))
+
+
+class TreeImporterTests(TestCase):
+    # The trees and the activities of the rows: an existing one, a new one (twice) and empty or partial values
+    TREE_LOCATIONS = ['Parkway', 'Vacant Lot', 'Vacant Lot', None, 'Parkway']
+    ACTIVITIES = [('Dispatch Crew', 'Complete'), ('Inspect', 'No Cause Found'), ('Inspect', 'No Cause Found'),
+                  (None, None), ('Dispatch Crew', None)]
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.parkway = Tree.objects.create(location='Parkway')
+        self.activity = Activity.objects.create(current_activity='Dispatch Crew', most_recent_action='Complete')
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+
+    def write_csv(self, dataset: str, columns: list, start: int) -> str:
+        """Write a CSV of the rows with the trees and the activities of the test.
+
+        :param dataset: The suffix of the name of the CSV.
+        :param columns: The columns of the CSV.
+        :param start: The number of the first service request number.
+        :return: The path of the CSV.
+        """
+        df = synthetic_dataframe(columns, len(self.TREE_LOCATIONS), start=start)
+        df['tree_location'] = self.TREE_LOCATIONS
+        if 'current_activity' in columns:
+            df['current_activity'] = [activity for activity, _ in self.ACTIVITIES]
+            df['most_recent_action'] = [action for _, action in self.ACTIVITIES]
+        path = os.path.join(self.data_dir.name, f'{start}-311-service-requests-{dataset}')
+        df.to_csv(path, index=False)
+        return path
+
+    def assert_imported(self, path: str, activities: bool):
+        """Assert the trees and the activities of the imported incidents of a CSV.
+
+        :param path: The path of the CSV.
+        :param activities: Whether the rows of the CSV have activities.
+        """
+        numbers = list(pd.read_csv(path)['service_request_number'])
+        incidents = Incident.objects.filter(service_request_number__in=numbers).order_by('service_request_number')
+        self.assertEqual(incidents.count(), len(self.TREE_LOCATIONS))
+        for incident, location, activity in zip(incidents, self.TREE_LOCATIONS, self.ACTIVITIES):
+            # The trees are matched by the tree location of the rows (not by the coordinates of the incident)
+            trees = TreeIncident.objects.filter(incident_id=incident.id).values_list('tree__location', flat=True)
+            self.assertEqual(list(trees), [location] if location else [])
+            links = ActivityIncident.objects.filter(incident_id=incident.id) \
+                .values_list('activity__current_activity', 'activity__most_recent_action')
+            self.assertEqual(list(links), [activity] if activities and any(activity) else [])
+
+    def test_import_trees_and_activities(self):
+        """Test that the trees and the activities of the rows are matched to the existing records, and that the missing
+        ones are created once, by both engines
+        """
+        for number, engine in enumerate(['orm', 'copy']):
+            with self.subTest(engine=engine):
+                debris = self.write_csv('tree-debris.csv', TREE_DEBRIS_COLUMNS, number * 100)
+                trims = self.write_csv('tree-trims.csv', TREE_TRIMS_COLUMNS, number * 100 + 50)
+                call_command('import_incidents_from_csvs', debris, trims, engine=engine, stdout=io.StringIO())
+
+                self.assert_imported(debris, activities=True)
+                self.assert_imported(trims, activities=False)
+                self.assertEqual(sorted(Tree.objects.values_list('location', flat=True)), ['Parkway', 'Vacant Lot'])
+                self.assertEqual(Tree.objects.get(location='Parkway').id, self.parkway.id)
+                self.assertEqual(sorted(Activity.objects.values_list('current_activity', 'most_recent_action'),
+                                        key=str),
+                                 sorted([('Dispatch Crew', 'Complete'), ('Dispatch Crew', None),
+                                         ('Inspect', 'No Cause Found')], key=str))
+                self.assertEqual(Activity.objects.get(current_activity='Dispatch Crew',
+                                                      most_recent_action='Complete').id, self.activity.id)
+
+
+class ImportCommandTests(TestCase):
+    rows = 50
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+
+    def write_csv(self, df: pd.DataFrame, dataset: str = 'pot-holes-reported.csv', name: str = 'data') -> str:
+        """Write the rows of a CSV.
+
+        :param df: The rows.
+        :param dataset: The suffix of the name of the CSV.
+        :param name: The prefix of the name of the CSV.
+        :return: The path of the CSV.
+        """
+        path = os.path.join(self.data_dir.name, f'{name}-311-service-requests-{dataset}')
+        df.to_csv(path, index=False)
+        return path
+
+    def test_incremental_import(self):
+        """Test that an incremental import updates the stored incidents whose status or completion date changed and
+        inserts the new ones only
+        """
+        df = synthetic_dataframe(DATASET_COLUMNS['pot-holes-reported.csv'], self.rows)
+        call_command('import_incidents_from_csvs', self.write_csv(df), stdout=io.StringIO())
+        self.assertEqual(Incident.objects.count(), self.rows)
+
+        # A row whose status changed and a new row
+        status = next(label for label in STATUS_TYPES if label != df.loc[0, 'status'])
+        df.loc[0, 'status'] = status
+        new_row = synthetic_dataframe(DATASET_COLUMNS['pot-holes-reported.csv'], 1, start=self.rows)
+        stdout = io.StringIO()
+        call_command('import_incidents_from_csvs', self.write_csv(pd.concat([df, new_row]), name='delta'),
+                     incremental=True, stdout=stdout)
+
+        self.assertIn('Imported 1 incidents', stdout.getvalue())
+        self.assertIn('Updated 1 incidents', stdout.getvalue())
+        self.assertEqual(Incident.objects.count(), self.rows + 1)
+        self.assertEqual(Incident.objects.values('service_request_number').distinct().count(), self.rows + 1)
+        self.assertEqual(Incident.objects.get(service_request_number=df.loc[0, 'service_request_number']).status,
+                         STATUS_TYPES[status])
+        self.assertTrue(Incident.objects.filter(service_request_number=new_row.loc[0, 'service_request_number'])
+                        .exists())
+
+    def test_resume_interrupted_import(self):
+        """Test that a chunked import that is interrupted is resumed after its last committed chunk, without importing
+        the committed chunks again
+        """
+        input_file = self.write_csv(synthetic_dataframe(DATASET_COLUMNS['pot-holes-reported.csv'], self.rows))
+        bulk_create = Incident.objects.bulk_create
+        written = []
+
+        def interrupt(incidents, *args, **kwargs):
+            # The third chunk fails, after the first two are committed
+            if len(written) == 2:
+                raise DatabaseError('interrupted')
+            written.append(len(incidents))
+            return bulk_create(incidents, *args, **kwargs)
+
+        with mock.patch.object(Incident.objects, 'bulk_create', side_effect=interrupt):
+            with self.assertRaisesMessage(DatabaseError, 'interrupted'):
+                call_command('import_incidents_from_csvs', input_file, chunk_size=10, stdout=io.StringIO())
+        self.assertEqual(Incident.objects.count(), 20)
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual(checkpoint.rows, 20)
+        self.assertFalse(checkpoint.completed)
+
+        stdout = io.StringIO()
+        with mock.patch.object(Incident.objects, 'bulk_create', wraps=bulk_create) as resumed:
+            call_command('import_incidents_from_csvs', input_file, chunk_size=10, resume=True, stdout=stdout)
+        self.assertIn('from row 20', stdout.getvalue())
+        # Only the chunks after the checkpoint are written
+        self.assertEqual([len(call[0][0]) for call in resumed.call_args_list], [10, 10, 10])
+        self.assertEqual(Incident.objects.count(), self.rows)
+        self.assertEqual(Incident.objects.values('service_request_number').distinct().count(), self.rows)
+        self.assertTrue(ImportCheckpoint.objects.get().completed)
+
+    def test_import_columnar_conversions(self):
+        """Test that the Parquet and the Feather conversions of the CSVs store the same records as the CSVs
+        """
+        input_files = [self.write_csv(synthetic_dataframe(columns, self.rows, start=number * self.rows), dataset)
+                       for number, (dataset, columns) in enumerate(DATASET_COLUMNS.items())]
+        call_command('import_incidents_from_csvs', *input_files, stdout=io.StringIO())
+        expected = stored_incidents()
+        self.assertEqual(len(expected[Incident._meta.db_table]), len(input_files) * self.rows)
+
+        for file_format in ('parquet', 'feather'):
+            with self.subTest(format=file_format):
+                delete_incidents()
+                output_dir = os.path.join(self.data_dir.name, file_format)
+                os.mkdir(output_dir)
+                call_command('convert_incidents_csvs', *input_files, format=file_format, output_dir=output_dir,
+                             stdout=io.StringIO())
+                converted = sorted(os.listdir(output_dir))
+                self.assertEqual(len(converted), len(input_files))
+                self.assertTrue(all(name.endswith(f'.{file_format}') for name in converted))
+
+                call_command('import_incidents_from_csvs', *[os.path.join(output_dir, name) for name in converted],
+                             stdout=io.StringIO())
+                self.assertEqual(stored_incidents(), expected)
+
+    def test_chunked_import_duplicates(self):
+        """Test that a row that is duplicated at a later chunk is stored once, as when the CSV is read at once
+        """
+        df = synthetic_dataframe(DATASET_COLUMNS['abandoned-vehicles.csv'], self.rows)
+        # A row of the first chunk is repeated at the third one
+        df = pd.concat([df.iloc[:25], df.iloc[[5]], df.iloc[25:]])
+        input_file = self.write_csv(df, 'abandoned-vehicles.csv')
+
+        for engine in ('orm', 'copy'):
+            with self.subTest(engine=engine):
+                call_command('import_incidents_from_csvs', input_file, engine=engine, stdout=io.StringIO())
+                expected = stored_incidents()
+                delete_incidents()
+
+                call_command('import_incidents_from_csvs', input_file, engine=engine, chunk_size=10,
+                             stdout=io.StringIO())
+                self.assertEqual(Incident.objects.count(), self.rows)
+                self.assertEqual(stored_incidents(), expected)
+                delete_incidents()
+
+    def test_engines_parity(self):
+        """Test that the ORM and the COPY engines store the same incidents, payloads, joins and shared records
+        """
+        input_files = [self.write_csv(synthetic_dataframe(columns, self.rows, start=number * self.rows), dataset)
+                       for number, (dataset, columns) in enumerate(DATASET_COLUMNS.items())]
+        stored = {}
+        for engine in ('orm', 'copy'):
+            call_command('import_incidents_from_csvs', *input_files, engine=engine, stdout=io.StringIO())
+            stored[engine] = stored_incidents()
+            self.assertEqual(partitions.find_orphans(), {})
+            delete_incidents()
+
+        self.assertEqual(len(stored['orm'][Incident._meta.db_table]), len(input_files) * self.rows)
+        for table, records in stored['orm'].items():
+            with self.subTest(table=table):
+                self.assertTrue(records)
+                self.assertEqual(stored['copy'][table], records)
@@ -9,6 +9,7 @@ class IncidentTests(BaseAPITestCase):
     fixtures = ['incidents.json']
 
     def setUp(self) -> None:
+        super().setUp()
         self.__data__ = [
             {'creation_date': '2020-11-15T23:11:07.285Z',
              'completion_date': '2020-11-15T23:11:07.285Z',
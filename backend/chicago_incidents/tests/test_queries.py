@@ -1,13 +1,30 @@
+import csv
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.db.models import Avg, Count, F, Sum
 from django.urls import reverse
 from rest_framework import status
 
 from .base import BaseAPITestCase
-from ..models import Incident
+from .. import caching, partitions, serializers
+from ..models import AbandonedVehicle, AbandonedVehicleIncident, Incident, IncidentDailyRollup, LicensePlateRequests, \
+    RodentBaitingPremises, VehicleColorCount, refresh_materialized_views
 
 
 class QueriesTests(BaseAPITestCase):
     fixtures = ['incidents.json']
 
+    def setUp(self):
+        super().setUp()
+        # The fixtures are loaded without rolling up the incidents and refreshing the materialized views
+        IncidentDailyRollup.refresh()
+        refresh_materialized_views()
+
     def test_unauthorized(self):
         """Test that unauthorized access fails
         """
@@ -276,6 +293,74 @@ class QueriesTests(BaseAPITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['type_of_service_request'], 'ABANDONED_VEHICLE')
 
+    def test_incident_partitions(self):
+        """Test that the incidents of a month are moved to its partition, and that they are not queried once the
+        partition is detached
+        """
+        month = datetime.date(2020, 11, 1)
+        incidents = Incident.objects.filter(creation_date__year=2020, creation_date__month=11)
+        count = incidents.count()
+        ids = list(incidents.values_list('id', flat=True))
+        self.assertTrue(RodentBaitingPremises.objects.filter(incident_id__in=ids).exists())
+        self.assertTrue(partitions.create_partition(month))
+        self.assertFalse(partitions.create_partition(month))
+        self.assertIn(month, partitions.list_partitions())
+        self.assertEqual(incidents.count(), count)
+
+        partitions.detach_partition(month)
+        self.assertNotIn(month, partitions.list_partitions())
+        self.assertEqual(incidents.count(), 0)
+        self.assertFalse(IncidentDailyRollup.objects.filter(creation_date__year=2020, creation_date__month=11).exists())
+        self.assertTrue(Incident.objects.filter(creation_date__year=2020, creation_date__month=10).exists())
+        # The rows that pointed to the detached incidents are deleted with them
+        for relation in Incident._meta.related_objects:
+            self.assertFalse(relation.related_model.objects.filter(**{f'{relation.field.name}_id__in': ids}).exists())
+        self.assertEqual(AbandonedVehicleIncident.objects.count(), 4)
+
+    def test_manage_incident_partitions_detach(self):
+        """Test that the materialized views do not report the incidents of the detached partitions
+        """
+        partitions.create_partition(datetime.date(2020, 7, 1))
+        self.assertTrue(LicensePlateRequests.objects.filter(license_plate='ASDF1234').exists())
+
+        call_command('manage_incident_partitions', ahead=0, detach_before=datetime.date(2020, 8, 1),
+                     stdout=io.StringIO())
+        self.assertNotIn(datetime.date(2020, 7, 1), partitions.list_partitions())
+        # The plate is left with the open incident of a single address
+        self.assertFalse(LicensePlateRequests.objects.filter(license_plate='ASDF1234').exists())
+
+    def test_manage_incident_partitions_split_default(self):
+        """Test that the incidents that are kept by the default partition are moved to the partitions of their months
+        """
+        count = Incident.objects.count()
+        months = {partitions.month_start(creation_date)
+                  for creation_date in Incident.objects.values_list('creation_date', flat=True)}
+        self.assertEqual(set(partitions.default_months()), months)
+
+        call_command('manage_incident_partitions', ahead=0, split_default=True, stdout=io.StringIO())
+        self.assertEqual(partitions.default_months(), [])
+        self.assertTrue(months.issubset(partitions.list_partitions()))
+        self.assertEqual(Incident.objects.count(), count)
+
+    def test_check_incident_relations(self):
+        """Test that the rows that point to incidents that were deleted without Django are found and deleted
+        """
+        call_command('check_incident_relations', stdout=io.StringIO())
+
+        incident_id = AbandonedVehicleIncident.objects.values_list('incident_id', flat=True).first()
+        rows = {relation.related_model._meta.db_table:
+                relation.related_model.objects.filter(**{relation.field.attname: incident_id}).count()
+                for relation in Incident._meta.related_objects}
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Incident._meta.db_table} WHERE id = %s', [incident_id])
+        self.assertEqual(partitions.find_orphans(), {table: count for table, count in rows.items() if count})
+        with self.assertRaises(CommandError):
+            call_command('check_incident_relations', stdout=io.StringIO())
+
+        call_command('check_incident_relations', delete=True, stdout=io.StringIO())
+        self.assertEqual(partitions.find_orphans(), {})
+        self.assertFalse(AbandonedVehicleIncident.objects.filter(incident_id=incident_id).exists())
+
     def test_most_common_service_in_bounding_box_malformed_date(self):
         """Test that date validation works as it should
         """
@@ -434,6 +519,47 @@ class QueriesTests(BaseAPITestCase):
         # This car appears in 2 open incidents with different address
         self.assertEqual(response.data[0]['license_plate'], 'ASDF1234')
 
+    def test_license_plates_unpaginated_by_default(self):
+        """Test that the license plates are paginated only when the pagination parameters are given
+        """
+        self.authenticate('admin')
+
+        response = self.client.get(reverse('queries-license-plates'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), LicensePlateRequests.objects.count())
+        self.assertEqual(set(response.data[0].keys()), {'license_plate', 'number_of_requests'})
+
+        response = self.client.get(reverse('queries-license-plates'), data={'page': 1, 'per_page': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([dict(plate) for plate in response.data],
+                         [{'license_plate': 'ASDF1234', 'number_of_requests': 2}])
+
+    def test_license_plates_cursor_pagination_and_export(self):
+        """Test that the cursor pagination and the export give the same license plates
+        """
+        self.authenticate('admin')
+
+        response = self.client.get(reverse('queries-license-plates'))
+        expected = [dict(plate) for plate in response.data]
+
+        response = self.client.get(reverse('queries-license-plates'), data={'cursor': '', 'count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual([dict(plate) for plate in response.data['results']], expected)
+
+        response = self.client.get(reverse('queries-license-plates-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+        response = self.client.get(reverse('queries-license-plates-export'), data={'output_format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['license_plate'] for row in rows], [plate['license_plate'] for plate in expected])
+
     def test_second_most_common_color(self):
         """Test that this endpoint gives the expected data we want
         """
@@ -444,6 +570,15 @@ class QueriesTests(BaseAPITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['vehicle_color'], 'black')
 
+    def test_refresh_materialized_views(self):
+        """Test that the materialized views hold the changes of the data after they are refreshed
+        """
+        AbandonedVehicle.objects.create(license_plate='QWER5678', vehicle_color='pink')
+        self.assertFalse(VehicleColorCount.objects.filter(vehicle_color='pink').exists())
+
+        call_command('refresh_materialized_views', stdout=io.StringIO())
+        self.assertEqual(VehicleColorCount.objects.get(vehicle_color='pink').color_count, 1)
+
     def test_rodent_baiting(self):
         """Test that this endpoint gives the expected data we want
         """
@@ -501,6 +636,61 @@ class QueriesTests(BaseAPITestCase):
         response = self.client.get(reverse('queries-rodent-baiting'), data={'type_of_premises': 'BAITED'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_rodent_baiting_cursor_pagination(self):
+        """Test that the cursor pagination walks the same results in order of their ids
+        """
+        self.authenticate('admin')
+
+        response = self.client.get(reverse('queries-rodent-baiting'), data={'type_of_premises': 'GARBAGE',
+                                                                            'threshold': 7, 'per_page': 2,
+                                                                            'cursor': '', 'count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), 2)
+        ids = [incident['id'] for incident in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), 1)
+        ids += [incident['id'] for incident in response.data['results']]
+        self.assertEqual(ids, sorted(ids))
+
+        response = self.client.get(reverse('queries-rodent-baiting'), data={'type_of_premises': 'GARBAGE',
+                                                                            'threshold': 7})
+        self.assertEqual(sorted(incident['id'] for incident in response.data), ids)
+
+    def test_rodent_baiting_export(self):
+        """Test that the export streams all the results as NDJSON or CSV
+        """
+        self.authenticate('admin')
+
+        response = self.client.get(reverse('queries-rodent-baiting'), data={'type_of_premises': 'GARBAGE',
+                                                                            'threshold': 7})
+        expected = [dict(incident) for incident in response.data]
+
+        response = self.client.get(reverse('queries-rodent-baiting-export'), data={'type_of_premises': 'GARBAGE',
+                                                                                   'threshold': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+        response = self.client.get(reverse('queries-rodent-baiting-export'), data={'type_of_premises': 'GARBAGE',
+                                                                                   'threshold': 7,
+                                                                                   'output_format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['id'] for row in rows], [str(incident['id']) for incident in expected])
+
+        response = self.client.get(reverse('queries-rodent-baiting-export'), data={'type_of_premises': 'GARBAGE',
+                                                                                   'output_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_police_districts(self):
         """Test that this endpoint gives the expected data we want
         """
@@ -572,3 +762,105 @@ class QueriesTests(BaseAPITestCase):
 
         response = self.client.get(reverse('queries-search-incident-by-address-and-zip-code'), data={'zipcode': 'text'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_daily_rollup_matches_incidents(self):
+        """Test that the endpoints that read the daily rollup give the same results as aggregating the incidents, also
+        after an incident is created
+        """
+        self.authenticate('admin')
+        dates = {'start_date': '2020-01-01', 'end_date': '2020-12-31'}
+        incident = Incident.objects.get(pk=1)
+        incident.pk = None
+        incident.service_request_number = 'rollup-test'
+        incident.save()
+
+        incidents = Incident.objects.filter(creation_date__gte='2020-01-01T00:00:00Z',
+                                            creation_date__lte='2020-12-31T00:00:00Z')
+        expected = incidents.values('type_of_service_request') \
+            .annotate(number_of_requests=Count('id')).order_by('type_of_service_request')
+        response = self.client.get(reverse('queries-total-requests-per-type'), data=dates)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data, key=lambda row: row['type_of_service_request']), list(expected))
+
+        expected = incidents.values('type_of_service_request') \
+            .annotate(average_completion_time=Avg(F('completion_date') - F('creation_date'))) \
+            .order_by('type_of_service_request')
+        response = self.client.get(reverse('queries-average-completion-time-per-request'), data=dates)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['average_completion_time'] for row in response.data],
+                         [None if row['average_completion_time'] is None else str(row['average_completion_time'])
+                          for row in expected])
+
+    def test_daily_rollup_after_delete(self):
+        """Test that the rollup follows the incidents that are deleted, one by one or by a query
+        """
+        def rollup_counts():
+            return {row['type_of_service_request']: row['number_of_requests'] for row in IncidentDailyRollup.objects
+                    .values('type_of_service_request').annotate(number_of_requests=Sum('number_of_requests'))}
+
+        def incident_counts():
+            return {row['type_of_service_request']: row['number_of_requests'] for row in Incident.objects
+                    .values('type_of_service_request').annotate(number_of_requests=Count('id'))}
+
+        Incident.objects.get(pk=1).delete()
+        self.assertEqual(rollup_counts(), incident_counts())
+
+        # The rollup of the deleted incidents is refreshed once, for the range of their creation dates
+        with mock.patch.object(IncidentDailyRollup, 'refresh', wraps=IncidentDailyRollup.refresh) as refresh:
+            Incident.objects.filter(creation_date__year=2020, creation_date__month=11).delete()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(rollup_counts(), incident_counts())
+
+    def test_daily_rollup_refresh_failure(self):
+        """Test that an incident is not saved when the refresh of its rollup fails
+        """
+        count = Incident.objects.count()
+        incident = Incident.objects.get(pk=1)
+        incident.pk = None
+        incident.service_request_number = 'rollup-failure'
+        with mock.patch.object(IncidentDailyRollup, 'refresh', side_effect=DatabaseError('refresh failed')):
+            with self.assertRaises(DatabaseError):
+                incident.save()
+        self.assertEqual(Incident.objects.count(), count)
+
+    def test_queries_cache(self):
+        """Test that the responses of the queries are cached by their parameters and computed again when the data
+        version changes
+        """
+        self.authenticate('admin')
+
+        response = self.client.get(reverse('queries-total-requests-per-type'),
+                                   data={'start_date': '2020-08-01', 'end_date': '2020-12-01'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        cached = self.client.get(reverse('queries-total-requests-per-type'),
+                                 data={'end_date': '2020-12-01', 'start_date': '2020-08-01'})
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, response.data)
+
+        response = self.client.get(reverse('queries-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['actions']['total_requests_per_type'], {'hits': 1, 'misses': 1})
+
+        caching.bump_data_version()
+        response = self.client.get(reverse('queries-total-requests-per-type'),
+                                   data={'start_date': '2020-08-01', 'end_date': '2020-12-01'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_fast_serializers(self):
+        """Test that the fast path serializes the results of the queries exactly as their serializers
+        """
+        rows = list(Incident.objects.values(*serializers.IncidentMinifiedSerializer.Meta.fields).order_by('id'))
+        self.assertEqual(serializers.get_fast_serializer(serializers.IncidentMinifiedSerializer).serialize(rows),
+                         serializers.IncidentMinifiedSerializer(rows, many=True).data)
+
+        rows = list(Incident.objects.values('creation_date').annotate(number_of_requests=Count('id'))
+                    .order_by('creation_date'))
+        self.assertEqual(serializers.get_fast_serializer(serializers.TotalRequestsPerDaySerializer).serialize(rows),
+                         serializers.TotalRequestsPerDaySerializer(rows, many=True).data)
+
+        rows = list(Incident.objects.values('type_of_service_request')
+                    .annotate(average_completion_time=Avg(F('completion_date') - F('creation_date')))
+                    .order_by('type_of_service_request'))
+        serializer = serializers.get_fast_serializer(serializers.AverageCompletionTimePerRequestSerializer)
+        self.assertEqual(serializer.serialize(rows),
+                         serializers.AverageCompletionTimePerRequestSerializer(rows, many=True).data)
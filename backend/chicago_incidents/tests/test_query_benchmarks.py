@@ -0,0 +1,65 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.benchmark_query_indexes import QUERIES_SQL
+from ..management.commands.benchmark_timestamp_indexes import METHODS, ORDERS
+
+
+class QueryBenchmarkTests(TestCase):
+    """The benchmarks of the queries run on their own synthetic tables, so they do not need the fixtures
+    """
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+
+    def run_benchmark(self, command: str, **options) -> dict:
+        """Run a benchmark command and read its report.
+
+        :param command: The name of the command.
+        :param options: The options of the command.
+        :return: The report of the command.
+        """
+        output = os.path.join(self.data_dir.name, f'{command}.json')
+        call_command(command, output=output, stdout=io.StringIO(), **options)
+        with open(output) as report:
+            return json.load(report)
+
+    def test_bounding_box_benchmark(self):
+        """Test that the bounding box query is benchmarked with the ranges of the coordinates and with the box of their
+        points, which give the same results (otherwise the command fails)
+        """
+        report = self.run_benchmark('benchmark_bounding_box', rows=500, days=3, boxes=3, box_size=0.1)
+        self.assertEqual(report['rows'], 500)
+        for name in ('range', 'box'):
+            self.assertGreaterEqual(report[name]['median_ms'], 0)
+            self.assertGreaterEqual(report[name]['max_ms'], report[name]['median_ms'])
+
+    def test_query_indexes_benchmark(self):
+        """Test that each query is benchmarked before and after its covering indexes, with the same results (otherwise
+        the command fails)
+        """
+        report = self.run_benchmark('benchmark_query_indexes', rows=500, days=10, range_days=3, repeat=2)
+        self.assertEqual(set(report['queries']), set(QUERIES_SQL))
+        for name, query in report['queries'].items():
+            with self.subTest(query=name):
+                self.assertEqual(set(query), {'before', 'after'})
+                self.assertGreaterEqual(query['after']['max_ms'], query['after']['median_ms'])
+
+    def test_timestamp_indexes_benchmark(self):
+        """Test that the indexes of the creation dates are benchmarked on the chronological and the random tables
+        """
+        report = self.run_benchmark('benchmark_timestamp_indexes', rows=500, insert_rows=50, days=100, ranges=2)
+        for order in ORDERS:
+            self.assertEqual(set(report[order]), set(METHODS))
+            for method, result in report[order].items():
+                with self.subTest(order=order, method=method):
+                    self.assertGreater(result['size_bytes'], 0)
+                    self.assertGreaterEqual(result['max_ms'], result['median_ms'])
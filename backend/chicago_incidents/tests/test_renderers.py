@@ -0,0 +1,37 @@
+import datetime
+import decimal
+from collections import OrderedDict
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from ..renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_same_output_as_json_renderer(self):
+        """Test that the fast renderer renders the values of the responses exactly as the JSON renderer of DRF
+        """
+        utc = datetime.timezone.utc
+        cases = [
+            [OrderedDict([('id', 1), ('street_address', 'Ελληνικά \u2028 \u2029'),
+                          ('latitude', '41.88000000000000000000'), ('zip_code', None)])],
+            {'creation_date': datetime.datetime(2020, 11, 15, 23, 11, 7, 285000, tzinfo=utc),
+             'completion_date': datetime.datetime(2020, 11, 15, tzinfo=utc),
+             'naive': datetime.datetime(2020, 11, 15, 23, 11), 'date': datetime.date(2020, 11, 15)},
+            {'average_completion_time': datetime.timedelta(days=3, seconds=7), 'latitude': decimal.Decimal('41.5'),
+             'number_of_requests': 2 ** 70, 1: 'key', 'detail': gettext_lazy('Not found.')},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent(self):
+        """Test that the indented responses (e.g. of the browsable API) are rendered as the JSON renderer does
+        """
+        data = {'type_of_service_request': 'POT_HOLE', 'number_of_requests': 2}
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=4'),
+                         JSONRenderer().render(data, 'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -10,7 +10,7 @@ from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 
-from .. import serializers
+from .. import caching, serializers
 from ..models import Incident
 
 
@@ -124,6 +124,13 @@ class IncidentViewSet(viewsets.mixins.RetrieveModelMixin, viewsets.mixins.Create
 
         return Response(status=status.HTTP_201_CREATED)
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Invalidate the cached responses of the queries when an incident is created.
+        """
+        if request.method == 'POST' and response.status_code == status.HTTP_201_CREATED:
+            caching.bump_data_version()
+        return super().finalize_response(request, response, *args, **kwargs)
+
     def get_serializer_class(self) -> typing.Type[Serializer]:
         """Get the serializer for the action.
 
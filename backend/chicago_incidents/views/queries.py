@@ -1,15 +1,17 @@
 import typing
 
 from django.db import connection
-from django.db.models import Count, Avg, F, Q, Sum
+from django.db.models import Count, DurationField, ExpressionWrapper, Q, QuerySet, Sum, Value
+from django.db.models.functions import NullIf
 from drf_yasg import utils
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
 
-from .. import serializers, pagination
-from ..models import Incident, AbandonedVehicle
+from .. import caching, exports, serializers, pagination
+from ..functions import PointInBox
+from ..models import Incident, IncidentDailyRollup, LicensePlateRequests, VehicleColorCount
 
 
 class QueriesViewSet(viewsets.GenericViewSet):
@@ -27,23 +29,26 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='totalRequestsPerType',
         serializer_class=serializers.TotalRequestsPerTypeSerializer
     )
+    @caching.cache_response(serializers.DateRangeParams)
     def total_requests_per_type(self, request):
         query_params = serializers.DateRangeParams(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
+        # The incidents are counted from their daily rollup
+        #
         # Raw SQL query (printed out executing print(queryset.query)") (%s: input dates):
         #
-        # SELECT "incidents"."type_of_service_request", COUNT("incidents"."type_of_service_request") AS
-        #   "number_of_requests" FROM "incidents" WHERE ("incidents"."creation_date" >= %s AND
-        #   "incidents"."creation_date" <= %s) GROUP BY "incidents"."type_of_service_request"
-        #   ORDER BY "number_of_requests" DESC;
-        queryset = Incident.objects.filter(creation_date__gte=data.get('start_date'),
-                                           creation_date__lte=data.get('end_date')) \
+        # SELECT "incidents_daily_rollup"."type_of_service_request",
+        #   SUM("incidents_daily_rollup"."number_of_requests") AS "number_of_requests" FROM "incidents_daily_rollup"
+        #   WHERE ("incidents_daily_rollup"."creation_date" >= %s AND "incidents_daily_rollup"."creation_date" <= %s)
+        #   GROUP BY "incidents_daily_rollup"."type_of_service_request" ORDER BY "number_of_requests" DESC;
+        queryset = IncidentDailyRollup.objects.filter(creation_date__gte=data.get('start_date'),
+                                                      creation_date__lte=data.get('end_date')) \
             .values('type_of_service_request') \
-            .annotate(number_of_requests=Count('type_of_service_request')) \
+            .annotate(number_of_requests=Sum('number_of_requests')) \
             .order_by('-number_of_requests')
-        serializer = serializers.TotalRequestsPerTypeSerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.TotalRequestsPerTypeSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the total requests per day for a specific request type and time range.',
@@ -54,28 +59,32 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='totalRequestsPerDay',
         serializer_class=serializers.TotalRequestsPerDaySerializer
     )
+    @caching.cache_response(serializers.DateAndRequestTypeParams)
     def total_requests_per_day(self, request):
         query_params = serializers.DateAndRequestTypeParams(data=self.request.query_params,
                                                             context={'request': request})
         query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
 
+        # The incidents are counted from their daily rollup
+        #
         # Raw SQL query (printed out executing print(queryset.query)") (%s: input values):
         #
-        # SELECT "incidents"."creation_date", COUNT("incidents"."service_request_number") AS "number_of_requests"
-        # FROM "incidents" WHERE ("incidents"."creation_date" >= %s AND
-        # "incidents"."creation_date" <= %s
-        # AND "incidents"."type_of_service_request" = %s)
-        # GROUP BY "incidents"."creation_date" ORDER BY "incidents"."creation_date" ASC
-        queryset = Incident.objects.filter(type_of_service_request=data.get('type_of_service_request'),
-                                           creation_date__gte=data.get('start_date'),
-                                           creation_date__lte=data.get('end_date')) \
+        # SELECT "incidents_daily_rollup"."creation_date",
+        # SUM("incidents_daily_rollup"."number_of_requests") AS "number_of_requests"
+        # FROM "incidents_daily_rollup" WHERE ("incidents_daily_rollup"."creation_date" >= %s AND
+        # "incidents_daily_rollup"."creation_date" <= %s
+        # AND "incidents_daily_rollup"."type_of_service_request" = %s)
+        # GROUP BY "incidents_daily_rollup"."creation_date" ORDER BY "incidents_daily_rollup"."creation_date" ASC
+        queryset = IncidentDailyRollup.objects.filter(type_of_service_request=data.get('type_of_service_request'),
+                                                      creation_date__gte=data.get('start_date'),
+                                                      creation_date__lte=data.get('end_date')) \
             .values('creation_date') \
-            .annotate(number_of_requests=Count('service_request_number')) \
+            .annotate(number_of_requests=Sum('number_of_requests')) \
             .order_by('creation_date')
 
-        serializer = serializers.TotalRequestsPerDaySerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.TotalRequestsPerDaySerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the most common service request per zipcode for a specific day.',
@@ -86,6 +95,7 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='mostCommonServicePerZipcode',
         serializer_class=serializers.MostFrequentRequestPerZipCodeSerializer
     )
+    @caching.cache_response(serializers.DateParam)
     def most_common_service_per_zipcode(self, request):
         query_params = serializers.DateParam(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
@@ -111,8 +121,8 @@ class QueriesViewSet(viewsets.GenericViewSet):
             for row in cursor.fetchall():
                 queryset.append(dict(zip(columns, row)))
 
-        serializer = serializers.MostFrequentRequestPerZipCodeSerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.MostFrequentRequestPerZipCodeSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the average completion time per service request for a specific date range.',
@@ -123,28 +133,33 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='averageCompletionTimePerRequest',
         serializer_class=serializers.AverageCompletionTimePerRequestSerializer
     )
+    @caching.cache_response(serializers.DateRangeParams)
     def average_completion_time_per_request(self, request):
         query_params = serializers.DateRangeParams(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
 
+        # The average is computed from the daily rollup of the incidents, as the sum of the completion times divided
+        # by the number of the completed incidents (exactly as PostgreSQL computes AVG of intervals)
+        #
         # Raw SQL query (printed out executing print(queryset.query)") (%s: input values):
         #
-        # SELECT "incidents"."type_of_service_request",
-        # AVG(("incidents"."completion_date" - "incidents"."creation_date")) AS "average_completion_time"
-        # FROM "incidents"
-        # WHERE ("incidents"."completion_date" IS NOT NULL
-        # AND "incidents"."creation_date" >= %s
-        # AND "incidents"."creation_date" <= %s)
-        # GROUP BY "incidents"."type_of_service_request"
-        # ORDER BY "incidents"."type_of_service_request" ASC
-        queryset = Incident.objects.filter(creation_date__gte=data.get('start_date'),
-                                           creation_date__lte=data.get('end_date')) \
+        # SELECT "incidents_daily_rollup"."type_of_service_request",
+        # (SUM("incidents_daily_rollup"."completion_time") /
+        # NULLIF(SUM("incidents_daily_rollup"."number_of_completed"), 0)) AS "average_completion_time"
+        # FROM "incidents_daily_rollup"
+        # WHERE ("incidents_daily_rollup"."creation_date" >= %s
+        # AND "incidents_daily_rollup"."creation_date" <= %s)
+        # GROUP BY "incidents_daily_rollup"."type_of_service_request"
+        # ORDER BY "incidents_daily_rollup"."type_of_service_request" ASC
+        queryset = IncidentDailyRollup.objects.filter(creation_date__gte=data.get('start_date'),
+                                                      creation_date__lte=data.get('end_date')) \
             .values('type_of_service_request') \
-            .annotate(average_completion_time=Avg(F('completion_date') - F('creation_date'))) \
+            .annotate(average_completion_time=ExpressionWrapper(
+                Sum('completion_time') / NullIf(Sum('number_of_completed'), 0), output_field=DurationField())) \
             .order_by('type_of_service_request')
-        serializer = serializers.AverageCompletionTimePerRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.AverageCompletionTimePerRequestSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the most common service request in a specified bounding box '
@@ -156,6 +171,7 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='mostCommonServiceInBoundingBox',
         serializer_class=serializers.MostFrequentRequestSerializer
     )
+    @caching.cache_response(serializers.DateParamWCoordinates)
     def most_common_service_in_bounding_box(self, request):
         query_params = serializers.DateParamWCoordinates(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
@@ -167,26 +183,33 @@ class QueriesViewSet(viewsets.GenericViewSet):
         #                                   |         |
         # point b: bottom right             * ------- b
         #
+        # The box is searched by the GiST index of the points of the coordinates, and the exact ranges of the
+        # coordinates are checked on the rows that it finds (the box of PostgreSQL compares with a small tolerance)
+        #
         # Raw SQL query (printed out executing print(queryset.query)") (%s: input values):
         #
         # SELECT "incidents"."type_of_service_request",
         # COUNT("incidents"."type_of_service_request") AS "number_of_requests"
         # FROM "incidents"
-        # WHERE ("incidents"."creation_date" = %s AND "incidents"."latitude" >= %s
+        # WHERE (point("incidents"."longitude", "incidents"."latitude") <@ box(point(%s, %s), point(%s, %s))
+        # AND "incidents"."creation_date" = %s AND "incidents"."latitude" >= %s
         # AND "incidents"."latitude" <= %s AND "incidents"."longitude" >= %s
         # AND "incidents"."longitude" <= %s)
         # GROUP BY "incidents"."type_of_service_request"
         # ORDER BY "number_of_requests" DESC
         # LIMIT 1
-        queryset = Incident.objects.filter(creation_date=data.get('date'),
+        queryset = Incident.objects.filter(PointInBox('longitude', 'latitude',
+                                                      Value(data.get('a_longitude')), Value(data.get('b_latitude')),
+                                                      Value(data.get('b_longitude')), Value(data.get('a_latitude'))),
+                                           creation_date=data.get('date'),
                                            latitude__range=[data.get('b_latitude'), data.get('a_latitude')],
                                            longitude__range=[data.get('a_longitude'), data.get('b_longitude')]) \
             .values('type_of_service_request') \
             .annotate(number_of_requests=Count('type_of_service_request')) \
             .order_by('-number_of_requests')[:1]
 
-        serializer = serializers.MostFrequentRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.MostFrequentRequestSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the top-5 Special Service Areas (SSA) with regards to total number of requests per '
@@ -199,28 +222,32 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='top5SSA',
         serializer_class=serializers.RequestsPerSSASerializer
     )
+    @caching.cache_response(serializers.DateRangeParams)
     def top_5_ssa_per_day(self, request):
         query_params = serializers.DateRangeParams(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
 
+        # The incidents are counted from their daily rollup
+        #
         # Raw SQL query (printed out executing print(queryset.query)") (%s: input values):
         #
-        # SELECT "incidents"."ssa", COUNT("incidents"."service_request_number") AS "number_of_requests"
-        # FROM "incidents"
-        # WHERE ("incidents"."creation_date" >= %s AND "incidents"."creation_date" <= %s
-        # AND "incidents"."ssa" IS NOT NULL)
-        # GROUP BY "incidents"."ssa"
+        # SELECT "incidents_daily_rollup"."ssa", SUM("incidents_daily_rollup"."number_of_requests") AS
+        # "number_of_requests"
+        # FROM "incidents_daily_rollup"
+        # WHERE ("incidents_daily_rollup"."creation_date" >= %s AND "incidents_daily_rollup"."creation_date" <= %s
+        # AND "incidents_daily_rollup"."ssa" IS NOT NULL)
+        # GROUP BY "incidents_daily_rollup"."ssa"
         # ORDER BY "number_of_requests" DESC
         # LIMIT 5
-        queryset = Incident.objects.filter(creation_date__gte=data.get('start_date'),
-                                           creation_date__lte=data.get('end_date'),
-                                           ssa__isnull=False) \
+        queryset = IncidentDailyRollup.objects.filter(creation_date__gte=data.get('start_date'),
+                                                      creation_date__lte=data.get('end_date'),
+                                                      ssa__isnull=False) \
             .values('ssa') \
-            .annotate(number_of_requests=Count('service_request_number')) \
+            .annotate(number_of_requests=Sum('number_of_requests')) \
             .order_by('-number_of_requests')[:5]
-        serializer = serializers.RequestsPerSSASerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.RequestsPerSSASerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the license plates (if any) that have been involved in abandoned vehicle complaints '
@@ -229,33 +256,59 @@ class QueriesViewSet(viewsets.GenericViewSet):
     )
     @action(
         methods=['get'], detail=False, url_path='licensePlates',
+        pagination_class=pagination.LicensePlatesPagination,
         serializer_class=serializers.LicensePlatesSerializer
     )
+    @caching.cache_response()
     def license_plates(self, request):
-        queryset = []
-        with connection.cursor() as cursor:
-            # Some details about the following...
-            # In order to avoid duplicate requests we can depend on selecting the requests that have status
-            # equal to 'OPEN' and counting distinct addresses
-            # (what is the possibility to have an another incident with the same vehicle at the same address)
-            cursor.execute('SELECT abandoned_vehicles.license_plate, \
-                            COUNT(DISTINCT incidents.street_address) AS number_of_requests \
-                            FROM abandoned_vehicles \
-                            LEFT OUTER JOIN abandoned_vehicles_incidents \
-                            ON (abandoned_vehicles.id = abandoned_vehicles_incidents.abandoned_vehicle_id) \
-                            LEFT OUTER JOIN incidents \
-                            ON (abandoned_vehicles_incidents.incident_id = incidents.id) \
-                            WHERE abandoned_vehicles.license_plate IS NOT NULL \
-                            AND incidents.status = \'OPEN\' \
-                            GROUP BY abandoned_vehicles.license_plate \
-                            HAVING COUNT(DISTINCT incidents.street_address) > 1;')
-            # Flush out the results to list
-            columns = [column[0] for column in cursor.description]
-            for row in cursor.fetchall():
-                queryset.append(dict(zip(columns, row)))
+        # The license plates are read from a materialized view, which is refreshed after the imports. Some details
+        # about its query...
+        # In order to avoid duplicate requests we can depend on selecting the requests that have status
+        # equal to 'OPEN' and counting distinct addresses
+        # (what is the possibility to have an another incident with the same vehicle at the same address)
+        #
+        # SELECT abandoned_vehicles.license_plate, COUNT(DISTINCT incidents.street_address) AS number_of_requests
+        # FROM abandoned_vehicles
+        # LEFT OUTER JOIN abandoned_vehicles_incidents
+        # ON (abandoned_vehicles.id = abandoned_vehicles_incidents.abandoned_vehicle_id)
+        # LEFT OUTER JOIN incidents
+        # ON (abandoned_vehicles_incidents.incident_id = incidents.id)
+        # WHERE abandoned_vehicles.license_plate IS NOT NULL
+        # AND incidents.status = 'OPEN'
+        # GROUP BY abandoned_vehicles.license_plate
+        # HAVING COUNT(DISTINCT incidents.street_address) > 1
+        #
+        # Apply pagination to the query only when it is asked for, by the license plates when the `cursor` is given
+        queryset = self.get_license_plates_queryset()
+        page = self.paginate_queryset(queryset)
+        serializer = serializers.get_fast_serializer(serializers.LicensePlatesSerializer)
+        if page is None:
+            return Response(serializer.serialize(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
 
-        serializer = serializers.LicensePlatesSerializer(queryset, many=True)
-        return Response(serializer.data)
+    @utils.swagger_auto_schema(
+        operation_summary='Export all the license plates that have been involved in abandoned vehicle complaints more '
+                          'than once, as NDJSON or CSV.',
+        operation_description='',
+        query_serializer=serializers.ExportParams
+    )
+    @action(
+        methods=['get'], detail=False, url_path='licensePlates/export',
+        serializer_class=serializers.LicensePlatesSerializer
+    )
+    def license_plates_export(self, request):
+        query_params = serializers.ExportParams(data=self.request.query_params, context={'request': request})
+        query_params.is_valid(raise_exception=True)
+        return exports.export_response(self.get_license_plates_queryset(), ['license_plate', 'number_of_requests'],
+                                       query_params.validated_data.get('output_format'), 'license_plates')
+
+    @staticmethod
+    def get_license_plates_queryset() -> QuerySet:
+        """Get the query of the license plates that have been involved in abandoned vehicle complaints more than once.
+
+        :return: The query, ordered by the license plates.
+        """
+        return LicensePlateRequests.objects.values('license_plate', 'number_of_requests').order_by('license_plate')
 
     @utils.swagger_auto_schema(
         operation_summary='Find the second most common color of vehicles involved in abandoned vehicle complaints.',
@@ -265,21 +318,26 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='secondMostCommonColor',
         serializer_class=serializers.VehicleColorSerializer
     )
+    @caching.cache_response()
     def second_most_common_color(self, request):
+        # The colors are counted by a materialized view, which is refreshed after the imports
+        #
         # Raw SQL:
         #
+        # SELECT "vehicle_color_counts"."vehicle_color", "vehicle_color_counts"."color_count"
+        # FROM "vehicle_color_counts"
+        # ORDER BY "vehicle_color_counts"."color_count" DESC
+        # LIMIT 1 OFFSET 1
+        #
+        # where the view counts the colors of the abandoned vehicles:
+        #
         # SELECT "abandoned_vehicles"."vehicle_color", COUNT("abandoned_vehicles"."vehicle_color") AS "color_count"
         # FROM "abandoned_vehicles"
         # WHERE "abandoned_vehicles"."vehicle_color" IS NOT NULL
         # GROUP BY "abandoned_vehicles"."vehicle_color"
-        # ORDER BY "color_count" DESC
-        # LIMIT 1 OFFSET 1
-        queryset = AbandonedVehicle.objects.filter(vehicle_color__isnull=False) \
-            .values('vehicle_color') \
-            .annotate(color_count=Count('vehicle_color')) \
-            .order_by('-color_count')[1:2]
-        serializer = serializers.VehicleColorSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = VehicleColorCount.objects.values('vehicle_color', 'color_count').order_by('-color_count')[1:2]
+        serializer = serializers.get_fast_serializer(serializers.VehicleColorSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the rodent baiting requests where the number of premises baited or with garbage or '
@@ -292,10 +350,43 @@ class QueriesViewSet(viewsets.GenericViewSet):
         pagination_class=pagination.Pagination,
         serializer_class=serializers.IncidentMinifiedSerializer
     )
+    @caching.cache_response(serializers.RodentBaitingParams)
     def rodent_baiting(self, request):
         query_params = serializers.RodentBaitingParams(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
+        queryset = self.get_rodent_baiting_queryset(query_params.validated_data)
+
+        # Apply pagination to the query
+        page = self.paginate_queryset(self.filter_queryset(queryset=queryset))
+        serializer = serializers.get_fast_serializer(serializers.IncidentMinifiedSerializer)
+        return self.get_paginated_response(serializer.serialize(page))
+
+    @utils.swagger_auto_schema(
+        operation_summary='Export all the rodent baiting requests where the number of premises baited or with garbage '
+                          'or with rats (on choice) is less than a specified number, as NDJSON or CSV.',
+        operation_description='',
+        query_serializer=serializers.RodentBaitingExportParams
+    )
+    @action(
+        methods=['get'], detail=False, url_path='rodentBaiting/export',
+        serializer_class=serializers.IncidentMinifiedSerializer
+    )
+    def rodent_baiting_export(self, request):
+        query_params = serializers.RodentBaitingExportParams(data=self.request.query_params,
+                                                             context={'request': request})
+        query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
+        return exports.export_response(self.get_rodent_baiting_queryset(data),
+                                       serializers.IncidentMinifiedSerializer.Meta.fields,
+                                       data.get('output_format'), 'rodent_baiting')
+
+    @staticmethod
+    def get_rodent_baiting_queryset(data: dict) -> QuerySet:
+        """Get the query of the rodent baiting requests.
+
+        :param data: The validated parameters of the query.
+        :return: The query, ordered by the ids of the incidents.
+        """
         type_of_premises = data.get('type_of_premises')
 
         # Raw SQL (without pagination)
@@ -319,12 +410,8 @@ class QueriesViewSet(viewsets.GenericViewSet):
             queryset = queryset.filter(rodent_baiting_premises__number_of_premises_w_rats__lt=data.get('threshold')) \
                 .order_by('id')
         else:
-            queryset = []
-
-        # Apply pagination to the query
-        page = self.paginate_queryset(self.filter_queryset(queryset=queryset))
-        serializer = serializers.IncidentMinifiedSerializer(page, many=True)
-        return Response(serializer.data)
+            queryset = queryset.none()
+        return queryset
 
     @utils.swagger_auto_schema(
         operation_summary='Find the police districts that have handled “pot holes” requests with more than one number '
@@ -337,6 +424,7 @@ class QueriesViewSet(viewsets.GenericViewSet):
         methods=['get'], detail=False, url_path='policeDistrict',
         serializer_class=serializers.PoliceDistrictSerializer
     )
+    @caching.cache_response(serializers.DateParam)
     def police_districts(self, request):
         query_params = serializers.DateParam(data=self.request.query_params, context={'request': request})
         query_params.is_valid(raise_exception=True)
@@ -368,8 +456,8 @@ class QueriesViewSet(viewsets.GenericViewSet):
                       potholes_sum=Sum('number_of_carts_and_potholes__number_of_elements')) \
             .filter(rodent_baiting_sum__gt=1, potholes_sum__gt=1) \
             .order_by('police_district')
-        serializer = serializers.PoliceDistrictSerializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = serializers.get_fast_serializer(serializers.PoliceDistrictSerializer)
+        return Response(serializer.serialize(queryset))
 
     @utils.swagger_auto_schema(
         operation_summary='Find the incidents that happened in address and the zip code given',
@@ -381,22 +469,61 @@ class QueriesViewSet(viewsets.GenericViewSet):
         pagination_class=pagination.Pagination,
         serializer_class=serializers.IncidentMinifiedSerializer
     )
+    @caching.cache_response(serializers.SearchByAddressZipcodeParams)
     def search_incident_by_address_and_zip_code(self, request):
         query_params = serializers.SearchByAddressZipcodeParams(data=self.request.query_params,
                                                                 context={'request': request})
         query_params.is_valid(raise_exception=True)
+        queryset = self.get_search_by_address_queryset(query_params.validated_data)
+
+        # Apply pagination to the query
+        page = self.paginate_queryset(self.filter_queryset(queryset=queryset))
+        serializer = serializers.get_fast_serializer(serializers.IncidentMinifiedSerializer)
+        return self.get_paginated_response(serializer.serialize(page))
+
+    @utils.swagger_auto_schema(
+        operation_summary='Export all the incidents that happened in address and the zip code given, as NDJSON or CSV.',
+        operation_description='',
+        query_serializer=serializers.SearchByAddressZipcodeExportParams
+    )
+    @action(
+        methods=['get'], detail=False, url_path='searchByAddressZipcode/export',
+        serializer_class=serializers.IncidentMinifiedSerializer
+    )
+    def search_incident_by_address_and_zip_code_export(self, request):
+        query_params = serializers.SearchByAddressZipcodeExportParams(data=self.request.query_params,
+                                                                      context={'request': request})
+        query_params.is_valid(raise_exception=True)
         data = query_params.validated_data
+        return exports.export_response(self.get_search_by_address_queryset(data).order_by('id'),
+                                       serializers.IncidentMinifiedSerializer.Meta.fields,
+                                       data.get('output_format'), 'incidents_by_address_zipcode')
+
+    @staticmethod
+    def get_search_by_address_queryset(data: dict) -> QuerySet:
+        """Get the query of the incidents by address and zipcode.
 
+        :param data: The validated parameters of the query.
+        :return: The query.
+        """
         queryset = Incident.objects.values('id', 'service_request_number', 'type_of_service_request',
                                            'street_address', 'zip_code', 'latitude', 'longitude')
         if data.get('address'):
             queryset = queryset.filter(street_address=data.get('address'))
         if data.get('zipcode') is not None:
             queryset = queryset.filter(zip_code=data.get('zipcode'))
+        return queryset
 
-        # Apply pagination to the query
-        page = self.paginate_queryset(self.filter_queryset(queryset=queryset))
-        serializer = serializers.IncidentMinifiedSerializer(page, many=True)
+    @utils.swagger_auto_schema(
+        operation_summary='Get the hits and misses of the cache of the queries, in total and per query.',
+        operation_description='',
+    )
+    @action(
+        methods=['get'], detail=False, url_path='cacheStats',
+        serializer_class=serializers.QueriesCacheStatsSerializer
+    )
+    def cache_stats(self, request):
+        serializer = serializers.QueriesCacheStatsSerializer(caching.get_stats())
         return Response(serializer.data)
 
     def get_permissions(self) -> typing.List[BasePermission]:
@@ -15,6 +15,8 @@ import os
 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -158,19 +160,53 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
-# Session configuration
+# Session configuration. The sessions are kept by the shared tier of the cache only (see `SHARED_ONLY_PREFIXES` of
+# `TieredCache`), so that a logout at a process is seen by the others at once
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 
 # Django caching methods
 # https://docs.djangoproject.com/en/3.1/topics/cache/
 
-CACHES = {
-    'default': {
+# The cache has two tiers: a bounded LRU cache in the memory of each process, in front of a cache that is shared by the
+# processes. The shared cache is Redis when CHICAGO_INCIDENT_CACHE_URL is a `redis://` URL, the database cache table
+# when it is `db://` and a local memory cache when it is `locmem://`. A local memory cache is not shared by the
+# processes (nor are the sessions that it keeps), so it is only the default when DEBUG is set
+CACHE_URL = os.getenv('CHICAGO_INCIDENT_CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    SHARED_CACHE = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': CACHE_URL,
+    }
+elif CACHE_URL.startswith('db://'):
+    SHARED_CACHE = {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'cache_table',
     }
+elif CACHE_URL.startswith('locmem://') or (not CACHE_URL and DEBUG):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+else:
+    raise ImproperlyConfigured(f'CHICAGO_INCIDENT_CACHE_URL must be a redis://, db:// or locmem:// URL, '
+                               f'not {CACHE_URL!r}')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'chicago_incidents.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            # The entries of the in-process tier and the seconds they are kept before they are read from the shared tier
+            'MAX_ENTRIES': int(os.getenv('CHICAGO_INCIDENT_LOCAL_CACHE_ENTRIES', 5000)),
+            'LOCAL_TIMEOUT': int(os.getenv('CHICAGO_INCIDENT_LOCAL_CACHE_TIMEOUT', 5)),
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
+# The seconds that the responses of the queries endpoints are cached. The cached responses are invalidated anyway when
+# the incidents are imported or created
+QUERIES_CACHE_TIMEOUT = 60 * 60 * 24
+
 # REST framework configuration
 # https://www.django-rest-framework.org/api-guide/settings/
 
@@ -181,7 +217,11 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'chicago_incidents.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 # Django CORS headers